@@ -11,11 +11,23 @@ Features:
 - Time-based anomaly detection (unusual check-in times)
 - Streak analysis
 - Risk scoring (0-100)
+- Vectorized class-wide analysis over columnar check-in arrays
+- Incremental per-student mode with O(1) updates and persisted state
+- Timezone-aware, circular hour-of-day statistics (per-course UTC offset)
+- Per-course Isolation Forest scoring via a persisted model registry
+- Cross-student proxy detection (clusters that check in together)
+- Cached feature extraction with vectorized re-scoring under new weights
 """
 
 import numpy as np
-from datetime import datetime, timedelta
-import json
+import threading
+from collections import OrderedDict
+
+from checkin_columns import CheckinColumns, segment_count, segment_diffs, segment_sum
+from proxy_detector import ProxyDetector
+from risk_features import ClassFeatures
+from risk_state import StudentRiskState
+from time_of_day import HOURS_PER_DAY, circular_delta, local_hours, unwrap_hours
 
 
 class AnomalyDetector:
@@ -24,6 +36,10 @@ class AnomalyDetector:
     # Thresholds
     Z_SCORE_THRESHOLD = 2.0  # Standard deviations for outlier
     MIN_SAMPLES = 5  # Minimum samples for statistical analysis
+    MAX_EXAMPLES = 5  # Examples kept per aggregated finding
+    RAPID_WINDOW = 60  # Seconds between check-ins considered rapid
+    ROBOTIC_CV_THRESHOLD = 0.01  # Interval std / mean below this is bot-like
+    MAX_CACHED_STATES = 10000  # Students kept in memory (LRU) when there is no state store
     RISK_WEIGHTS = {
         "time_anomaly": 0.3,
         "pattern_anomaly": 0.3,
@@ -31,7 +47,33 @@ class AnomalyDetector:
         "streak_anomaly": 0.2,
     }
 
-    def analyze_student(self, student_data):
+    FEATURE_NAMES = (
+        "hour_mean", "hour_std", "interval_cv", "gap_ratio",
+        "attendance_rate", "streak_ratio",
+    )
+
+    def __init__(self, state_store=None, model_registry=None, utc_offset_minutes=None,
+                 course_utc_offsets=None):
+        """
+        Args:
+            state_store: optional RiskStateStore persisting incremental
+                per-student state (see record_checkin); it is the only copy
+                of the state, so workers sharing it stay consistent
+            model_registry: optional ModelRegistry with per-course
+                Isolation Forest models used by analyze_class
+            utc_offset_minutes: default local time offset used for
+                hour-of-day checks (None = server timezone)
+            course_utc_offsets: optional {course_id: offset minutes}
+        """
+        self.state_store = state_store
+        self.model_registry = model_registry
+        self.utc_offset_minutes = utc_offset_minutes
+        self.course_utc_offsets = dict(course_utc_offsets or {})
+        self.proxy_detector = ProxyDetector()
+        self._states = OrderedDict()  # student -> state, only without a state store
+        self._state_lock = threading.Lock()
+
+    def analyze_student(self, student_data, utc_offset_minutes=None):
         """
         Analyze a student's attendance for anomalies.
         
@@ -41,254 +83,819 @@ class AnomalyDetector:
                 - session_ids: list of session IDs attended
                 - total_sessions: total number of sessions
                 - streak: current consecutive streak
+            utc_offset_minutes: local time offset for hour-of-day checks
+                (default: the detector's)
                 
         Returns:
             dict with risk_score (0-100), anomalies list, and details
         """
-        anomalies = []
-        risk_components = {}
-
-        checkin_times = student_data.get("checkin_times", [])
-        session_ids = student_data.get("session_ids", [])
-        total_sessions = student_data.get("total_sessions", 0)
-        streak = student_data.get("streak", 0)
-
-        # 1. Time-based anomaly detection
-        time_risk = self._check_time_anomalies(checkin_times)
-        risk_components["time_anomaly"] = time_risk["risk"]
-        if time_risk["anomalies"]:
-            anomalies.extend(time_risk["anomalies"])
-
-        # 2. Pattern analysis
-        pattern_risk = self._check_pattern_anomalies(session_ids, total_sessions)
-        risk_components["pattern_anomaly"] = pattern_risk["risk"]
-        if pattern_risk["anomalies"]:
-            anomalies.extend(pattern_risk["anomalies"])
-
-        # 3. Frequency analysis
-        freq_risk = self._check_frequency_anomalies(checkin_times)
-        risk_components["frequency_anomaly"] = freq_risk["risk"]
-        if freq_risk["anomalies"]:
-            anomalies.extend(freq_risk["anomalies"])
-
-        # 4. Streak analysis
-        streak_risk = self._check_streak_anomalies(streak, total_sessions, len(session_ids))
-        risk_components["streak_anomaly"] = streak_risk["risk"]
-        if streak_risk["anomalies"]:
-            anomalies.extend(streak_risk["anomalies"])
-
-        # Calculate weighted risk score
-        risk_score = int(sum(
-            risk_components[k] * self.RISK_WEIGHTS[k]
-            for k in self.RISK_WEIGHTS
-        ))
-        risk_score = min(100, max(0, risk_score))
+        columns = CheckinColumns.from_students([student_data])
+        columns.utc_offset_minutes = self.resolve_utc_offset(utc_offset_minutes=utc_offset_minutes)
+        return self._analyze_columns(columns)[0]
 
-        # Determine flag
-        if risk_score > 70:
-            flag = "high_risk"
-            recommendation = "Manual verification recommended. Multiple anomaly patterns detected."
-        elif risk_score > 40:
-            flag = "medium_risk"
-            recommendation = "Some unusual patterns detected. Monitor closely."
-        else:
-            flag = "low_risk"
-            recommendation = "Attendance patterns appear normal."
-
-        return {
-            "risk_score": risk_score,
-            "flag": flag,
-            "recommendation": recommendation,
-            "anomalies": anomalies,
-            "risk_components": risk_components,
-            "stats": {
-                "sessions_attended": len(session_ids),
-                "total_sessions": total_sessions,
-                "attendance_rate": round(len(session_ids) / max(total_sessions, 1) * 100, 1),
-                "current_streak": streak,
-            },
-        }
-
-    def analyze_class(self, students_data):
+    def analyze_class(self, students_data, course_id=None, utc_offset_minutes=None):
         """
         Analyze entire class attendance for anomalies.
         
         Args:
             students_data: list of student_data dicts
+            course_id: optional course; with a model registry, students are
+                also scored by the course's Isolation Forest and the class
+                is queued as training data for the next scheduled retrain
+            utc_offset_minutes: local time offset for hour-of-day checks
+                (default: the course's, else the detector's)
             
         Returns:
-            dict with class-level analytics and flagged students
+            dict with class-level analytics, flagged students and clusters
+            of students who repeatedly check in together (proxy_clusters)
         """
-        results = []
-        risk_scores = []
+        return self.analyze_class_columns(
+            CheckinColumns.from_students(students_data), course_id, utc_offset_minutes,
+        )
 
-        for student in students_data:
-            result = self.analyze_student(student)
-            result["student_id"] = student.get("student_id", "unknown")
-            results.append(result)
-            risk_scores.append(result["risk_score"])
+    def analyze_class_columns(self, columns, course_id=None, utc_offset_minutes=None):
+        """
+        analyze_class for data already in columnar form (e.g. built with
+        CheckinColumns.from_npz), skipping per-student Python lists.
+        """
+        columns.utc_offset_minutes = self.resolve_utc_offset(course_id, utc_offset_minutes)
+        results = self._analyze_columns(columns)
+        for result, student_id in zip(results, columns.student_ids):
+            result["student_id"] = student_id
 
-        if not risk_scores:
+        if not results:
             return {"results": [], "summary": {}}
 
+        model_summary = None
+        if self.model_registry is not None and course_id is not None:
+            model_summary = self._score_with_model(course_id, columns, results)
+
         flagged = [r for r in results if r["flag"] in ("high_risk", "medium_risk")]
+        summary = self._class_summary(
+            np.array([r["risk_score"] for r in results]),
+            [r["stats"]["attendance_rate"] for r in results],
+        )
 
-        summary = {
-            "total_students": len(results),
-            "avg_risk_score": round(np.mean(risk_scores), 1),
-            "max_risk_score": int(np.max(risk_scores)),
-            "high_risk_count": sum(1 for r in results if r["flag"] == "high_risk"),
-            "medium_risk_count": sum(1 for r in results if r["flag"] == "medium_risk"),
-            "low_risk_count": sum(1 for r in results if r["flag"] == "low_risk"),
-            "avg_attendance_rate": round(np.mean([
-                r["stats"]["attendance_rate"] for r in results
-            ]), 1),
-        }
+        if model_summary is not None:
+            summary["model"] = model_summary
+
+        proxy_clusters = self._proxy_clusters(columns)
+        summary["proxy_cluster_count"] = len(proxy_clusters)
 
         return {
             "results": results,
             "flagged_students": flagged,
+            "proxy_clusters": proxy_clusters,
             "summary": summary,
         }
 
-    def _check_time_anomalies(self, timestamps):
-        """Check for unusual check-in times."""
-        if len(timestamps) < self.MIN_SAMPLES:
-            return {"risk": 0, "anomalies": []}
+    def _class_summary(self, risk_scores, attendance_rates):
+        """Class-level summary from per-student risk scores and attendance rates (%)."""
+        high = int(np.count_nonzero(risk_scores > 70))
+        medium = int(np.count_nonzero(risk_scores > 40)) - high
+        return {
+            "total_students": len(risk_scores),
+            "avg_risk_score": round(np.mean(risk_scores), 1),
+            "max_risk_score": int(np.max(risk_scores)),
+            "high_risk_count": high,
+            "medium_risk_count": medium,
+            "low_risk_count": len(risk_scores) - high - medium,
+            "avg_attendance_rate": round(np.mean(attendance_rates), 1),
+        }
+
+    def _proxy_clusters(self, columns):
+        """Proxy-attendance clusters with student indexes mapped to ids."""
+        ids = columns.student_ids
+        clusters = self.proxy_detector.find_clusters(columns)
+        for cluster in clusters:
+            cluster["students"] = [ids[i] for i in cluster.pop("members")]
+            for pair in cluster["pairs"]:
+                pair["students"] = [ids[i] for i in pair["students"]]
+        return clusters
+
+    def submit_training(self, course_id, students_data, utc_offset_minutes=None):
+        """
+        Queue a class as training data for the course's model; fitting
+        happens on the registry's background schedule.
 
+        Returns:
+            True if queued, False if there are too few students
+        """
+        if self.model_registry is None:
+            raise ValueError("No model registry configured")
+        columns = CheckinColumns.from_students(students_data)
+        columns.utc_offset_minutes = self.resolve_utc_offset(course_id, utc_offset_minutes)
+        return self.model_registry.submit(course_id, self._student_features(columns), self.FEATURE_NAMES)
+
+    def _score_with_model(self, course_id, columns, results):
+        """Attach Isolation Forest scores to results; returns model summary or None."""
+        features = self._student_features(columns)
+        self.model_registry.submit(course_id, features, self.FEATURE_NAMES)
+
+        scored = self.model_registry.score(course_id, features)
+        if scored is None:
+            return None
+
+        scores, meta = scored
+        outliers = scores < 0
+        for result, score, outlier in zip(results, scores.tolist(), outliers.tolist()):
+            result["model_score"] = round(score, 4)
+            result["model_outlier"] = outlier
+        return {
+            "version": meta["version"],
+            "trained_at": meta["trained_at"],
+            "outlier_count": int(outliers.sum()),
+        }
+
+    def _student_features(self, columns):
+        """
+        Per-student feature matrix (columns follow FEATURE_NAMES), computed
+        with segmented reductions over the whole class.
+        """
+        n = len(columns)
+        counts = columns.checkin_counts
+        attended = columns.session_counts
+        total = columns.total_sessions
+
+        hours = unwrap_hours(local_hours(columns.timestamps, columns.utc_offset_minutes), columns.offsets)
+        hour_mean = segment_sum(hours, columns.offsets) / np.maximum(counts, 1)
+        hour_var = segment_sum(hours * hours, columns.offsets) / np.maximum(counts, 1) - hour_mean ** 2
+        hour_std = np.sqrt(np.maximum(hour_var, 0))
+        hour_mean = hour_mean % HOURS_PER_DAY
+
+        diffs, diff_owner = segment_diffs(columns.timestamps, columns.checkin_owner())
+        interval_counts = np.maximum(counts - 1, 1)
+        interval_mean = np.bincount(diff_owner, weights=diffs, minlength=n) / interval_counts
+        deviation = diffs - interval_mean[diff_owner]
+        interval_std = np.sqrt(np.bincount(diff_owner, weights=deviation * deviation, minlength=n) / interval_counts)
+
+        gaps, gap_owner = segment_diffs(columns.session_ids, columns.session_owner())
+        avg_gap = np.bincount(gap_owner, weights=gaps, minlength=n) / np.maximum(attended - 1, 1)
+        gap_max = np.zeros(n)
+        np.maximum.at(gap_max, gap_owner, gaps)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            interval_cv = np.where(interval_mean > 0, interval_std / interval_mean, 0.0)
+            gap_ratio = np.where(avg_gap > 0, gap_max / avg_gap, 0.0)
+
+        attendance_rate = attended / np.where(total != 0, total, 1)
+        streak_ratio = columns.streaks / np.maximum(attended, 1)
+
+        return np.column_stack([
+            hour_mean, hour_std, interval_cv, gap_ratio, attendance_rate, streak_ratio,
+        ])
+
+    # ── Feature extraction / re-scoring ───────────────────────
+
+    def extract_features(self, students_data, course_id=None, utc_offset_minutes=None):
+        """
+        Extract the raw features every risk check is based on, so the class
+        can later be re-scored with other weights and thresholds (see
+        score_features) without reprocessing check-ins.
+
+        Args:
+            students_data: list of student_data dicts as for analyze_class
+            course_id, utc_offset_minutes: select the hour-of-day offset,
+                as for analyze_class
+
+        Returns:
+            ClassFeatures
+        """
+        columns = CheckinColumns.from_students(students_data)
+        columns.utc_offset_minutes = self.resolve_utc_offset(course_id, utc_offset_minutes)
+        counts = columns.checkin_counts
+
+        time_eligible = counts >= self.MIN_SAMPLES
+        owner, hours, z_scores, in_scope = self._hour_z_scores(columns, time_eligible)
+        off_hours = segment_count(time_eligible[owner] & ((hours < 6) | (hours > 22)), columns.offsets)
+        scored = in_scope & (z_scores > 0)
+
+        diffs, diff_owner = segment_diffs(columns.timestamps, columns.checkin_owner())
+        candidates = counts >= 5
+        interval_mean, ratio = self._interval_regularity(diffs, diff_owner, counts, candidates)
+        interval_cv = np.where(candidates & (interval_mean > 0), ratio, np.inf)
+        frequency_eligible = (counts >= 3)[diff_owner]
+
+        avg_gap, gap_max = self._gap_statistics(columns)
+
+        return ClassFeatures(
+            columns.student_ids,
+            np.column_stack([
+                counts, columns.session_counts, columns.total_sessions, columns.streaks,
+                off_hours, avg_gap, gap_max, interval_cv,
+            ]),
+            owner[scored], z_scores[scored],
+            diff_owner[frequency_eligible], diffs[frequency_eligible],
+        )
+
+    def score_features(self, features, risk_weights=None, z_score_threshold=None,
+                       rapid_window=None, robotic_cv_threshold=None):
+        """
+        Score extracted features with the given weights and thresholds
+        (class defaults where omitted), vectorized over all students.
+
+        Results match analyze_class for the default settings, except where
+        a value lies within float32 rounding of a threshold.
+
+        Returns:
+            dict with risk_scores (int array) and risk_components
+            ({check: int array})
+        """
+        weights = dict(self.RISK_WEIGHTS)
+        for key, value in (risk_weights or {}).items():
+            if key not in weights:
+                raise ValueError(f"Unknown risk weight: {key}. Expected one of: {', '.join(weights)}")
+            weights[key] = float(value)
+        z_threshold = float(self.Z_SCORE_THRESHOLD if z_score_threshold is None else z_score_threshold)
+        window = float(self.RAPID_WINDOW if rapid_window is None else rapid_window)
+        cv_threshold = float(self.ROBOTIC_CV_THRESHOLD if robotic_cv_threshold is None else robotic_cv_threshold)
+
+        n = len(features)
+        checkins = features.column("checkins")
+        attended = features.column("sessions_attended")
+        total = features.column("total_sessions")
+        streak = features.column("streak")
+        avg_gap = features.column("avg_gap")
+        gap_max = features.column("max_gap")
+
+        outliers = np.bincount(features.z_owner[features.z_scores > z_threshold], minlength=n)
+        time_risk = 20 * outliers + 15 * features.column("off_hours").astype(np.int64)
+
+        active = (attended > 0) & (total != 0)
+        attendance_rate = attended / np.where(total != 0, total, 1)
+        spikes = active & (attended >= 3) & (gap_max > avg_gap * 3) & (gap_max > 3)
+        low = active & (attendance_rate < 0.3) & (total > 5)
+        pattern_risk = 30 * spikes + 20 * low
+
+        rapid = (features.intervals > 0) & (features.intervals < window)
+        robotic = features.column("interval_cv") < cv_threshold
+        frequency_risk = 40 * np.bincount(features.interval_owner[rapid], minlength=n) + 30 * robotic
+        frequency_risk = np.where(checkins >= 3, frequency_risk, 0)
+
+        suspicious = (total != 0) & (streak == attended) & (streak > 10) & (attendance_rate < 0.5)
+        streak_risk = 25 * suspicious
+
+        components = {
+            "time_anomaly": np.minimum(time_risk, 100).astype(np.int64),
+            "pattern_anomaly": np.minimum(pattern_risk, 100).astype(np.int64),
+            "frequency_anomaly": np.minimum(frequency_risk, 100).astype(np.int64),
+            "streak_anomaly": np.minimum(streak_risk, 100).astype(np.int64),
+        }
+
+        weighted = 0
+        for k in weights:
+            weighted = weighted + components[k] * weights[k]
+        risk_scores = np.clip(np.asarray(weighted).astype(np.int64), 0, 100)
+        return {"risk_scores": risk_scores, "risk_components": components}
+
+    def summarize_scores(self, features, scores):
+        """Class summary (as in analyze_class) for score_features output."""
+        if len(features) == 0:
+            return {}
+        attended = features.column("sessions_attended").astype(np.float64)
+        total = features.column("total_sessions").astype(np.float64)
+        attendance_rates = np.round(attended / np.maximum(total, 1) * 100, 1)
+        return self._class_summary(scores["risk_scores"], attendance_rates)
+
+    def _analyze_columns(self, columns):
+        """
+        Run every anomaly check over all students at once.
+
+        Each check returns a per-student risk array plus a sparse
+        {student index: [anomaly, ...]} dict; only the final assembly of
+        result dicts loops over students.
+        """
+        checks = {
+            "time_anomaly": self._check_time_anomalies(columns),
+            "pattern_anomaly": self._check_pattern_anomalies(columns),
+            "frequency_anomaly": self._check_frequency_anomalies(columns),
+            "streak_anomaly": self._check_streak_anomalies(columns),
+        }
+
+        # Calculate weighted risk score
+        weighted = 0
+        for k in self.RISK_WEIGHTS:
+            weighted = weighted + checks[k][0] * self.RISK_WEIGHTS[k]
+        risk_scores = np.clip(weighted.astype(np.int64), 0, 100).tolist()
+
+        risks = {k: checks[k][0].tolist() for k in checks}
+        attended = columns.session_counts.tolist()
+        total_sessions = columns.total_sessions.tolist()
+        streaks = columns.streaks.tolist()
+
+        results = []
+        for i in range(len(columns)):
+            anomalies = []
+            for k in checks:
+                anomalies.extend(checks[k][1].get(i, ()))
+
+            risk_score = risk_scores[i]
+            flag, recommendation = self._flag(risk_score)
+
+            results.append({
+                "risk_score": risk_score,
+                "flag": flag,
+                "recommendation": recommendation,
+                "anomalies": anomalies,
+                "risk_components": {k: risks[k][i] for k in checks},
+                "stats": {
+                    "sessions_attended": attended[i],
+                    "total_sessions": total_sessions[i],
+                    "attendance_rate": round(attended[i] / max(total_sessions[i], 1) * 100, 1),
+                    "current_streak": streaks[i],
+                },
+            })
+
+        return results
+
+    # ── Incremental mode ──────────────────────────────────────
+
+    def record_checkin(self, student_id, timestamp, session_id=None, total_sessions=None, streak=None,
+                       course_id=None, utc_offset_minutes=None):
+        """
+        Fold one new check-in into the student's running state in O(1) and
+        return the updated risk assessment, without resending history.
+
+        Args:
+            student_id: student key (prefix with the course to scope per course)
+            timestamp: unix time of the check-in
+            session_id: optional session the check-in belongs to
+            total_sessions: optional current number of sessions held
+            streak: optional on-chain streak; derived from session ids if omitted
+            course_id, utc_offset_minutes: select the hour-of-day offset,
+                as for analyze_class
+
+        Returns:
+            dict shaped like analyze_student's result, plus new_anomalies
+            raised by this check-in
+        """
+        hour = float(local_hours([timestamp], self.resolve_utc_offset(course_id, utc_offset_minutes))[0])
+
+        def apply(state):
+            new_anomalies = self._update_state(state, timestamp, hour, session_id, total_sessions, streak)
+            return new_anomalies, self._score_state(state)
+
+        if self.state_store is not None:
+            new_anomalies, result = self.state_store.update(student_id, apply)
+        else:
+            with self._state_lock:
+                new_anomalies, result = apply(self._load_state(student_id))
+
+        result["new_anomalies"] = new_anomalies
+        return result
+
+    def get_student_state(self, student_id):
+        """Return the current risk assessment from stored state, or None."""
+        if self.state_store is not None:
+            state = self.state_store.load(student_id)
+            return self._score_state(state) if state is not None else None
+        with self._state_lock:
+            state = self._load_state(student_id, create=False)
+            return self._score_state(state) if state is not None else None
+
+    def _load_state(self, student_id, create=True):
+        """In-memory state (no state store), least recently used evicted first."""
+        state = self._states.get(student_id)
+        if state is not None:
+            self._states.move_to_end(student_id)
+        elif create:
+            state = self._states[student_id] = StudentRiskState()
+            if len(self._states) > self.MAX_CACHED_STATES:
+                self._states.popitem(last=False)
+        return state
+
+    def _update_state(self, state, timestamp, hour, session_id, total_sessions, streak):
+        """Apply one check-in (local hour of day given) to state; returns anomalies it raised."""
+        new_anomalies = []
+
+        state.add_hour(hour)
+        if hour < 6 or hour > 22:
+            state.off_hours_checkins += 1
+
+        # Z-score of the new check-in against the history including it
+        std = state.hour_std
+        if state.checkins >= self.MIN_SAMPLES and std > 0:
+            z_score = abs(circular_delta(hour, state.hour_mean)) / std
+            if z_score > self.Z_SCORE_THRESHOLD:
+                state.time_outliers += 1
+                new_anomalies.append({
+                    "type": "unusual_checkin_time",
+                    "detail": f"Check-in at unusual time ({hour:.1f}h, z-score: {z_score:.1f})",
+                    "severity": "medium" if z_score < 3 else "high",
+                })
+
+        if state.last_timestamp is not None and timestamp >= state.last_timestamp:
+            interval = timestamp - state.last_timestamp
+            state.add_interval(interval)
+            if 0 < interval < self.RAPID_WINDOW:
+                state.rapid_checkins += 1
+                new_anomalies.append({
+                    "type": "rapid_checkin",
+                    "detail": f"Two check-ins within {interval}s - possible proxy attendance",
+                    "severity": "high",
+                })
+        if state.last_timestamp is None or timestamp > state.last_timestamp:
+            state.last_timestamp = timestamp
+
+        if session_id is not None and session_id != state.last_session:
+            state.sessions_attended += 1
+            if state.last_session is not None and session_id > state.last_session:
+                gap = session_id - state.last_session
+                state.gap_count += 1
+                state.gap_sum += gap
+                state.max_gap = max(state.max_gap, gap)
+                state.streak = state.streak + 1 if gap == 1 else 1
+            elif state.last_session is None:
+                state.streak = 1
+            if state.last_session is None or session_id > state.last_session:
+                state.last_session = session_id
+
+        if streak is not None:
+            state.streak = streak
+        if total_sessions is not None:
+            state.total_sessions = total_sessions
+        state.total_sessions = max(state.total_sessions, state.sessions_attended)
+
+        return new_anomalies
+
+    def _score_state(self, state):
+        """Risk assessment from running state, mirroring the batch checks."""
+        risk_components = {}
         anomalies = []
+
+        # 1. Time-based (evaluated once MIN_SAMPLES check-ins exist)
         risk = 0
+        if state.checkins >= self.MIN_SAMPLES:
+            risk = state.time_outliers * 20 + state.off_hours_checkins * 15
+            if state.time_outliers:
+                anomalies.append({
+                    "type": "unusual_checkin_time",
+                    "detail": f"{state.time_outliers} check-ins at unusual times",
+                    "severity": "medium",
+                    "count": state.time_outliers,
+                })
+            if state.off_hours_checkins:
+                anomalies.append({
+                    "type": "off_hours_checkin",
+                    "detail": f"{state.off_hours_checkins} check-ins outside normal hours (6AM-10PM)",
+                    "severity": "medium",
+                })
+        risk_components["time_anomaly"] = min(100, risk)
 
-        # Convert to hours of day
-        hours = []
-        for ts in timestamps:
-            dt = datetime.fromtimestamp(ts)
-            hours.append(dt.hour + dt.minute / 60)
+        # 2. Pattern
+        risk = 0
+        attended, total = state.sessions_attended, state.total_sessions
+        if attended and total:
+            if attended >= 3 and state.gap_count:
+                avg_gap = state.gap_sum / state.gap_count
+                if state.max_gap > avg_gap * 3 and state.max_gap > 3:
+                    risk += 30
+                    anomalies.append({
+                        "type": "irregular_pattern",
+                        "detail": f"Large attendance gap detected (max gap: {state.max_gap} sessions)",
+                        "severity": "medium",
+                    })
+            attendance_rate = attended / total
+            if attendance_rate < 0.3 and total > 5:
+                risk += 20
+                anomalies.append({
+                    "type": "low_attendance",
+                    "detail": f"Attendance rate is only {attendance_rate*100:.0f}%",
+                    "severity": "low",
+                })
+        risk_components["pattern_anomaly"] = min(100, risk)
 
-        hours = np.array(hours)
-        mean_hour = np.mean(hours)
-        std_hour = np.std(hours) if len(hours) > 1 else 1
+        # 3. Frequency
+        risk = 0
+        if state.checkins >= 3:
+            risk += state.rapid_checkins * 40
+            if state.rapid_checkins:
+                anomalies.append({
+                    "type": "rapid_checkin",
+                    "detail": f"{state.rapid_checkins} check-ins within {self.RAPID_WINDOW}s of the previous one - possible proxy attendance",
+                    "severity": "high",
+                    "count": state.rapid_checkins,
+                })
+            if (state.checkins >= 5 and state.interval_mean > 0
+                    and state.interval_std / state.interval_mean < self.ROBOTIC_CV_THRESHOLD):
+                risk += 30
+                anomalies.append({
+                    "type": "robotic_pattern",
+                    "detail": "Perfectly regular check-in intervals detected",
+                    "severity": "medium",
+                })
+        risk_components["frequency_anomaly"] = min(100, risk)
+
+        # 4. Streak
+        risk = 0
+        if total:
+            attendance_rate = attended / total
+            if state.streak == attended and state.streak > 10 and attendance_rate < 0.5:
+                risk += 25
+                anomalies.append({
+                    "type": "suspicious_streak",
+                    "detail": f"Perfect streak of {state.streak} but only {attendance_rate*100:.0f}% overall attendance",
+                    "severity": "medium",
+                })
+        risk_components["streak_anomaly"] = min(100, risk)
+
+        risk_score = int(sum(risk_components[k] * self.RISK_WEIGHTS[k] for k in self.RISK_WEIGHTS))
+        risk_score = min(100, max(0, risk_score))
+        flag, recommendation = self._flag(risk_score)
+
+        return {
+            "risk_score": risk_score,
+            "flag": flag,
+            "recommendation": recommendation,
+            "anomalies": anomalies,
+            "risk_components": risk_components,
+            "stats": {
+                "sessions_attended": attended,
+                "total_sessions": total,
+                "attendance_rate": round(attended / max(total, 1) * 100, 1),
+                "current_streak": state.streak,
+                "checkins": state.checkins,
+                "last_checkin": state.last_timestamp,
+            },
+        }
+
+    def resolve_utc_offset(self, course_id=None, utc_offset_minutes=None):
+        """
+        UTC offset (minutes) for hour-of-day checks: the explicit value,
+        else the course's configured offset, else the detector default.
+        None means the server's local timezone.
+        """
+        if utc_offset_minutes is None and course_id is not None:
+            utc_offset_minutes = self.course_utc_offsets.get(str(course_id))
+        if utc_offset_minutes is None:
+            utc_offset_minutes = self.utc_offset_minutes
+        if utc_offset_minutes is None:
+            return None
+        try:
+            utc_offset_minutes = int(utc_offset_minutes)
+        except (TypeError, ValueError):
+            raise ValueError("utc_offset_minutes must be an integer")
+        if not -720 <= utc_offset_minutes <= 840:
+            raise ValueError("utc_offset_minutes must be between -720 and 840")
+        return utc_offset_minutes
+
+    def _flag(self, risk_score):
+        """Map a risk score to (flag, recommendation)."""
+        if risk_score > 70:
+            return "high_risk", "Manual verification recommended. Multiple anomaly patterns detected."
+        if risk_score > 40:
+            return "medium_risk", "Some unusual patterns detected. Monitor closely."
+        return "low_risk", "Attendance patterns appear normal."
+
+    def _check_time_anomalies(self, columns):
+        """Check for unusual check-in times."""
+        n = len(columns)
+        counts = columns.checkin_counts
+        risk = np.zeros(n, dtype=np.int64)
+        anomalies = {}
+
+        eligible = counts >= self.MIN_SAMPLES
+        if not eligible.any():
+            return risk, anomalies
+
+        owner, hours, z_scores, in_scope = self._hour_z_scores(columns, eligible)
 
         # Check for check-ins at unusual times
-        for i, h in enumerate(hours):
-            if std_hour > 0:
-                z_score = abs(h - mean_hour) / std_hour
-                if z_score > self.Z_SCORE_THRESHOLD:
-                    anomalies.append({
-                        "type": "unusual_checkin_time",
-                        "detail": f"Check-in at unusual time ({h:.1f}h, z-score: {z_score:.1f})",
-                        "severity": "medium" if z_score < 3 else "high",
-                    })
-                    risk += 20
+        outliers = in_scope & (z_scores > self.Z_SCORE_THRESHOLD)
+        risk += 20 * segment_count(outliers, columns.offsets)
+
+        # One finding per student, however many check-ins are outliers
+        for i, h, z in self._group_events(owner[outliers], hours[outliers], z_scores[outliers]):
+            max_z = z.max()
+            if len(h) == 1:
+                detail = f"Check-in at unusual time ({h[0]:.1f}h, z-score: {z[0]:.1f})"
+            else:
+                detail = f"{len(h)} check-ins at unusual times (max z-score: {max_z:.1f})"
+            anomalies.setdefault(i, []).append({
+                "type": "unusual_checkin_time",
+                "detail": detail,
+                "severity": "medium" if max_z < 3 else "high",
+                "count": len(h),
+                "examples": [
+                    {"hour": round(hour, 1), "z_score": round(z_score, 1)}
+                    for hour, z_score in zip(h[:self.MAX_EXAMPLES].tolist(), z[:self.MAX_EXAMPLES].tolist())
+                ],
+            })
 
         # Check for very early or very late check-ins
-        unusual_hours = sum(1 for h in hours if h < 6 or h > 22)
-        if unusual_hours > 0:
-            risk += unusual_hours * 15
-            anomalies.append({
+        off_hours = eligible[owner] & ((hours < 6) | (hours > 22))
+        unusual_hours = segment_count(off_hours, columns.offsets)
+        risk += unusual_hours * 15
+        for i in np.flatnonzero(unusual_hours).tolist():
+            anomalies.setdefault(i, []).append({
                 "type": "off_hours_checkin",
-                "detail": f"{unusual_hours} check-ins outside normal hours (6AM-10PM)",
+                "detail": f"{unusual_hours[i]} check-ins outside normal hours (6AM-10PM)",
                 "severity": "medium",
             })
 
-        return {"risk": min(100, risk), "anomalies": anomalies}
+        return np.minimum(risk, 100), anomalies
 
-    def _check_pattern_anomalies(self, session_ids, total_sessions):
+    def _hour_z_scores(self, columns, eligible):
+        """
+        Hour of day and its per-student z-score for every check-in.
+
+        Returns:
+            (owner, hours, z_scores, in_scope) per-check-in arrays; z_scores
+            are 0 and in_scope False for students not eligible
+        """
+        counts = columns.checkin_counts
+
+        # Convert to hours of day; statistics use each student's hours
+        # unwrapped around the circle so check-ins near midnight stay close
+        owner = columns.checkin_owner()
+        hours = local_hours(columns.timestamps, columns.utc_offset_minutes)
+        unwrapped = unwrap_hours(hours, columns.offsets)
+        safe_counts = np.maximum(counts, 1)
+
+        mean_hour = segment_sum(unwrapped, columns.offsets) / safe_counts
+        deviation = unwrapped - mean_hour[owner]
+        std_hour = np.sqrt(segment_sum(deviation * deviation, columns.offsets) / safe_counts)
+        std_hour = np.where(counts > 1, std_hour, 1.0)
+        z_scores = self._z_scores(deviation, std_hour, owner, eligible)
+
+        # Segmented sums round differently from np.mean/np.std in the last
+        # bit; redo students with a z-score on a decision boundary exactly
+        # so results never depend on summation order.
+        edge = np.unique(owner[self._near_boundary(z_scores, (self.Z_SCORE_THRESHOLD, 3.0))])
+        for i in edge.tolist():
+            student_hours = unwrapped[columns.offsets[i]:columns.offsets[i + 1]]
+            mean_hour[i] = np.mean(student_hours)
+            std_hour[i] = np.std(student_hours) if len(student_hours) > 1 else 1
+        if edge.size:
+            deviation = unwrapped - mean_hour[owner]
+            z_scores = self._z_scores(deviation, std_hour, owner, eligible)
+
+        in_scope = eligible[owner] & (std_hour[owner] > 0)
+        return owner, hours, z_scores, in_scope
+
+    def _check_pattern_anomalies(self, columns):
         """Check for suspicious attendance patterns."""
-        if not session_ids or total_sessions == 0:
-            return {"risk": 0, "anomalies": []}
+        n = len(columns)
+        attended = columns.session_counts
+        total = columns.total_sessions
+        risk = np.zeros(n, dtype=np.int64)
+        anomalies = {}
 
-        anomalies = []
-        risk = 0
-        attendance_rate = len(session_ids) / total_sessions
+        active = (attended > 0) & (total != 0)
 
         # Sudden attendance spike (attended 0-20% then suddenly 100%)
-        if len(session_ids) >= 3:
-            # Check if there are large gaps then sudden attendance
-            sorted_ids = sorted(session_ids)
-            gaps = [sorted_ids[i+1] - sorted_ids[i] for i in range(len(sorted_ids)-1)]
-
-            if gaps:
-                avg_gap = np.mean(gaps)
-                max_gap = max(gaps)
-
-                if max_gap > avg_gap * 3 and max_gap > 3:
-                    risk += 30
-                    anomalies.append({
-                        "type": "irregular_pattern",
-                        "detail": f"Large attendance gap detected (max gap: {max_gap} sessions)",
-                        "severity": "medium",
-                    })
+        # Check if there are large gaps then sudden attendance
+        has_gaps = active & (attended >= 3)
+        avg_gap, gap_max = self._gap_statistics(columns)
+
+        spikes = has_gaps & (gap_max > avg_gap * 3) & (gap_max > 3)
+        risk += 30 * spikes
+        for i in np.flatnonzero(spikes).tolist():
+            anomalies.setdefault(i, []).append({
+                "type": "irregular_pattern",
+                "detail": f"Large attendance gap detected (max gap: {gap_max[i]} sessions)",
+                "severity": "medium",
+            })
 
         # Very low attendance
-        if attendance_rate < 0.3 and total_sessions > 5:
-            risk += 20
-            anomalies.append({
+        attendance_rate = attended / np.where(total != 0, total, 1)
+        low = active & (attendance_rate < 0.3) & (total > 5)
+        risk += 20 * low
+        for i in np.flatnonzero(low).tolist():
+            anomalies.setdefault(i, []).append({
                 "type": "low_attendance",
-                "detail": f"Attendance rate is only {attendance_rate*100:.0f}%",
+                "detail": f"Attendance rate is only {attendance_rate[i]*100:.0f}%",
                 "severity": "low",
             })
 
-        return {"risk": min(100, risk), "anomalies": anomalies}
+        return np.minimum(risk, 100), anomalies
 
-    def _check_frequency_anomalies(self, timestamps):
+    def _gap_statistics(self, columns):
+        """Mean and max gap between consecutive attended session ids."""
+        n = len(columns)
+        gaps, gap_owner = segment_diffs(columns.session_ids, columns.session_owner())
+        avg_gap = np.bincount(gap_owner, weights=gaps, minlength=n) / np.maximum(columns.session_counts - 1, 1)
+        gap_max = np.zeros(n, dtype=gaps.dtype)
+        np.maximum.at(gap_max, gap_owner, gaps)
+        return avg_gap, gap_max
+
+    def _check_frequency_anomalies(self, columns):
         """Check for suspicious check-in frequency patterns."""
-        if len(timestamps) < 3:
-            return {"risk": 0, "anomalies": []}
+        n = len(columns)
+        counts = columns.checkin_counts
+        risk = np.zeros(n, dtype=np.int64)
+        anomalies = {}
 
-        anomalies = []
-        risk = 0
+        eligible = counts >= 3
+        if not eligible.any():
+            return risk, anomalies
 
-        sorted_ts = sorted(timestamps)
+        # Interval between sorted check-ins k and k + 1 of the same student
+        diffs, diff_owner = segment_diffs(columns.timestamps, columns.checkin_owner())
 
         # Check for rapid successive check-ins (proxy indicator)
-        for i in range(1, len(sorted_ts)):
-            diff = sorted_ts[i] - sorted_ts[i-1]
-            # If two check-ins within 60 seconds - suspicious
-            if diff < 60 and diff > 0:
-                risk += 40
-                anomalies.append({
-                    "type": "rapid_checkin",
-                    "detail": f"Two check-ins within {diff}s - possible proxy attendance",
-                    "severity": "high",
-                })
+        # If two check-ins within 60 seconds - suspicious
+        rapid = eligible[diff_owner] & (diffs < self.RAPID_WINDOW) & (diffs > 0)
+        risk += 40 * np.bincount(diff_owner[rapid], minlength=n)
+        for i, gaps in self._group_events(diff_owner[rapid], diffs[rapid]):
+            min_gap = gaps.min().item()
+            if len(gaps) == 1:
+                detail = f"Two check-ins within {min_gap}s - possible proxy attendance"
+            else:
+                detail = (f"{len(gaps)} check-ins within {self.RAPID_WINDOW}s of the previous one "
+                          f"(min gap: {min_gap}s) - possible proxy attendance")
+            anomalies.setdefault(i, []).append({
+                "type": "rapid_checkin",
+                "detail": detail,
+                "severity": "high",
+                "count": len(gaps),
+                "min_gap": min_gap,
+                "median_gap": float(np.median(gaps)),
+                "examples": gaps[:self.MAX_EXAMPLES].tolist(),
+            })
 
         # Check for perfectly regular intervals (bot-like behavior)
-        if len(sorted_ts) >= 5:
-            intervals = [sorted_ts[i+1] - sorted_ts[i] for i in range(len(sorted_ts)-1)]
-            if intervals:
-                interval_std = np.std(intervals)
-                interval_mean = np.mean(intervals)
-                if interval_mean > 0 and interval_std / interval_mean < 0.01:
-                    risk += 30
-                    anomalies.append({
-                        "type": "robotic_pattern",
-                        "detail": "Perfectly regular check-in intervals detected",
-                        "severity": "medium",
-                    })
+        candidates = counts >= 5
+        if candidates.any():
+            interval_mean, ratio = self._interval_regularity(diffs, diff_owner, counts, candidates)
+            robotic = candidates & (interval_mean > 0) & (ratio < self.ROBOTIC_CV_THRESHOLD)
+            risk += 30 * robotic
+            for i in np.flatnonzero(robotic).tolist():
+                anomalies.setdefault(i, []).append({
+                    "type": "robotic_pattern",
+                    "detail": "Perfectly regular check-in intervals detected",
+                    "severity": "medium",
+                })
 
-        return {"risk": min(100, risk), "anomalies": anomalies}
+        return np.minimum(risk, 100), anomalies
 
-    def _check_streak_anomalies(self, streak, total_sessions, attended):
+    def _interval_regularity(self, diffs, diff_owner, counts, candidates):
+        """
+        Mean check-in interval and its coefficient of variation (std / mean,
+        inf where the mean is 0) per student.
+        """
+        n = len(counts)
+        interval_counts = np.maximum(counts - 1, 1)
+        interval_mean = np.bincount(diff_owner, weights=diffs, minlength=n) / interval_counts
+        deviation = diffs - interval_mean[diff_owner]
+        interval_std = np.sqrt(
+            np.bincount(diff_owner, weights=deviation * deviation, minlength=n) / interval_counts
+        )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(interval_mean > 0, interval_std / interval_mean, np.inf)
+
+        # Redo boundary cases with np.mean/np.std, as for time anomalies
+        for i in np.flatnonzero(candidates & self._near_boundary(ratio, (self.ROBOTIC_CV_THRESHOLD,))).tolist():
+            student_diffs = diffs[diff_owner == i]
+            ratio[i] = np.std(student_diffs) / np.mean(student_diffs)
+        return interval_mean, ratio
+
+    def _check_streak_anomalies(self, columns):
         """Check for suspicious streak patterns."""
-        anomalies = []
-        risk = 0
-
-        if total_sessions == 0:
-            return {"risk": 0, "anomalies": []}
+        attended = columns.session_counts
+        total = columns.total_sessions
+        streak = columns.streaks
+        anomalies = {}
 
-        attendance_rate = attended / total_sessions
+        attendance_rate = attended / np.where(total != 0, total, 1)
 
         # Perfect attendance with very long streak is suspicious if it's inconsistent
-        if streak == attended and streak > 10 and attendance_rate < 0.5:
-            risk += 25
-            anomalies.append({
+        suspicious = (total != 0) & (streak == attended) & (streak > 10) & (attendance_rate < 0.5)
+        risk = 25 * suspicious.astype(np.int64)
+        for i in np.flatnonzero(suspicious).tolist():
+            anomalies.setdefault(i, []).append({
                 "type": "suspicious_streak",
-                "detail": f"Perfect streak of {streak} but only {attendance_rate*100:.0f}% overall attendance",
+                "detail": f"Perfect streak of {streak[i]} but only {attendance_rate[i]*100:.0f}% overall attendance",
                 "severity": "medium",
             })
 
-        return {"risk": min(100, risk), "anomalies": anomalies}
+        return np.minimum(risk, 100), anomalies
+
+    def _group_events(self, owners, *values):
+        """
+        Yield (student index, *per-student value arrays) for flagged events
+        whose owners are sorted, so findings are built per student rather
+        than per event.
+        """
+        students, starts, counts = np.unique(owners, return_index=True, return_counts=True)
+        for i, start, count in zip(students.tolist(), starts.tolist(), counts.tolist()):
+            yield (i,) + tuple(v[start:start + count] for v in values)
+
+    def _z_scores(self, deviation, std_hour, owner, eligible):
+        """Per-check-in z-score of hour of day (0 where not evaluated)."""
+        z_scores = np.zeros_like(deviation)
+        in_scope = eligible[owner] & (std_hour[owner] > 0)
+        z_scores[in_scope] = np.abs(deviation[in_scope]) / std_hour[owner][in_scope]
+        return z_scores
+
+    def _near_boundary(self, values, boundaries, rel_tol=1e-9):
+        """Mask of values within floating-point noise of any boundary."""
+        near = np.zeros(values.shape, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for b in boundaries:
+                near |= np.abs(values - b) <= rel_tol * max(1.0, abs(b))
+        return near
 
 
 # Quick test
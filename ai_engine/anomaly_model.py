@@ -0,0 +1,191 @@
+"""
+CampusTrust AI - Anomaly Model Registry
+=========================================
+Per-course Isolation Forest models over student attendance features.
+
+Models are fitted in batch, persisted to disk with a version hash and
+loaded once per worker process; scoring a class is one vectorized
+decision_function call. Retraining runs on a background schedule from
+the latest class data submitted, so request latency never includes
+fitting.
+
+Features:
+- Train / persist / load Isolation Forest models per course
+- Version hash over training data and model parameters
+- Picks up models retrained by other workers (file mtime check)
+- Background retraining thread with a configurable interval
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+import time
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+
+class ModelRegistry:
+    """Train, persist and serve per-course Isolation Forest models."""
+
+    MIN_TRAINING_SAMPLES = 10
+
+    def __init__(self, model_dir, n_estimators=100, contamination="auto", random_state=42):
+        """
+        Args:
+            model_dir: directory holding <course>.pkl model files
+            n_estimators: trees per forest
+            contamination: IsolationForest contamination parameter
+            random_state: seed so retraining on the same data is reproducible
+        """
+        self.model_dir = model_dir
+        self.params = {
+            "n_estimators": n_estimators,
+            "contamination": contamination,
+            "random_state": random_state,
+        }
+        self._models = {}  # course_id -> (model, meta, file mtime)
+        self._pending = {}  # course_id -> (features, feature_names) awaiting retraining
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(model_dir, exist_ok=True)
+
+    def train(self, course_id, features, feature_names=None):
+        """
+        Fit and persist a model for a course.
+
+        Args:
+            course_id: course the model belongs to
+            features: (n_students, n_features) array
+            feature_names: optional column names stored with the model
+
+        Returns:
+            model metadata dict (version, trained_at, n_samples, ...)
+        """
+        features = np.asarray(features, dtype=np.float32)
+        if features.ndim != 2 or len(features) < self.MIN_TRAINING_SAMPLES:
+            raise ValueError(
+                f"Need at least {self.MIN_TRAINING_SAMPLES} students to train a model"
+            )
+
+        model = IsolationForest(**self.params).fit(features)
+        meta = {
+            "course_id": str(course_id),
+            "version": self._version(features),
+            "trained_at": int(time.time()),
+            "n_samples": len(features),
+            "feature_names": list(feature_names or []),
+        }
+
+        path = self._path(course_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"model": model, "meta": meta}, f)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._models[str(course_id)] = (model, meta, os.stat(path).st_mtime)
+        return meta
+
+    def get(self, course_id):
+        """Return (model, meta) for a course, or None if none is trained."""
+        key = str(course_id)
+        path = self._path(course_id)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            cached = self._models.get(key)
+        if cached is not None and cached[2] == mtime:
+            return cached[0], cached[1]
+
+        with open(path, "rb") as f:
+            stored = pickle.load(f)
+        with self._lock:
+            self._models[key] = (stored["model"], stored["meta"], mtime)
+        return stored["model"], stored["meta"]
+
+    def score(self, course_id, features):
+        """
+        Score students with the course's model.
+
+        Returns:
+            (scores, meta) where lower scores are more anomalous and
+            negative scores are outliers, or None if no model exists
+        """
+        entry = self.get(course_id)
+        if entry is None:
+            return None
+        model, meta = entry
+        features = np.asarray(features, dtype=np.float32)
+        if len(features) == 0:
+            return np.zeros(0), meta
+        return model.decision_function(features), meta
+
+    def submit(self, course_id, features, feature_names=None):
+        """Queue the latest class features for the next scheduled retrain."""
+        if len(features) < self.MIN_TRAINING_SAMPLES:
+            return False
+        with self._lock:
+            self._pending[str(course_id)] = (np.array(features, dtype=np.float32), feature_names)
+        return True
+
+    def retrain_pending(self):
+        """Train every course with queued data; returns {course_id: meta or error}."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        trained = {}
+        for course_id, (features, feature_names) in pending.items():
+            entry = self.get(course_id)
+            if entry is not None and entry[1]["version"] == self._version(features):
+                continue
+            try:
+                trained[course_id] = self.train(course_id, features, feature_names)
+            except Exception as e:
+                trained[course_id] = {"error": str(e)}
+        return trained
+
+    def start(self, interval=3600):
+        """Retrain queued courses every `interval` seconds in a daemon thread."""
+        if self._thread is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                self.retrain_pending()
+
+        self._thread = threading.Thread(target=run, name="anomaly-model-retrain", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def list_models(self):
+        """Metadata of every model on disk."""
+        models = []
+        for name in sorted(os.listdir(self.model_dir)):
+            if name.endswith(".pkl"):
+                entry = self.get(name[:-len(".pkl")])
+                if entry is not None:
+                    models.append(entry[1])
+        return models
+
+    def pending_courses(self):
+        with self._lock:
+            return list(self._pending)
+
+    def _version(self, features):
+        digest = hashlib.sha256(np.ascontiguousarray(features).tobytes())
+        digest.update(json.dumps(self.params, sort_keys=True).encode())
+        return digest.hexdigest()[:16]
+
+    def _path(self, course_id):
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", str(course_id))
+        return os.path.join(self.model_dir, f"{safe}.pkl")
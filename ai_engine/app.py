@@ -7,10 +7,37 @@ governance platform on Algorand.
 Endpoints:
 - POST /api/ai/sentiment       - Analyze feedback sentiment
 - POST /api/ai/sentiment/batch  - Batch sentiment analysis
+- POST /api/ai/sentiment/stream - Streaming NDJSON sentiment analysis
+- GET  /api/ai/sentiment/cache  - Sentiment result cache statistics
+- GET  /api/ai/sentiment/stats/<course_id> - Running per-course sentiment statistics
 - POST /api/ai/anomaly         - Detect attendance anomalies
-- POST /api/ai/anomaly/class   - Class-wide anomaly analysis
+- POST /api/ai/anomaly/class   - Class-wide anomaly analysis (JSON or .npz; top_k, cursor/limit, summary_only)
+- GET  /api/ai/anomaly/class/<analysis_id> - Page through a cached class analysis
+- POST /api/ai/anomaly/checkin - Incremental anomaly scoring for one new check-in
+- GET  /api/ai/anomaly/state/<student_id> - Current incremental risk state
+- POST /api/ai/anomaly/features - Extract and cache risk features for a class
+- POST /api/ai/anomaly/rescore - Re-score cached features with new weights/thresholds
+- POST /api/ai/anomaly/campus  - Start a campus-wide multi-course anomaly job
+- GET  /api/ai/anomaly/campus/<job_id> - Job progress and campus summary
+- GET  /api/ai/anomaly/campus/<job_id>/<course_id> - One course's full result
+- POST /api/ai/anomaly/model/train - Queue class data for model retraining
+- GET  /api/ai/anomaly/models  - List trained anomaly models
+- POST /api/ai/anomaly/chain/<app_id>/sync - Rebuild check-in timelines from on-chain transactions
+- POST /api/ai/anomaly/chain/<app_id>/analyze - Class analysis of an app's on-chain timelines
+- POST /api/ai/anomaly/session/start - Open a live session for real-time check-in monitoring
+- POST /api/ai/anomaly/session/checkin - Ingest one live check-in (alerts pushed over socketio)
+- POST /api/ai/anomaly/session/end - Close a live session
+- GET  /api/ai/anomaly/session/<session_id> - Arrival rate, device counts and alerts of a session
 - POST /api/ai/nlp/keyphrases  - Extract key phrases
 - POST /api/ai/nlp/similarity  - Compute text similarity
+- POST /api/ai/nlp/similarity/matrix - Pairwise similarity of N texts (dense matrix or pairs above a threshold)
+- POST /api/ai/nlp/similarity/search - Most similar indexed proposals/feedback to a text
+- POST /api/ai/nlp/corpus      - Add or replace documents in the similarity index
+- DELETE /api/ai/nlp/corpus/<doc_id> - Remove a document from the similarity index
+- GET  /api/ai/nlp/corpus      - Similarity index statistics
+- POST /api/ai/nlp/duplicates  - Find (and optionally index) near-duplicates of a text
+- DELETE /api/ai/nlp/duplicates/<doc_id> - Remove a document from the near-duplicate index
+- GET  /api/ai/nlp/duplicates  - Near-duplicate index statistics
 - POST /api/ai/nlp/summarize   - Summarize text
 - POST /api/ai/proposal/score  - Score voting proposal quality
 - POST /api/ai/credential/analyze - Analyze credential description
@@ -19,27 +46,145 @@ Endpoints:
 - GET  /api/ai/health           - Health check
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
+from algosdk.v2client.indexer import IndexerClient
+from collections import OrderedDict, deque
+import heapq
 import hashlib
+import io
 import json
+import math
+import os
+import threading
 import time
 
-from sentiment_analyzer import SentimentAnalyzer
+from sentiment_analyzer import SentimentAnalyzer, SentimentTally
 from anomaly_detector import AnomalyDetector
 from nlp_processor import NLPProcessor
 from ai_automation import CampusAutomation, generate_hash
+from result_cache import ResultCache
+from risk_state import RiskStateStore
+from anomaly_model import ModelRegistry
+from risk_features import ClassFeatures
+from campus_job import CampusAnomalyJobs
+from checkin_columns import CheckinColumns
+from session_monitor import SessionMonitor
+from chain_timeline import CheckinIngestor, TimelineStore
+from corpus_index import CorpusIndex
+from near_duplicates import NearDuplicateIndex
 
 app = Flask(__name__)
 # Allow CORS for specific origins and methods
 CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+# Models, jobs, state and indexes default to one data directory (not the CWD);
+# each location can still be overridden with its own variable below
+DATA_DIR = os.environ.get("AI_ENGINE_DATA_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+os.makedirs(DATA_DIR, exist_ok=True)
+
 # Initialize AI services
-sentiment_analyzer = SentimentAnalyzer()
-anomaly_detector = AnomalyDetector()
+sentiment_cache = ResultCache(
+    max_size=int(os.environ.get("SENTIMENT_CACHE_SIZE", 4096)),
+    ttl=int(os.environ.get("SENTIMENT_CACHE_TTL", 3600)),
+    disk_path=os.environ.get("SENTIMENT_CACHE_PATH") or None,
+)
+sentiment_analyzer = SentimentAnalyzer(
+    cache=sentiment_cache,
+    lexicon_path=os.environ.get("SENTIMENT_LEXICON_PATH") or None,
+)
+# In-memory only (lost on restart); least recently used courses evicted first
+course_sentiment_stats = OrderedDict()  # course_id -> SentimentTally
+course_stats_lock = threading.Lock()
+MAX_COURSE_SENTIMENT_STATS = int(os.environ.get("SENTIMENT_COURSE_STATS_SIZE", 1000))
+
+# Warm-up state: health reports ready only once lazy NLP resources are loaded
+service_state = {"ready": False, "warm_up_ms": None, "error": None, "attempts": 0}
+WARM_UP_RETRY_SECONDS = 5  # First retry delay after a failed warm-up (doubles per failure)
+WARM_UP_MAX_RETRY_SECONDS = 300
+
+
+def _warm_up_services():
+    """
+    Preload TextBlob/NLTK resources and run a dummy analysis per engine,
+    retrying with exponential backoff until it succeeds (e.g. corpora
+    that were still being installed when the process started).
+    """
+    delay = WARM_UP_RETRY_SECONDS
+    while True:
+        service_state["attempts"] += 1
+        try:
+            service_state["warm_up_ms"] = sentiment_analyzer.warm_up()
+            service_state["error"] = None
+            service_state["ready"] = True
+            return
+        except Exception as e:
+            service_state["error"] = str(e)
+            print(f"AI engine warm-up failed (attempt {service_state['attempts']}), retrying in {delay}s: {e}")
+        time.sleep(delay)
+        delay = min(delay * 2, WARM_UP_MAX_RETRY_SECONDS)
+
+
+threading.Thread(target=_warm_up_services, name="ai-warm-up", daemon=True).start()
+anomaly_models = ModelRegistry(os.environ.get("ANOMALY_MODEL_DIR") or os.path.join(DATA_DIR, "anomaly_models"))
+anomaly_models.start(interval=int(os.environ.get("ANOMALY_RETRAIN_INTERVAL", 3600)))
+anomaly_detector = AnomalyDetector(
+    state_store=RiskStateStore(os.environ.get("ANOMALY_STATE_PATH") or os.path.join(DATA_DIR, "anomaly_state.db")),
+    model_registry=anomaly_models,
+    # Hour-of-day checks use the campus's local time, not the server's
+    utc_offset_minutes=int(os.environ["ANOMALY_UTC_OFFSET_MINUTES"]) if os.environ.get("ANOMALY_UTC_OFFSET_MINUTES") else None,
+    course_utc_offsets=json.loads(os.environ.get("ANOMALY_COURSE_UTC_OFFSETS") or "{}"),
+)
+# Class analyses are cached briefly so paging through them never recomputes
+class_analysis_cache = ResultCache(
+    max_size=int(os.environ.get("ANOMALY_CLASS_CACHE_SIZE", 32)),
+    ttl=int(os.environ.get("ANOMALY_CLASS_CACHE_TTL", 300)),
+    copy_values=False,
+)
+# Extracted risk features, re-scored interactively with new thresholds
+feature_cache = ResultCache(
+    max_size=int(os.environ.get("ANOMALY_FEATURE_CACHE_SIZE", 1024)),
+    ttl=int(os.environ.get("ANOMALY_FEATURE_CACHE_TTL", 3600)),
+    copy_values=False,
+)
+campus_jobs = CampusAnomalyJobs(
+    os.environ.get("ANOMALY_JOB_DIR") or os.path.join(DATA_DIR, "anomaly_jobs"),
+    workers=int(os.environ.get("ANOMALY_JOB_WORKERS", 0)) or None,
+)
+# Live check-in monitoring; alerts go to the session's socketio room
+session_monitor = SessionMonitor(
+    on_alert=lambda alert: socketio.emit(
+        "session_alert", alert, to=_session_room(alert["session_id"], alert["course_id"])
+    ),
+    max_sessions=int(os.environ.get("SESSION_MONITOR_MAX_SESSIONS", SessionMonitor.MAX_SESSIONS)),
+)
+# On-chain check-in history, synced per attendance app from the indexer
+indexer_client = IndexerClient(
+    os.environ.get("INDEXER_TOKEN", ""),
+    os.environ.get("INDEXER_ADDRESS", "https://testnet-idx.algonode.cloud"),
+)
+CHAIN_TIMELINE_DIR = os.environ.get("CHAIN_TIMELINE_DIR") or os.path.join(DATA_DIR, "chain_timelines")
+chain_sync_locks = {}  # app_id -> Lock held while that app is syncing
+chain_sync_locks_lock = threading.Lock()
+NPZ_MIMETYPES = ("application/octet-stream", "application/x-npz")
+MAX_DENSE_SIMILARITY_TEXTS = 200  # Larger batches return thresholded pairs
+MAX_SIMILARITY_TEXTS = 20000
+MAX_SIMILARITY_PAIRS = 100000
+DEFAULT_CLASS_PAGE_SIZE = 100
+MAX_CLASS_PAGE_SIZE = 1000
 nlp_processor = NLPProcessor()
+# Proposals and feedback indexed for similarity search
+similarity_corpus = CorpusIndex(
+    nlp_processor.tokenize,
+    path=os.environ.get("NLP_CORPUS_PATH") or os.path.join(DATA_DIR, "nlp_corpus.db"),
+)
+# MinHash signatures of feedback, proposals and papers for copy-paste detection
+near_duplicate_index = NearDuplicateIndex(
+    path=os.environ.get("NEAR_DUPLICATE_PATH") or os.path.join(DATA_DIR, "near_duplicates"),
+    threshold=float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", NearDuplicateIndex.THRESHOLD)),
+)
 campus_automation = CampusAutomation()
 
 
@@ -49,18 +194,32 @@ campus_automation = CampusAutomation()
 
 @app.route("/api/ai/health", methods=["GET"])
 def health_check():
+    """Health check; returns 503 until warm-up has finished so cold workers get no traffic."""
+    if service_state["ready"]:
+        status = "healthy"
+    elif service_state["error"]:
+        status = "unhealthy"
+    else:
+        status = "warming_up"
+
     return jsonify({
-        "status": "healthy",
+        "status": status,
+        "ready": service_state["ready"],
         "service": "CampusTrust AI Engine",
         "version": "1.0.0",
         "timestamp": int(time.time()),
+        "warm_up": {
+            "timings_ms": service_state["warm_up_ms"],
+            "error": service_state["error"],
+            "attempts": service_state["attempts"],
+        },
         "modules": {
-            "sentiment_analyzer": "active",
+            "sentiment_analyzer": "active" if service_state["ready"] else status,
             "anomaly_detector": "active",
             "nlp_processor": "active",
             "automation_engine": "active",
         },
-    })
+    }), 200 if service_state["ready"] else 503
 
 
 # ══════════════════════════════════════════════════════════
@@ -139,7 +298,14 @@ def analyze_sentiment():
     if not text:
         return jsonify({"error": "No text provided"}), 400
 
-    result = sentiment_analyzer.analyze(text)
+    try:
+        result = sentiment_analyzer.analyze(
+            text,
+            fields=data.get("fields"),
+            engine=data.get("engine", "textblob"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     result["hash"] = generate_hash(text)  # Hash for blockchain storage
 
     return jsonify(result)
@@ -154,10 +320,126 @@ def analyze_sentiment_batch():
     if not texts:
         return jsonify({"error": "No texts provided"}), 400
 
-    result = sentiment_analyzer.analyze_batch(texts)
+    try:
+        result = sentiment_analyzer.analyze_batch(
+            texts,
+            parallel=data.get("parallel"),
+            fields=data.get("fields"),
+            engine=data.get("engine", "textblob"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    course_id = data.get("course_id")
+    if course_id:
+        tally = SentimentTally()
+        for r in result["results"]:
+            tally.add(r)
+        _merge_course_stats(course_id, tally)
+
     return jsonify(result)
 
 
+@app.route("/api/ai/sentiment/stream", methods=["POST"])
+def analyze_sentiment_stream():
+    """
+    Streaming sentiment analysis over NDJSON.
+
+    Request body: one JSON value per line, either a string or {"text": ...}.
+    Query params: fields (comma-separated), engine.
+    Response: one {"index", ...result} line per text as soon as it is
+    analyzed, then a final {"aggregate": ...} line.
+    """
+    fields = request.args.get("fields")
+    engine = request.args.get("engine", "textblob")
+    try:
+        fields = sentiment_analyzer.normalize_fields(fields.split(",") if fields else None)
+        sentiment_analyzer.check_engine(engine)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    stream = request.stream
+    course_id = request.args.get("course_id")
+
+    def generate():
+        tally = SentimentTally()
+        errors = deque()
+
+        def read_texts():
+            for index, line in enumerate(stream):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                    text = item.get("text", "") if isinstance(item, dict) else item
+                    if not isinstance(text, str):
+                        raise ValueError("text must be a string")
+                except ValueError as e:
+                    errors.append({"index": index, "error": f"Invalid line: {e}"})
+                    continue
+                yield index, text
+
+        positions = deque()
+
+        def texts_only():
+            for index, text in read_texts():
+                positions.append(index)
+                yield text
+
+        for result in sentiment_analyzer.analyze_stream(texts_only(), fields, engine, tally):
+            while errors:
+                yield json.dumps(errors.popleft()) + "\n"
+            yield json.dumps({"index": positions.popleft(), **result}) + "\n"
+
+        for error in errors:
+            yield json.dumps(error) + "\n"
+        if course_id:
+            _merge_course_stats(course_id, tally)
+        yield json.dumps({"aggregate": tally.summary()}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.route("/api/ai/sentiment/cache", methods=["GET"])
+def sentiment_cache_stats():
+    """Get sentiment result cache statistics."""
+    return jsonify(sentiment_analyzer.cache_stats())
+
+
+@app.route("/api/ai/sentiment/stats/<course_id>", methods=["GET"])
+def course_sentiment_statistics(course_id):
+    """
+    Get running sentiment statistics for a course (fed by batch/stream calls
+    with course_id). Tallies live in memory only: they are lost on restart,
+    and only the MAX_COURSE_SENTIMENT_STATS most recently used courses are
+    kept. Clients that need durable totals should store the returned
+    mergeable tally.
+    """
+    with course_stats_lock:
+        tally = course_sentiment_stats.get(course_id)
+        if tally is None:
+            return jsonify({"error": f"No statistics for course: {course_id}"}), 404
+        course_sentiment_stats.move_to_end(course_id)
+        return jsonify({
+            "course_id": course_id,
+            "aggregate": tally.summary(),
+            "tally": tally.to_dict(),  # mergeable raw state
+        })
+
+
+def _merge_course_stats(course_id, tally):
+    """Fold a batch tally into the running statistics for a course."""
+    with course_stats_lock:
+        if course_id in course_sentiment_stats:
+            course_sentiment_stats[course_id].merge(tally)
+            course_sentiment_stats.move_to_end(course_id)
+        else:
+            course_sentiment_stats[course_id] = tally
+            while len(course_sentiment_stats) > MAX_COURSE_SENTIMENT_STATS:
+                course_sentiment_stats.popitem(last=False)
+
+
 # ══════════════════════════════════════════════════════════
 # ANOMALY DETECTION
 # ══════════════════════════════════════════════════════════
@@ -172,23 +454,512 @@ def detect_anomaly():
         if field not in data:
             return jsonify({"error": f"Missing field: {field}"}), 400
 
-    result = anomaly_detector.analyze_student(data)
+    try:
+        result = anomaly_detector.analyze_student(data, utc_offset_minutes=data.get("utc_offset_minutes"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify(result)
 
 
 @app.route("/api/ai/anomaly/class", methods=["POST"])
 def detect_class_anomalies():
-    """Analyze entire class attendance for anomalies."""
+    """
+    Analyze entire class attendance for anomalies.
+
+    Optional query args select a smaller view of the result:
+    top_k (highest risk first), cursor/limit (pagination) and
+    summary_only. The full analysis is cached under analysis_id.
+
+    Besides JSON, the body may be an .npz file (Content-Type
+    application/octet-stream or application/x-npz) with flat student_idx,
+    timestamp and optional session_id arrays; see CheckinColumns.from_npz.
+    course_id and utc_offset_minutes are then passed as query args.
+    """
+    columnar = request.mimetype in NPZ_MIMETYPES
+    if columnar:
+        data = {
+            "course_id": request.args.get("course_id"),
+            "utc_offset_minutes": request.args.get("utc_offset_minutes"),
+        }
+    else:
+        data = request.get_json()
+        if not data.get("students"):
+            return jsonify({"error": "No student data provided"}), 400
+
+    try:
+        view = _class_view_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        utc_offset = anomaly_detector.resolve_utc_offset(data.get("course_id"), data.get("utc_offset_minutes"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    body = request.get_data()
+    digest = hashlib.sha256(body)
+    if columnar:
+        # Query args change the result but are not part of the body
+        digest.update(json.dumps([data["course_id"], utc_offset]).encode())
+    analysis_id = digest.hexdigest()
+    result = class_analysis_cache.get(analysis_id)
+    if result is None:
+        if columnar:
+            try:
+                columns = CheckinColumns.from_npz(io.BytesIO(body))
+            except (ValueError, OSError) as e:
+                return jsonify({"error": f"Invalid .npz payload: {e}"}), 400
+            if not len(columns):
+                return jsonify({"error": "No student data provided"}), 400
+            result = anomaly_detector.analyze_class_columns(
+                columns, course_id=data["course_id"], utc_offset_minutes=utc_offset,
+            )
+        else:
+            result = anomaly_detector.analyze_class(
+                data["students"], course_id=data.get("course_id"), utc_offset_minutes=utc_offset,
+            )
+        class_analysis_cache.put(analysis_id, result)
+
+    return jsonify(_class_view(result, analysis_id, **view))
+
+
+@app.route("/api/ai/anomaly/class/<analysis_id>", methods=["GET"])
+def get_class_analysis(analysis_id):
+    """Serve a view of a cached class analysis (same query args as POST)."""
+    try:
+        view = _class_view_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = class_analysis_cache.get(analysis_id)
+    if result is None:
+        return jsonify({"error": "Analysis not found or expired; resubmit the class"}), 404
+    return jsonify(_class_view(result, analysis_id, **view))
+
+
+def _class_view_args(args):
+    """Parse top_k / cursor / limit / summary_only query args."""
+    def non_negative_int(name, default=None):
+        value = args.get(name)
+        if value is None:
+            return default
+        if not value.isdigit():
+            raise ValueError(f"{name} must be a non-negative integer")
+        return int(value)
+
+    view = {
+        "top_k": non_negative_int("top_k"),
+        "cursor": non_negative_int("cursor"),
+        "limit": non_negative_int("limit"),
+        "summary_only": args.get("summary_only", "").lower() in ("1", "true", "yes"),
+    }
+    if view["limit"] is not None and view["limit"] > MAX_CLASS_PAGE_SIZE:
+        raise ValueError(f"limit must be at most {MAX_CLASS_PAGE_SIZE}")
+    return view
+
+
+def _class_view(result, analysis_id, top_k=None, cursor=None, limit=None, summary_only=False):
+    """
+    Build a response from a cached class analysis without mutating it.
+    With no view options the full result is returned as before.
+    """
+    if summary_only:
+        return {"analysis_id": analysis_id, "summary": result["summary"]}
+
+    if top_k is None and cursor is None and limit is None:
+        return dict(result, analysis_id=analysis_id)
+
+    results = result["results"]
+    if top_k is not None:
+        results = heapq.nlargest(top_k, results, key=lambda r: r["risk_score"])
+
+    start = cursor or 0
+    stop = start + (limit if limit is not None else DEFAULT_CLASS_PAGE_SIZE)
+    page = results[start:stop]
+    return {
+        "analysis_id": analysis_id,
+        "summary": result["summary"],
+        "results": page,
+        "total": len(results),
+        "next_cursor": stop if stop < len(results) else None,
+    }
+
+
+@app.route("/api/ai/anomaly/features", methods=["POST"])
+def extract_anomaly_features():
+    """Extract a class's risk features and cache them for re-scoring."""
     data = request.get_json()
     students = data.get("students", [])
 
     if not students:
         return jsonify({"error": "No student data provided"}), 400
 
-    result = anomaly_detector.analyze_class(students)
+    feature_id = hashlib.sha256(request.get_data()).hexdigest()
+    features = feature_cache.get(feature_id)
+    if features is None:
+        try:
+            features = anomaly_detector.extract_features(
+                students, course_id=data.get("course_id"), utc_offset_minutes=data.get("utc_offset_minutes"),
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        feature_cache.put(feature_id, features)
+
+    scores = anomaly_detector.score_features(features)
+    return jsonify({
+        "feature_id": feature_id,
+        "students": len(features),
+        "bytes": features.nbytes,
+        "summary": anomaly_detector.summarize_scores(features, scores),
+    })
+
+
+@app.route("/api/ai/anomaly/rescore", methods=["POST"])
+def rescore_anomaly_features():
+    """
+    Re-score cached feature sets with new risk weights / thresholds.
+
+    Body: feature_ids (list), optional risk_weights, z_score_threshold,
+    rapid_window, robotic_cv_threshold and top_k.
+    """
+    data = request.get_json()
+    feature_ids = data.get("feature_ids", [])
+
+    if not feature_ids:
+        return jsonify({"error": "No feature_ids provided"}), 400
+
+    parts = [feature_cache.get(fid) for fid in feature_ids]
+    missing = [fid for fid, part in zip(feature_ids, parts) if part is None]
+    if missing:
+        return jsonify({"error": "Features not found or expired; re-extract them", "missing": missing}), 404
+
+    try:
+        top_k = int(data.get("top_k", 20))
+        features = ClassFeatures.concatenate(parts)
+        scores = anomaly_detector.score_features(
+            features,
+            risk_weights=data.get("risk_weights"),
+            z_score_threshold=data.get("z_score_threshold"),
+            rapid_window=data.get("rapid_window"),
+            robotic_cv_threshold=data.get("robotic_cv_threshold"),
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    risk_scores = scores["risk_scores"]
+    classes = {}
+    start = 0
+    for fid, part in zip(feature_ids, parts):
+        stop = start + len(part)
+        classes[fid] = anomaly_detector.summarize_scores(part, {"risk_scores": risk_scores[start:stop]})
+        start = stop
+
+    top = heapq.nlargest(max(top_k, 0), range(len(risk_scores)), key=risk_scores.__getitem__)
+    return jsonify({
+        "summary": anomaly_detector.summarize_scores(features, scores),
+        "classes": classes,
+        "top_students": [{
+            "student_id": features.student_ids[i],
+            "risk_score": int(risk_scores[i]),
+            "risk_components": {k: int(v[i]) for k, v in scores["risk_components"].items()},
+        } for i in top],
+    })
+
+
+@app.route("/api/ai/anomaly/campus", methods=["POST"])
+def start_campus_anomaly_job():
+    """
+    Start a background anomaly pass over many courses.
+
+    Body: {"courses": {course_id: [student_data, ...]}} or
+    {"courses": [{"course_id": ..., "students": [...],
+    "utc_offset_minutes": ...}, ...]}
+    """
+    data = request.get_json()
+    courses = data.get("courses", {})
+    utc_offsets = {}
+    if isinstance(courses, list):
+        utc_offsets = {c.get("course_id"): c.get("utc_offset_minutes") for c in courses}
+        courses = {c.get("course_id"): c.get("students", []) for c in courses}
+
+    if not courses or None in courses:
+        return jsonify({"error": "courses must map each course_id to its students"}), 400
+
+    try:
+        utc_offsets = {
+            course_id: anomaly_detector.resolve_utc_offset(course_id, utc_offsets.get(course_id))
+            for course_id in courses
+        }
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    job_id = campus_jobs.submit(courses, utc_offsets=utc_offsets)
+    return jsonify({"job_id": job_id, "status": "running", "total_courses": len(courses)}), 202
+
+
+@app.route("/api/ai/anomaly/campus/<job_id>", methods=["GET"])
+def campus_anomaly_job_status(job_id):
+    """Progress of a campus job; includes the campus summary once done."""
+    status = campus_jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(status)
+
+
+@app.route("/api/ai/anomaly/campus/<job_id>/<course_id>", methods=["GET"])
+def campus_anomaly_course_result(job_id, course_id):
+    """Full analyze_class result of one course in a campus job."""
+    path = campus_jobs.course_result_path(job_id, course_id)
+    if path is None:
+        return jsonify({"error": f"No result for course {course_id} in job {job_id}"}), 404
+    return send_file(os.path.abspath(path), mimetype="application/json")
+
+
+@app.route("/api/ai/anomaly/model/train", methods=["POST"])
+def train_anomaly_model():
+    """Queue a class for the course's next scheduled model retrain."""
+    data = request.get_json()
+    course_id = data.get("course_id")
+    students = data.get("students", [])
+
+    if not course_id or not students:
+        return jsonify({"error": "course_id and students are required"}), 400
+
+    try:
+        queued = anomaly_detector.submit_training(
+            course_id, students, utc_offset_minutes=data.get("utc_offset_minutes"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not queued:
+        return jsonify({
+            "error": f"Need at least {ModelRegistry.MIN_TRAINING_SAMPLES} students to train a model"
+        }), 400
+    return jsonify({"course_id": course_id, "status": "queued"}), 202
+
+
+@app.route("/api/ai/anomaly/models", methods=["GET"])
+def list_anomaly_models():
+    """List trained anomaly models and courses awaiting retraining."""
+    return jsonify({
+        "models": anomaly_models.list_models(),
+        "pending": anomaly_models.pending_courses(),
+    })
+
+
+@app.route("/api/ai/anomaly/checkin", methods=["POST"])
+def record_checkin():
+    """Score one new check-in against the student's stored running state."""
+    data = request.get_json()
+
+    for field in ("student_id", "timestamp"):
+        if field not in data:
+            return jsonify({"error": f"Missing field: {field}"}), 400
+
+    key = _student_state_key(data["student_id"], data.get("course_id"))
+    try:
+        result = anomaly_detector.record_checkin(
+            key,
+            _number_field(data, "timestamp"),
+            session_id=_integer_field(data, "session_id"),
+            total_sessions=_integer_field(data, "total_sessions"),
+            streak=_integer_field(data, "streak"),
+            course_id=data.get("course_id"),
+            utc_offset_minutes=data.get("utc_offset_minutes"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    result["student_id"] = data["student_id"]
     return jsonify(result)
 
 
+@app.route("/api/ai/anomaly/state/<student_id>", methods=["GET"])
+def get_student_risk_state(student_id):
+    """Get a student's current incremental risk assessment."""
+    key = _student_state_key(student_id, request.args.get("course_id"))
+    result = anomaly_detector.get_student_state(key)
+    if result is None:
+        return jsonify({"error": f"No state for student: {student_id}"}), 404
+    result["student_id"] = student_id
+    return jsonify(result)
+
+
+def _student_state_key(student_id, course_id=None):
+    return f"{course_id}:{student_id}" if course_id else str(student_id)
+
+
+def _number_field(data, field):
+    """A finite numeric request field; raises ValueError naming the field."""
+    try:
+        value = float(data[field])
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number")
+    if not math.isfinite(value):
+        raise ValueError(f"{field} must be a finite number")
+    return value
+
+
+def _integer_field(data, field):
+    """An optional whole-number request field (None when absent)."""
+    if data.get(field) is None:
+        return None
+    value = _number_field(data, field)
+    if not value.is_integer():
+        raise ValueError(f"{field} must be an integer")
+    return int(value)
+
+
+@app.route("/api/ai/anomaly/chain/<int:app_id>/sync", methods=["POST"])
+def sync_chain_timeline(app_id):
+    """
+    Page the app's check-in transactions from the indexer into its
+    timeline store. Resumable: with max_pages (per round range) a call
+    stops early and the next call continues from the saved tokens.
+    """
+    data = request.get_json(silent=True) or {}
+    max_pages = data.get("max_pages")
+    if max_pages is not None and (not isinstance(max_pages, int) or max_pages < 1):
+        return jsonify({"error": "max_pages must be a positive integer"}), 400
+
+    with chain_sync_locks_lock:
+        lock = chain_sync_locks.setdefault(app_id, threading.Lock())
+    if not lock.acquire(blocking=False):
+        return jsonify({"error": f"Sync already running for app {app_id}"}), 409
+    try:
+        ingestor = CheckinIngestor(
+            indexer_client, app_id, _chain_timeline_store(app_id),
+            workers=int(os.environ.get("CHAIN_SYNC_WORKERS", 4)),
+        )
+        result = ingestor.run(max_pages=max_pages)
+    except Exception as e:
+        return jsonify({"error": f"Indexer sync failed: {e}"}), 502
+    finally:
+        lock.release()
+    return jsonify(result)
+
+
+@app.route("/api/ai/anomaly/chain/<int:app_id>/analyze", methods=["POST"])
+def analyze_chain_timeline(app_id):
+    """
+    Class analysis over the app's synced on-chain timelines. Accepts the
+    same view query args as /api/ai/anomaly/class; the result is cached
+    under analysis_id for paging.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        view = _class_view_args(request.args)
+        utc_offset = anomaly_detector.resolve_utc_offset(app_id, data.get("utc_offset_minutes"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    store = _chain_timeline_store(app_id)
+    state = store.load_state()
+    if state is None:
+        return jsonify({"error": f"No synced timeline for app {app_id}; sync it first"}), 404
+
+    key = json.dumps(["chain", app_id, state["synced_round"], state["checkins"], utc_offset])
+    analysis_id = hashlib.sha256(key.encode()).hexdigest()
+    result = class_analysis_cache.get(analysis_id)
+    if result is None:
+        columns = store.columns(total_sessions=state["total_sessions"])
+        if not len(columns):
+            return jsonify({"error": "No check-ins recorded for this app"}), 404
+        result = anomaly_detector.analyze_class_columns(columns, course_id=app_id, utc_offset_minutes=utc_offset)
+        result["sync"] = {k: state[k] for k in ("synced_round", "checkins", "total_sessions")}
+        class_analysis_cache.put(analysis_id, result)
+
+    return jsonify(_class_view(result, analysis_id, **view))
+
+
+def _chain_timeline_store(app_id):
+    return TimelineStore(os.path.join(CHAIN_TIMELINE_DIR, str(app_id)))
+
+
+@app.route("/api/ai/anomaly/session/start", methods=["POST"])
+def start_monitored_session():
+    """
+    Open a session for live monitoring, mirroring the attendance
+    contract's start_session (session_id, duration_seconds).
+    """
+    data = request.get_json()
+
+    for field in ("session_id", "duration_seconds"):
+        if field not in data:
+            return jsonify({"error": f"Missing field: {field}"}), 400
+
+    try:
+        result = session_monitor.start_session(
+            data["session_id"],
+            data["duration_seconds"],
+            course_id=data.get("course_id"),
+            start=data.get("start"),
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result), 201
+
+
+@app.route("/api/ai/anomaly/session/checkin", methods=["POST"])
+def ingest_session_checkin():
+    """
+    Ingest one check-in of an open session. New proxy-burst alerts are
+    returned and pushed as "session_alert" events to socketio clients
+    that joined the session with "watch_session".
+    """
+    data = request.get_json()
+
+    for field in ("session_id", "student_id"):
+        if field not in data:
+            return jsonify({"error": f"Missing field: {field}"}), 400
+
+    try:
+        result = session_monitor.checkin(
+            data["session_id"],
+            data["student_id"],
+            timestamp=data.get("timestamp"),
+            device_id=data.get("device_id"),
+            location=data.get("location"),
+            course_id=data.get("course_id"),
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
+
+
+@app.route("/api/ai/anomaly/session/end", methods=["POST"])
+def end_monitored_session():
+    """Close a monitored session and return its final stats."""
+    data = request.get_json()
+    if "session_id" not in data:
+        return jsonify({"error": "Missing field: session_id"}), 400
+
+    try:
+        result = session_monitor.end_session(data["session_id"], course_id=data.get("course_id"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify(result)
+
+
+@app.route("/api/ai/anomaly/session/<session_id>", methods=["GET"])
+def monitored_session_stats(session_id):
+    """Arrival-rate curve, device/location counts and alerts of a session."""
+    result = session_monitor.session_stats(session_id, course_id=request.args.get("course_id"))
+    if result is None:
+        return jsonify({"error": f"Unknown session: {session_id}"}), 404
+    return jsonify(result)
+
+
+@socketio.on("watch_session")
+def watch_session(data):
+    """Subscribe a socketio client to a session's live alerts."""
+    join_room(_session_room(data.get("session_id"), data.get("course_id")))
+    emit("watching_session", {"session_id": data.get("session_id"), "course_id": data.get("course_id")})
+
+
+def _session_room(session_id, course_id=None):
+    return f"session:{course_id}:{session_id}" if course_id is not None else f"session:{session_id}"
+
+
 # ══════════════════════════════════════════════════════════
 # NLP PROCESSING
 # ══════════════════════════════════════════════════════════
@@ -215,6 +986,144 @@ def compute_similarity():
     return jsonify({"similarity": similarity})
 
 
+@app.route("/api/ai/nlp/similarity/matrix", methods=["POST"])
+def compute_similarity_matrix():
+    """
+    Pairwise similarity of many texts, each tokenized once.
+
+    Body: texts (list), optional threshold and mode ("dense" or "pairs").
+    By default up to MAX_DENSE_SIMILARITY_TEXTS texts without a threshold
+    get the full matrix; otherwise pairs with similarity >= threshold
+    (default 0.5) are listed, capped at MAX_SIMILARITY_PAIRS.
+    """
+    data = request.get_json()
+    texts = data.get("texts", [])
+    if not texts or not all(isinstance(t, str) for t in texts):
+        return jsonify({"error": "texts must be a non-empty list of strings"}), 400
+    if len(texts) > MAX_SIMILARITY_TEXTS:
+        return jsonify({"error": f"At most {MAX_SIMILARITY_TEXTS} texts per request"}), 400
+
+    threshold = data.get("threshold")
+    mode = data.get("mode") or ("dense" if threshold is None and len(texts) <= MAX_DENSE_SIMILARITY_TEXTS else "pairs")
+    if mode == "dense":
+        if len(texts) > MAX_DENSE_SIMILARITY_TEXTS:
+            return jsonify({"error": f"Dense matrices are limited to {MAX_DENSE_SIMILARITY_TEXTS} texts; use a threshold"}), 400
+        return jsonify({"mode": "dense", "count": len(texts), "matrix": nlp_processor.similarity_matrix(texts)})
+    if mode != "pairs":
+        return jsonify({"error": "mode must be 'dense' or 'pairs'"}), 400
+
+    try:
+        threshold = float(threshold) if threshold is not None else 0.5
+        pairs, truncated = nlp_processor.similar_pairs(texts, threshold, max_pairs=MAX_SIMILARITY_PAIRS)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "mode": "pairs",
+        "count": len(texts),
+        "threshold": threshold,
+        "pairs": pairs,
+        "truncated": truncated,
+    })
+
+
+@app.route("/api/ai/nlp/similarity/search", methods=["POST"])
+def search_similar_documents():
+    """
+    Find the indexed documents most similar to a text.
+
+    Body: text, optional k (default 10), kind (e.g. "proposal") and
+    exclude_id (a document id to leave out).
+    """
+    data = request.get_json()
+    text = data.get("text", "")
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+
+    try:
+        k = int(data.get("k", 10))
+    except (TypeError, ValueError):
+        return jsonify({"error": "k must be an integer"}), 400
+
+    results = similarity_corpus.top_k_similar(
+        text, k, kind=data.get("kind"), exclude=data.get("exclude_id"),
+    )
+    return jsonify({"results": results, "corpus_size": len(similarity_corpus)})
+
+
+@app.route("/api/ai/nlp/corpus", methods=["POST"])
+def add_corpus_documents():
+    """
+    Add documents to the similarity index; ids already indexed are replaced.
+
+    Body: {"documents": [{"id": ..., "text": ..., "kind": ...}, ...]}
+    """
+    data = request.get_json()
+    documents = data.get("documents", [])
+    if not documents:
+        return jsonify({"error": "No documents provided"}), 400
+    if any(doc.get("id") is None for doc in documents):
+        return jsonify({"error": "Every document needs an id"}), 400
+
+    added = similarity_corpus.add_many(documents)
+    return jsonify({"added": added, "corpus_size": len(similarity_corpus)})
+
+
+@app.route("/api/ai/nlp/corpus/<doc_id>", methods=["DELETE"])
+def remove_corpus_document(doc_id):
+    """Remove a document from the similarity index."""
+    if not similarity_corpus.remove(doc_id):
+        return jsonify({"error": f"Unknown document: {doc_id}"}), 404
+    return jsonify({"removed": doc_id, "corpus_size": len(similarity_corpus)})
+
+
+@app.route("/api/ai/nlp/corpus", methods=["GET"])
+def corpus_statistics():
+    """Similarity index statistics."""
+    return jsonify(similarity_corpus.stats())
+
+
+@app.route("/api/ai/nlp/duplicates", methods=["POST"])
+def find_near_duplicates():
+    """
+    Find indexed documents that are near-duplicates of a text.
+
+    Body: text, optional threshold (estimated Jaccard, default from the
+    index), limit, and id + index=true to add the text to the index
+    after the lookup.
+    """
+    data = request.get_json()
+    text = data.get("text", "")
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+    if data.get("index") and data.get("id") is None:
+        return jsonify({"error": "id is required to index a document"}), 400
+
+    try:
+        threshold = data.get("threshold")
+        threshold = float(threshold) if threshold is not None else None
+        limit = int(data.get("limit", 10))
+    except (TypeError, ValueError):
+        return jsonify({"error": "threshold must be a number and limit an integer"}), 400
+
+    matches = near_duplicate_index.query(text, threshold=threshold, limit=limit, exclude=data.get("id"))
+    indexed = bool(data.get("index")) and near_duplicate_index.add(data["id"], text)
+    return jsonify({"duplicates": matches, "indexed": indexed})
+
+
+@app.route("/api/ai/nlp/duplicates/<doc_id>", methods=["DELETE"])
+def remove_near_duplicate_document(doc_id):
+    """Remove a document from the near-duplicate index."""
+    if not near_duplicate_index.remove(doc_id):
+        return jsonify({"error": f"Unknown document: {doc_id}"}), 404
+    return jsonify({"removed": doc_id})
+
+
+@app.route("/api/ai/nlp/duplicates", methods=["GET"])
+def near_duplicate_statistics():
+    """Near-duplicate index statistics."""
+    return jsonify(near_duplicate_index.stats())
+
+
 @app.route("/api/ai/nlp/summarize", methods=["POST"])
 def summarize_text():
     """Summarize text."""
@@ -1367,9 +2276,11 @@ def _analyze_paper_nlp(title, abstract, full_text):
         import random as _rand
         _rand.seed(hash(combined_text[:100]))  # deterministic for same input
         sampled = _rand.sample(range(len(sentences)), sample_size) if len(sentences) > sample_size else list(range(len(sentences)))
-        for i in range(len(sampled)):
-            for j in range(i + 1, len(sampled)):
-                sim = nlp_processor.compute_similarity(sentences[sampled[i]], sentences[sampled[j]])
+        # Tokenize each sampled sentence once for all of its pairs
+        sampled_docs = [nlp_processor.document(sentences[k]) for k in sampled]
+        for i in range(len(sampled_docs)):
+            for j in range(i + 1, len(sampled_docs)):
+                sim = nlp_processor.compute_similarity(sampled_docs[i], sampled_docs[j])
                 if sim > 0.85:
                     high_similarity_pairs += 1
 
@@ -1378,7 +2289,8 @@ def _analyze_paper_nlp(title, abstract, full_text):
 
     # ── 7. Originality Score ──────────────────────────────
     # Based on vocabulary richness, low boilerplate, unique key phrases
-    key_phrases = nlp_processor.extract_key_phrases(combined_text, top_n=10)
+    combined_doc = nlp_processor.document(combined_text)
+    key_phrases = nlp_processor.extract_key_phrases(combined_doc, top_n=10)
     originality = min(98, max(30, int(
         vocabulary_score * 0.30 +
         (100 - plagiarism_score * 2) * 0.40 +
@@ -1398,7 +2310,7 @@ def _analyze_paper_nlp(title, abstract, full_text):
     # ── 9. Generate AI Summary ────────────────────────────
     # Use NLPProcessor to extract key sentences
     if len(combined_text) > 100:
-        ai_summary = nlp_processor.summarize(combined_text, max_sentences=3)
+        ai_summary = nlp_processor.summarize(combined_doc, max_sentences=3)
     else:
         ai_summary = abstract if abstract else "Insufficient text for summarization."
 
@@ -1541,6 +2453,12 @@ def review_research_paper():
         # Run real NLP analysis
         result = _analyze_paper_nlp(title, abstract, full_text)
 
+        # Near-duplicates among earlier submissions, then index this one
+        combined_text = f"{title}\n{abstract}\n{full_text}".strip()
+        paper_id = f"paper:{hashlib.sha256(combined_text.encode()).hexdigest()[:16]}"
+        result['near_duplicates'] = near_duplicate_index.query(combined_text, exclude=paper_id)
+        near_duplicate_index.add(paper_id, combined_text)
+
         return jsonify(result)
 
     except Exception as e:
@@ -0,0 +1,306 @@
+"""
+CampusTrust AI - Campus Anomaly Jobs
+======================================
+Bulk anomaly analysis over many courses at once (e.g. the nightly pass).
+
+Courses are sharded across a process pool; each worker analyzes whole
+courses, so a course's statistics are computed once, in one place. Each
+course result is written to disk as soon as it finishes, and the
+campus-level summary is merged from the per-course shard summaries
+instead of re-reading every student.
+
+Job layout on disk:
+    <output_dir>/<job_id>/job.json                progress + campus summary
+    <output_dir>/<job_id>/<course_id>-<hash>.json full analyze_class result
+
+The course file name is the sanitized id plus a hash of the exact id, so
+ids that sanitize alike ("CS/101", "CS_101") never share a file. Finished
+jobs are dropped from memory after MAX_FINISHED_JOBS newer ones finish;
+their status is then read back from job.json.
+
+Courses are submitted to the pool from the caller's thread, so a job's
+work is already queued (and is finished by the executor's exit hook) even
+if the interpreter shuts down while the job is running. If a worker dies,
+the broken pool is replaced and only the courses it took down are
+retried, up to POOL_RETRIES times, before they are marked failed.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from anomaly_detector import AnomalyDetector
+
+
+class CampusAnomalyJobs:
+    """Run and track campus-wide anomaly jobs in the background."""
+
+    MAX_FINISHED_JOBS = 100  # Finished jobs kept in memory (older ones are read from disk)
+    POOL_RETRIES = 1  # Resubmissions of courses lost to a dead worker
+
+    def __init__(self, output_dir, workers=None):
+        """
+        Args:
+            output_dir: directory job folders are written to
+            workers: pool size (default: CPU count)
+        """
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self._jobs = {}  # job_id -> job state dict
+        self._finished = deque()  # finished job ids, oldest first
+        self._lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+        self._pool = None
+        os.makedirs(output_dir, exist_ok=True)
+
+    def submit(self, courses, utc_offsets=None):
+        """
+        Start a job in the background.
+
+        Args:
+            courses: dict course_id -> list of student_data dicts
+            utc_offsets: optional dict course_id -> UTC offset in minutes
+                for hour-of-day checks (default: server timezone)
+
+        Returns:
+            job_id
+        """
+        if not courses:
+            raise ValueError("No courses provided")
+
+        job_id = uuid.uuid4().hex[:16]
+        os.makedirs(self._job_dir(job_id), exist_ok=True)
+        job = {
+            "job_id": job_id,
+            "status": "running",
+            "total_courses": len(courses),
+            "completed": 0,
+            "failed": 0,
+            "started_at": time.time(),
+            "finished_at": None,
+            "courses": {str(cid): {"status": "pending"} for cid in courses},
+            "summary": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+        self._save(job)
+
+        utc_offsets = utc_offsets or {}
+        try:
+            pending = self._submit_courses(job_id, courses, utc_offsets)
+        except Exception as e:
+            with self._lock:
+                job["error"] = str(e)
+            self._finish(job, [], "failed")
+            return job_id
+
+        threading.Thread(
+            target=self._run, args=(job, courses, utc_offsets, pending), name=f"campus-job-{job_id}", daemon=True
+        ).start()
+        return job_id
+
+    def status(self, job_id):
+        """Progress and (once done) campus summary of a job, or None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return json.loads(json.dumps(job))
+
+        path = os.path.join(self._job_dir(job_id), "job.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def course_result_path(self, job_id, course_id):
+        """Path of a finished course's result file, or None."""
+        path = os.path.join(self._job_dir(job_id), _course_file(course_id))
+        return path if os.path.exists(path) else None
+
+    def close(self):
+        """Shut down the worker pool, if one was started."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _run(self, job, courses, utc_offsets, pending):
+        shards = []
+        status = "done"
+        try:
+            for attempt in range(self.POOL_RETRIES + 1):
+                pool, futures = pending
+                broken = False
+                lost = {}  # courses whose worker died under them, to retry
+                for future in as_completed(futures):
+                    course_id = futures[future]
+                    try:
+                        shard = future.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        if attempt < self.POOL_RETRIES:
+                            lost[course_id] = courses[course_id]
+                            continue
+                        self._record(job, course_id, {"status": "failed", "error": f"Worker process died: {e}"})
+                    except Exception as e:
+                        self._record(job, course_id, {"status": "failed", "error": str(e)})
+                    else:
+                        shards.append(shard)
+                        self._record(job, course_id, {"status": "done", "summary": shard["summary"],
+                                                      "seconds": shard["seconds"]})
+                if broken:
+                    self._reset_pool(pool)
+                if not lost:
+                    break
+                pending = self._submit_courses(job["job_id"], lost, utc_offsets)
+        except Exception as e:
+            status = "failed"
+            with self._lock:
+                job["error"] = str(e)
+
+        self._finish(job, shards, status)
+
+    def _submit_courses(self, job_id, courses, utc_offsets):
+        """Queue one task per course; returns (pool, {future: course_id})."""
+        job_dir = self._job_dir(job_id)
+        pool = self._get_pool()
+        futures = {
+            pool.submit(
+                _analyze_course, course_id, students,
+                os.path.join(job_dir, _course_file(course_id)),
+                utc_offsets.get(course_id),
+            ): course_id
+            for course_id, students in courses.items()
+        }
+        return pool, futures
+
+    def _record(self, job, course_id, entry):
+        """Store a finished course's entry and update the job counters."""
+        failed = entry["status"] == "failed"
+        with self._lock:
+            job["courses"][str(course_id)] = entry
+            job["completed"] += not failed
+            job["failed"] += failed
+        self._save(job)
+
+    def _finish(self, job, shards, status):
+        """Write the campus summary and move the job to the finished list."""
+        with self._lock:
+            job["summary"] = merge_course_summaries(shards)
+            job["status"] = status
+            job["finished_at"] = time.time()
+        self._save(job)
+
+        with self._lock:
+            self._finished.append(job["job_id"])
+            while len(self._finished) > self.MAX_FINISHED_JOBS:
+                self._jobs.pop(self._finished.popleft(), None)
+
+    def _get_pool(self):
+        """Return the persistent worker pool, starting it on first use."""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            return self._pool
+
+    def _reset_pool(self, broken):
+        """Drop a broken pool so the next submission starts a fresh one."""
+        with self._pool_lock:
+            if self._pool is broken:
+                self._pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _save(self, job):
+        """Atomically write the job's progress file."""
+        with self._lock:
+            data = json.dumps(job)
+        path = os.path.join(self._job_dir(job["job_id"]), "job.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.output_dir, _safe_name(job_id))
+
+
+def merge_course_summaries(shards):
+    """
+    Campus summary from per-course shard summaries.
+
+    Averages are weighted by course size using the exact sums each shard
+    reports, so the result equals a summary over all students.
+    """
+    shards = [s for s in shards if s["students"]]
+    if not shards:
+        return {}
+
+    students = sum(s["students"] for s in shards)
+    summaries = [s["summary"] for s in shards]
+    return {
+        "total_courses": len(shards),
+        "total_students": students,
+        "avg_risk_score": round(sum(s["risk_score_sum"] for s in shards) / students, 1),
+        "max_risk_score": max(s["max_risk_score"] for s in summaries),
+        "high_risk_count": sum(s["high_risk_count"] for s in summaries),
+        "medium_risk_count": sum(s["medium_risk_count"] for s in summaries),
+        "low_risk_count": sum(s["low_risk_count"] for s in summaries),
+        "avg_attendance_rate": round(sum(s["attendance_rate_sum"] for s in shards) / students, 1),
+        "proxy_cluster_count": sum(s.get("proxy_cluster_count", 0) for s in summaries),
+        "highest_risk_courses": [
+            s["course_id"] for s in sorted(shards, key=lambda s: -_flagged_count(s["summary"]))[:10]
+            if _flagged_count(s["summary"])
+        ],
+    }
+
+
+def _flagged_count(summary):
+    return summary["high_risk_count"] + summary["medium_risk_count"]
+
+
+def _safe_name(name):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(name))
+
+
+def _course_file(course_id):
+    """Result file name of a course, unique per exact course id."""
+    digest = hashlib.sha256(str(course_id).encode()).hexdigest()[:12]
+    return f"{_safe_name(course_id)}-{digest}.json"
+
+
+# ── Process pool workers ──────────────────────────────────────
+
+_worker_detector = None
+
+
+def _init_worker():
+    global _worker_detector
+    _worker_detector = AnomalyDetector()
+
+
+def _analyze_course(course_id, students, output_path, utc_offset_minutes=None):
+    """Analyze one course inside a pool worker and write its result file."""
+    start = time.time()
+    result = _worker_detector.analyze_class(students, utc_offset_minutes=utc_offset_minutes)
+    result["course_id"] = course_id
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    os.replace(tmp_path, output_path)
+
+    return {
+        "course_id": str(course_id),
+        "students": len(result["results"]),
+        "summary": result["summary"],
+        "risk_score_sum": sum(r["risk_score"] for r in result["results"]),
+        "attendance_rate_sum": sum(r["stats"]["attendance_rate"] for r in result["results"]),
+        "seconds": round(time.time() - start, 3),
+    }
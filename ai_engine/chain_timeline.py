@@ -0,0 +1,415 @@
+"""
+CampusTrust AI - On-chain Attendance Timelines
+================================================
+Rebuild per-student check-in timelines from the attendance contract's
+transaction history.
+
+The contract keeps only last_checkin, streak and sessions_attended in
+local state, so the full list of check-in times the anomaly detector
+needs is reconstructed from the "checkin" application calls recorded by
+the indexer.
+
+How it works:
+- The app's round range (creation round .. indexer tip) is split into
+  contiguous sub-ranges that are paged concurrently, each with its own
+  indexer next-token
+- Every page is written to disk as a small columnar chunk (.npz) before
+  its resume token is saved, so an interrupted run resumes where it
+  stopped; a re-fetched page overwrites its own chunk
+- Later runs only page the rounds added since the last run
+- TimelineStore.columns() returns CheckinColumns that
+  AnomalyDetector.analyze_class_columns reads directly
+
+LocalIndexer is an in-memory stand-in for the indexer that simulates the
+contract's start_session / checkin calls, for development and tests.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import glob
+import io
+import json
+import os
+import threading
+
+import numpy as np
+
+from checkin_columns import CheckinColumns
+
+
+def _b64(text):
+    return base64.b64encode(text.encode()).decode()
+
+
+CHECKIN_ARG = _b64("checkin")
+START_SESSION_ARG = _b64("start_session")
+SESSION_ID_KEY = _b64("session_id")
+LAST_SESSION_KEY = _b64("last_session_id")
+STREAK_KEY = _b64("streak")
+
+# Columns of every chunk file; streak is -1 when the check-in left it unchanged
+CHUNK_FIELDS = ("txid", "sender", "round", "timestamp", "session_id", "streak")
+
+
+class TimelineStore:
+    """Columnar on-disk check-in store for one attendance app."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: directory holding state.json and chunks/*.npz
+        """
+        self.path = path
+        self.chunk_dir = os.path.join(path, "chunks")
+        os.makedirs(self.chunk_dir, exist_ok=True)
+
+    def load_state(self):
+        """Saved ingestion state (ranges and resume tokens), or None."""
+        path = os.path.join(self.path, "state.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_state(self, state):
+        self._write(os.path.join(self.path, "state.json"), json.dumps(state).encode())
+
+    def write_chunk(self, name, rows):
+        """Atomically write one page of parsed check-ins (dict of arrays)."""
+        buffer = io.BytesIO()
+        np.savez(buffer, **{field: rows[field] for field in CHUNK_FIELDS})
+        self._write(os.path.join(self.chunk_dir, f"{name}.npz"), buffer.getvalue())
+
+    def read_chunks(self):
+        """All stored rows, deduplicated by transaction id, in round order."""
+        parts = {field: [] for field in CHUNK_FIELDS}
+        for path in sorted(glob.glob(os.path.join(self.chunk_dir, "*.npz"))):
+            with np.load(path, allow_pickle=False) as chunk:
+                for field in CHUNK_FIELDS:
+                    parts[field].append(chunk[field])
+
+        if not parts["txid"]:
+            return _empty_rows()
+        rows = {field: np.concatenate(values) for field, values in parts.items()}
+        _, first = np.unique(rows["txid"], return_index=True)
+        keep = first[np.argsort(rows["round"][first], kind="stable")]
+        return {field: values[keep] for field, values in rows.items()}
+
+    def compact(self):
+        """Merge all chunks into one file (fewer files to open per read)."""
+        chunks = glob.glob(os.path.join(self.chunk_dir, "*.npz"))
+        if len(chunks) <= 1:
+            return
+        self.write_chunk("compacted", self.read_chunks())
+        for path in chunks:
+            if os.path.basename(path) != "compacted.npz":
+                os.remove(path)
+
+    def columns(self, total_sessions=None):
+        """
+        Check-ins as CheckinColumns, one student per sender address.
+
+        Args:
+            total_sessions: sessions held so far (default: from state)
+        """
+        rows = self.read_chunks()
+        if total_sessions is None:
+            total_sessions = (self.load_state() or {}).get("total_sessions", 0)
+
+        student_ids, student_idx = np.unique(rows["sender"], return_inverse=True)
+        student_idx = student_idx.ravel()
+        # Current streak is the last one written: the latest check-in whose
+        # delta set it (unchanged values are left out of the delta)
+        known = np.flatnonzero(rows["streak"] >= 0)
+        last = np.full(len(student_ids), -1, dtype=np.int64)
+        np.maximum.at(last, student_idx[known], known)
+        streaks = np.zeros(len(student_ids), dtype=np.int64)
+        streaks[last >= 0] = rows["streak"][last[last >= 0]]
+        total_sessions = max(int(total_sessions), int(rows["session_id"].max(initial=0)))
+        return CheckinColumns.from_arrays(
+            student_idx, rows["timestamp"], rows["session_id"],
+            student_ids=student_ids, total_sessions=total_sessions, streaks=streaks,
+        )
+
+    def _write(self, path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+class CheckinIngestor:
+    """Page an attendance app's check-in calls from the indexer into a TimelineStore."""
+
+    PAGE_LIMIT = 1000  # Transactions per indexer page
+
+    def __init__(self, indexer, app_id, store, workers=4, page_limit=PAGE_LIMIT):
+        """
+        Args:
+            indexer: algosdk IndexerClient (or LocalIndexer)
+            app_id: attendance contract application id
+            store: TimelineStore for this app
+            workers: round ranges paged concurrently
+            page_limit: transactions requested per page
+        """
+        self.indexer = indexer
+        self.app_id = int(app_id)
+        self.store = store
+        self.workers = max(1, int(workers))
+        self.page_limit = page_limit
+        self._lock = threading.Lock()
+
+    def run(self, max_pages=None):
+        """
+        Ingest everything not yet stored; resumes an interrupted run.
+
+        Args:
+            max_pages: optional cap on pages fetched per range in this call
+
+        Returns:
+            dict with pages fetched, check-ins stored and whether the
+            timeline is complete up to the indexer tip at planning time
+        """
+        state = self._plan()
+        pending = [i for i, r in enumerate(state["ranges"]) if not r["done"]]
+        fetched = [0] * len(state["ranges"])
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(pending))) as pool:
+                for index, pages in zip(pending, pool.map(
+                        lambda i: self._ingest_range(state, i, max_pages), pending)):
+                    fetched[index] = pages
+
+        return {
+            "app_id": self.app_id,
+            "pages": sum(fetched),
+            "checkins": state["checkins"],
+            "total_sessions": state["total_sessions"],
+            "synced_round": state["synced_round"],
+            "complete": all(r["done"] for r in state["ranges"]),
+        }
+
+    def _plan(self):
+        """Load saved state, adding ranges for rounds past the last planned one."""
+        state = self.store.load_state() or {
+            "app_id": self.app_id,
+            "ranges": [],
+            "synced_round": None,
+            "checkins": 0,
+            "total_sessions": 0,
+        }
+        if any(not r["done"] for r in state["ranges"]):
+            return state
+
+        tip = int(self.indexer.health()["round"])
+        if state["synced_round"] is None:
+            app = self.indexer.applications(self.app_id)["application"]
+            first = int(app.get("created-at-round", 0))
+        else:
+            first = state["synced_round"] + 1
+        if first > tip:
+            return state
+
+        # Finished ranges are no longer needed; their chunks stay on disk
+        state["ranges"] = []
+        # Contiguous sub-ranges so each can be paged independently
+        bounds = np.linspace(first, tip + 1, self.workers + 1).astype(np.int64)
+        for low, high in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            if low < high:
+                state["ranges"].append({
+                    "min_round": low, "max_round": high - 1,
+                    "next_token": None, "pages": 0, "done": False,
+                })
+        state["synced_round"] = tip
+        self.store.save_state(state)
+        return state
+
+    def _ingest_range(self, state, index, max_pages=None):
+        """Page one round range to the end (or max_pages); returns pages fetched."""
+        with self._lock:
+            entry = dict(state["ranges"][index])
+
+        fetched = 0
+        while not entry["done"] and (max_pages is None or fetched < max_pages):
+            response = self.indexer.search_transactions(
+                application_id=self.app_id,
+                txn_type="appl",
+                min_round=entry["min_round"],
+                max_round=entry["max_round"],
+                limit=self.page_limit,
+                next_page=entry["next_token"],
+            )
+            transactions = response.get("transactions", [])
+            rows, sessions_started = parse_checkins(transactions)
+            # Chunk name is fixed per page, so re-fetching after a crash overwrites it
+            self.store.write_chunk(f"{entry['min_round']}-{entry['pages']}", rows)
+
+            fetched += 1
+            entry["pages"] += 1
+            entry["next_token"] = response.get("next-token")
+            entry["done"] = len(transactions) < self.page_limit or not entry["next_token"]
+            with self._lock:
+                state["ranges"][index] = dict(entry)
+                state["checkins"] += len(rows["txid"])
+                state["total_sessions"] = max(state["total_sessions"], sessions_started)
+                self.store.save_state(state)
+        return fetched
+
+
+def parse_checkins(transactions):
+    """
+    Extract check-ins from indexer application-call transactions.
+
+    Returns:
+        (rows, sessions_started): rows as a dict of CHUNK_FIELDS arrays,
+        and the highest session id opened by start_session calls
+    """
+    rows = {field: [] for field in CHUNK_FIELDS}
+    sessions_started = 0
+    for txn in transactions:
+        call = txn.get("application-transaction", {})
+        args = call.get("application-args", [])
+        if not args or call.get("on-completion", "noop") != "noop":
+            continue
+
+        if args[0] == START_SESSION_ARG:
+            session = _delta_uint(txn.get("global-state-delta", []), SESSION_ID_KEY)
+            sessions_started = max(sessions_started, session or 0)
+            continue
+        if args[0] != CHECKIN_ARG:
+            continue
+
+        sender = txn["sender"]
+        local_delta = next(
+            (d["delta"] for d in txn.get("local-state-delta", []) if d.get("address") == sender), [],
+        )
+        session = _delta_uint(local_delta, LAST_SESSION_KEY)
+        rows["txid"].append(txn["id"])
+        rows["sender"].append(sender)
+        rows["round"].append(txn["confirmed-round"])
+        rows["timestamp"].append(txn["round-time"])
+        rows["session_id"].append(-1 if session is None else session)
+        streak = _delta_uint(local_delta, STREAK_KEY)
+        rows["streak"].append(-1 if streak is None else streak)
+
+    if not rows["txid"]:
+        return _empty_rows(), sessions_started
+    return {
+        "txid": np.array(rows["txid"], dtype=str),
+        "sender": np.array(rows["sender"], dtype=str),
+        "round": np.array(rows["round"], dtype=np.int64),
+        "timestamp": np.array(rows["timestamp"], dtype=np.int64),
+        "session_id": np.array(rows["session_id"], dtype=np.int64),
+        "streak": np.array(rows["streak"], dtype=np.int64),
+    }, sessions_started
+
+
+def _delta_uint(delta, key):
+    """uint value set for key in an indexer state delta, or None."""
+    for entry in delta:
+        if entry.get("key") == key and entry.get("value", {}).get("action") == 2:
+            return int(entry["value"].get("uint", 0))
+    return None
+
+
+def _empty_rows():
+    rows = {field: np.zeros(0, dtype=np.int64) for field in CHUNK_FIELDS}
+    rows["txid"] = np.zeros(0, dtype=str)
+    rows["sender"] = np.zeros(0, dtype=str)
+    return rows
+
+
+# ── Local indexer stand-in ────────────────────────────────────
+
+class LocalIndexer:
+    """
+    In-memory stand-in for the Algorand indexer, for development and tests.
+
+    start_session / checkin follow the attendance contract's rules and
+    record indexer-format transactions (state deltas list only the keys
+    whose value changed); search_transactions pages them with next-tokens
+    like the real indexer.
+    """
+
+    def __init__(self, app_id=1, created_round=1, first_timestamp=1_700_000_000, round_seconds=3):
+        self.app_id = app_id
+        self.created_round = created_round
+        self.round = created_round
+        self.timestamp = first_timestamp
+        self.round_seconds = round_seconds
+        self.transactions = []
+        self.session_id = 0
+        self.session_end = 0
+        self.students = {}  # sender -> {"last_session_id", "streak"}
+
+    def advance(self, seconds):
+        """Move chain time forward (one round per round_seconds)."""
+        rounds = max(1, int(seconds // self.round_seconds))
+        self.round += rounds
+        self.timestamp += seconds
+
+    def start_session(self, admin, duration_seconds):
+        self.session_id += 1
+        self.session_end = self.timestamp + duration_seconds
+        self._record(admin, "start_session", global_delta=[_uint_delta(SESSION_ID_KEY, self.session_id)])
+        return self.session_id
+
+    def checkin(self, sender):
+        """Record a check-in; returns False where the contract would reject it."""
+        local = self.students.setdefault(sender, {"last_session_id": 0, "streak": 0})
+        if self.timestamp > self.session_end or local["last_session_id"] == self.session_id:
+            return False
+        streak = local["streak"] + 1 if local["last_session_id"] == self.session_id - 1 else 1
+        delta = [_uint_delta(LAST_SESSION_KEY, self.session_id)]
+        if streak != local["streak"]:
+            delta.append(_uint_delta(STREAK_KEY, streak))
+        local.update(last_session_id=self.session_id, streak=streak)
+        self._record(sender, "checkin", local_delta=[{"address": sender, "delta": delta}])
+        return True
+
+    def health(self):
+        return {"round": self.round}
+
+    def applications(self, application_id):
+        if int(application_id) != self.app_id:
+            raise ValueError(f"Unknown application: {application_id}")
+        return {"application": {"id": self.app_id, "created-at-round": self.created_round}}
+
+    def search_transactions(self, application_id=None, txn_type=None, min_round=None, max_round=None,
+                            limit=None, next_page=None, **kwargs):
+        matches = [
+            t for t in self.transactions
+            if (application_id is None or t["application-transaction"]["application-id"] == application_id)
+            and (txn_type is None or t["tx-type"] == txn_type)
+            and (min_round is None or t["confirmed-round"] >= min_round)
+            and (max_round is None or t["confirmed-round"] <= max_round)
+        ]
+        start = int(next_page) if next_page else 0
+        stop = start + (limit or 1000)
+        response = {"current-round": self.round, "transactions": matches[start:stop]}
+        if matches[start:stop]:
+            response["next-token"] = str(stop)
+        return response
+
+    def _record(self, sender, method, global_delta=None, local_delta=None):
+        txn = {
+            "id": f"TX{len(self.transactions):08d}",
+            "tx-type": "appl",
+            "sender": sender,
+            "confirmed-round": self.round,
+            "round-time": int(self.timestamp),
+            "application-transaction": {
+                "application-id": self.app_id,
+                "application-args": [_b64(method)],
+                "on-completion": "noop",
+            },
+        }
+        if global_delta:
+            txn["global-state-delta"] = global_delta
+        if local_delta:
+            txn["local-state-delta"] = local_delta
+        self.transactions.append(txn)
+
+
+def _uint_delta(key, value):
+    return {"key": key, "value": {"action": 2, "uint": value}}
+
@@ -0,0 +1,231 @@
+"""
+CampusTrust AI - Check-in Columns
+===================================
+Columnar representation of class attendance data for vectorized
+anomaly analysis.
+
+All students' check-in timestamps live in one flat array; student i owns
+timestamps[offsets[i]:offsets[i + 1]]. Session ids are stored the same
+way. Per-student statistics then become segmented NumPy reductions
+instead of one Python call per student.
+
+Features:
+- Build from the JSON student list used by the API
+- Build from flat per-check-in arrays, e.g. an uploaded .npz file, with
+  no per-check-in Python objects
+- Segmented sum / count helpers that handle empty segments
+- Consecutive differences within each student's sorted values
+"""
+
+import itertools
+import numpy as np
+
+
+NPZ_REQUIRED = ("student_idx", "timestamp")
+NPZ_OPTIONAL = ("session_id", "student_id", "total_sessions", "streak")
+
+
+class CheckinColumns:
+    """Flat check-in and session arrays with per-student offsets."""
+
+    def __init__(self, student_ids, timestamps, offsets, session_ids, session_offsets,
+                 total_sessions, streaks, checkin_sessions=None):
+        self.student_ids = list(student_ids)
+        self.timestamps = timestamps
+        self.offsets = offsets
+        self.session_ids = session_ids
+        self.session_offsets = session_offsets
+        self.total_sessions = total_sessions
+        self.streaks = streaks
+        # Session of every check-in (aligned with timestamps), when known
+        self.checkin_sessions = checkin_sessions
+        # Local time offset from UTC (minutes) for hour-of-day checks; None = server timezone
+        self.utc_offset_minutes = None
+
+    @classmethod
+    def from_students(cls, students):
+        """
+        Build columns from a list of student_data dicts as accepted by
+        AnomalyDetector.analyze_student (checkin_times, session_ids,
+        total_sessions, streak, student_id).
+        """
+        checkins = [s.get("checkin_times", []) for s in students]
+        sessions = [s.get("session_ids", []) for s in students]
+
+        return cls(
+            student_ids=[s.get("student_id", "unknown") for s in students],
+            timestamps=_flatten(checkins),
+            offsets=_offsets(checkins),
+            session_ids=_flatten(sessions),
+            session_offsets=_offsets(sessions),
+            total_sessions=np.array([s.get("total_sessions", 0) for s in students], dtype=np.int64),
+            streaks=np.array([s.get("streak", 0) for s in students], dtype=np.int64),
+        )
+
+    @classmethod
+    def from_arrays(cls, student_idx, timestamps, session_ids=None, student_ids=None,
+                    total_sessions=0, streaks=0):
+        """
+        Build columns from flat per-check-in arrays.
+
+        Args:
+            student_idx: student index (0..n-1) of every check-in
+            timestamps: unix time of every check-in
+            session_ids: optional session of every check-in; negative
+                values mean unknown. A student's attended sessions are the
+                distinct ids among their check-ins.
+            student_ids: optional id per student (default: the index)
+            total_sessions, streaks: scalars or one value per student
+        """
+        student_idx = np.asarray(student_idx)
+        timestamps = np.asarray(timestamps)
+        if student_idx.ndim != 1 or timestamps.shape != student_idx.shape:
+            raise ValueError("student_idx and timestamp must be 1-D arrays of equal length")
+        if student_idx.dtype.kind not in "iu":
+            raise ValueError("student_idx must be an integer array")
+        if timestamps.dtype.kind not in "iuf":
+            raise ValueError("timestamp must be a numeric array")
+        if student_idx.size and student_idx.min() < 0:
+            raise ValueError("student_idx must be non-negative")
+        student_idx = student_idx.astype(np.int64, copy=False)
+
+        if student_ids is None:
+            n = int(student_idx.max()) + 1 if student_idx.size else 0
+            student_ids = range(n)
+        else:
+            student_ids = np.asarray(student_ids).tolist()
+            n = len(student_ids)
+            if student_idx.size and student_idx.max() >= n:
+                raise ValueError("student_idx refers past the end of student_id")
+
+        # Group check-ins by student; already-grouped uploads are used as is
+        if student_idx.size and (np.diff(student_idx) < 0).any():
+            order = np.argsort(student_idx, kind="stable")
+            student_idx, timestamps = student_idx[order], timestamps[order]
+            if session_ids is not None:
+                session_ids = np.asarray(session_ids)[order]
+        checkin_sessions = None
+        offsets = _count_offsets(student_idx, n)
+
+        if session_ids is None:
+            sessions = np.zeros(0, dtype=np.int64)
+            session_offsets = np.zeros(n + 1, dtype=np.int64)
+        else:
+            session_ids = np.asarray(session_ids)
+            if session_ids.shape != student_idx.shape or session_ids.dtype.kind not in "iu":
+                raise ValueError("session_id must be an integer array aligned with student_idx")
+            known = session_ids >= 0
+            owner, sessions = student_idx[known], session_ids[known].astype(np.int64, copy=False)
+            order = np.lexsort((sessions, owner))
+            owner, sessions = owner[order], sessions[order]
+            distinct = np.concatenate(([True], (owner[1:] != owner[:-1]) | (sessions[1:] != sessions[:-1])))
+            owner, sessions = owner[distinct], sessions[distinct]
+            session_offsets = _count_offsets(owner, n)
+            checkin_sessions = session_ids.astype(np.int64, copy=False)
+
+        return cls(
+            student_ids=student_ids,
+            timestamps=timestamps,
+            offsets=offsets,
+            session_ids=sessions,
+            session_offsets=session_offsets,
+            total_sessions=_per_student(total_sessions, n, "total_sessions"),
+            streaks=_per_student(streaks, n, "streak"),
+            checkin_sessions=checkin_sessions,
+        )
+
+    @classmethod
+    def from_npz(cls, file):
+        """
+        Build columns from an .npz file (path or file object) holding
+        student_idx and timestamp arrays, plus optional session_id,
+        student_id, total_sessions and streak arrays.
+        """
+        with np.load(file, allow_pickle=False) as data:
+            missing = [k for k in NPZ_REQUIRED if k not in data.files]
+            if missing:
+                raise ValueError(f"Missing arrays: {', '.join(missing)}")
+            arrays = {k: data[k] for k in NPZ_REQUIRED + NPZ_OPTIONAL if k in data.files}
+
+        return cls.from_arrays(
+            arrays["student_idx"],
+            arrays["timestamp"],
+            session_ids=arrays.get("session_id"),
+            student_ids=arrays.get("student_id"),
+            total_sessions=arrays.get("total_sessions", 0),
+            streaks=arrays.get("streak", 0),
+        )
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    @property
+    def checkin_counts(self):
+        return np.diff(self.offsets)
+
+    @property
+    def session_counts(self):
+        return np.diff(self.session_offsets)
+
+    def checkin_owner(self):
+        """Student index of every entry in timestamps."""
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.checkin_counts)
+
+    def session_owner(self):
+        """Student index of every entry in session_ids."""
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.session_counts)
+
+
+def segment_sum(values, offsets):
+    """Sum values over each [offsets[i], offsets[i + 1]) segment; empty segments give 0."""
+    counts = np.diff(offsets)
+    dtype = np.float64 if values.dtype.kind == "f" else np.int64
+    out = np.zeros(len(counts), dtype=dtype)
+    nonempty = counts > 0
+    if values.size and nonempty.any():
+        out[nonempty] = np.add.reduceat(values, offsets[:-1][nonempty])
+    return out
+
+
+def segment_count(mask, offsets):
+    """Count True entries of mask per segment."""
+    return segment_sum(mask.astype(np.int64), offsets)
+
+
+def segment_diffs(values, owner):
+    """
+    Differences between consecutive sorted values of the same owner.
+
+    Returns:
+        (diffs, diff_owner) where diff_owner[k] owns diffs[k]
+    """
+    sorted_values = values[np.lexsort((values, owner))]
+    within = owner[1:] == owner[:-1]
+    return (sorted_values[1:] - sorted_values[:-1])[within], owner[1:][within]
+
+
+def _flatten(lists):
+    flat = list(itertools.chain.from_iterable(lists))
+    if not flat:
+        return np.zeros(0, dtype=np.int64)
+    return np.asarray(flat)
+
+
+def _count_offsets(owner, n):
+    """Offsets of the n segments of a sorted owner array."""
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owner, minlength=n), out=offsets[1:])
+    return offsets
+
+
+def _per_student(value, n, name):
+    value = np.asarray(value)
+    if value.dtype.kind not in "iu" or value.ndim > 1 or (value.ndim == 1 and len(value) != n):
+        raise ValueError(f"{name} must be an integer or one integer per student")
+    return np.broadcast_to(value.astype(np.int64), (n,)).copy()
+
+
+def _offsets(lists):
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    np.cumsum([len(x) for x in lists], out=offsets[1:])
+    return offsets
@@ -0,0 +1,223 @@
+"""
+CampusTrust AI - Corpus Similarity Index
+==========================================
+Persistent TF-IDF index over proposals and feedback for "most similar
+documents" queries.
+
+Comparing a new proposal pairwise against thousands of stored texts
+tokenizes every one of them per query. The index tokenizes each document
+once, keeps an inverted posting list per term, and a query only scores
+the documents that share at least one term with it.
+
+Scoring is cosine similarity of TF-IDF vectors:
+- term weight (1 + log tf) * idf, with idf = log((1 + N) / (1 + df)) + 1
+- document norms are precomputed in one vectorized pass and reused
+  until the next add/remove (which changes N and the document
+  frequencies, hence every norm)
+
+Features:
+- Incremental add / replace / remove of documents
+- Optional document kind ("proposal", "feedback", ...) to filter results
+- SQLite persistence of per-document term counts; postings, document
+  frequencies and norms are rebuilt in memory on startup
+"""
+
+import heapq
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+
+class CorpusIndex:
+    """Inverted TF-IDF index with top-k cosine similarity queries."""
+
+    def __init__(self, tokenize, path=None):
+        """
+        Args:
+            tokenize: callable text -> list of terms (e.g. NLPProcessor.tokenize)
+            path: optional SQLite file persisting the documents
+        """
+        self.tokenize = tokenize
+        self._term_ids = {}  # term -> term id
+        self._df = []  # term id -> number of documents containing it
+        self._postings = []  # term id -> {doc index: term count}
+        self._docs = []  # doc index -> (doc_id, kind, term ids, counts), None once removed
+        self._free = []  # doc indexes available for reuse
+        self._doc_index = {}  # doc_id -> doc index
+        self._norms = None  # TF-IDF norm per doc index; None when stale
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS corpus_documents ("
+                "doc_id TEXT PRIMARY KEY, kind TEXT, terms TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            for doc_id, kind, terms in self._db.execute("SELECT doc_id, kind, terms FROM corpus_documents"):
+                self._insert(doc_id, kind, json.loads(terms))
+
+    def __len__(self):
+        return len(self._doc_index)
+
+    def add(self, doc_id, text, kind=None):
+        """Index a document, replacing any document with the same id."""
+        self.add_many([{"id": doc_id, "text": text, "kind": kind}])
+
+    def add_many(self, documents):
+        """
+        Index several documents with a single persistence commit.
+
+        Args:
+            documents: iterable of dicts with id, text and optional kind
+
+        Returns:
+            number of documents indexed
+        """
+        # Tokenize outside the lock; only the index updates are serialized
+        parsed = [
+            (str(doc["id"]), doc.get("kind"), Counter(self.tokenize(doc.get("text", ""))))
+            for doc in documents
+        ]
+        now = time.time()
+        with self._lock:
+            for doc_id, kind, counts in parsed:
+                self._remove(doc_id)
+                self._insert(doc_id, kind, counts)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO corpus_documents (doc_id, kind, terms, updated_at) VALUES (?, ?, ?, ?)",
+                    [(doc_id, kind, json.dumps(counts), now) for doc_id, kind, counts in parsed],
+                )
+                self._db.commit()
+        return len(parsed)
+
+    def remove(self, doc_id):
+        """Remove a document; returns False if it was not indexed."""
+        with self._lock:
+            removed = self._remove(str(doc_id))
+            if removed and self._db is not None:
+                self._db.execute("DELETE FROM corpus_documents WHERE doc_id = ?", (str(doc_id),))
+                self._db.commit()
+        return removed
+
+    def top_k_similar(self, text, k=10, kind=None, exclude=None):
+        """
+        Most similar indexed documents to text.
+
+        Args:
+            text: query text (e.g. a new proposal)
+            k: number of results
+            kind: only return documents of this kind
+            exclude: optional doc id to leave out (e.g. the query itself)
+
+        Returns:
+            list of {"id", "kind", "similarity"} dicts, most similar first
+        """
+        query = Counter(self.tokenize(text))
+        if not query or k <= 0:
+            return []
+
+        with self._lock:
+            norms = self._document_norms()
+            n_docs = len(self._doc_index)
+            scores = {}
+            query_norm = 0.0
+            for term, count in query.items():
+                term_id = self._term_ids.get(term)
+                df = self._df[term_id] if term_id is not None else 0
+                idf = math.log((1 + n_docs) / (1 + df)) + 1
+                weight = (1 + math.log(count)) * idf
+                query_norm += weight * weight
+                if not df:
+                    continue
+                # Document weight is (1 + log tf) * idf
+                factor = weight * idf
+                for doc, tf in self._postings[term_id].items():
+                    scores[doc] = scores.get(doc, 0.0) + factor * (1 + math.log(tf))
+
+            if kind is not None or exclude is not None:
+                exclude = str(exclude) if exclude is not None else None
+                scores = {
+                    doc: s for doc, s in scores.items()
+                    if (kind is None or self._docs[doc][1] == kind) and self._docs[doc][0] != exclude
+                }
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1] / norms[item[0]])
+            query_norm = math.sqrt(query_norm)
+            return [{
+                "id": self._docs[doc][0],
+                "kind": self._docs[doc][1],
+                "similarity": round(min(score / (norms[doc] * query_norm), 1.0), 4),
+            } for doc, score in top]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._doc_index),
+                "terms": sum(1 for df in self._df if df),
+                "postings": sum(len(p) for p in self._postings),
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _insert(self, doc_id, kind, counts):
+        term_ids, tfs = [], []
+        for term, count in counts.items():
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                term_id = self._term_ids[term] = len(self._df)
+                self._df.append(0)
+                self._postings.append({})
+            term_ids.append(term_id)
+            tfs.append(count)
+
+        doc = self._free.pop() if self._free else len(self._docs)
+        entry = (doc_id, kind, np.array(term_ids, dtype=np.int64), np.array(tfs, dtype=np.float64))
+        if doc == len(self._docs):
+            self._docs.append(entry)
+        else:
+            self._docs[doc] = entry
+        self._doc_index[doc_id] = doc
+        for term_id, count in zip(term_ids, tfs):
+            self._df[term_id] += 1
+            self._postings[term_id][doc] = count
+        self._norms = None
+
+    def _remove(self, doc_id):
+        doc = self._doc_index.pop(doc_id, None)
+        if doc is None:
+            return False
+        for term_id in self._docs[doc][2].tolist():
+            self._df[term_id] -= 1
+            del self._postings[term_id][doc]
+        self._docs[doc] = None
+        self._free.append(doc)
+        self._norms = None
+        return True
+
+    def _document_norms(self):
+        """TF-IDF vector norm of every document, recomputed after changes."""
+        if self._norms is not None:
+            return self._norms
+
+        live = [(doc, entry) for doc, entry in enumerate(self._docs) if entry is not None]
+        norms = np.ones(len(self._docs))
+        if live:
+            idf = np.log((1 + len(live)) / (1 + np.array(self._df, dtype=np.float64))) + 1
+            owner = np.repeat([doc for doc, _ in live], [entry[2].size for _, entry in live])
+            term_ids = np.concatenate([entry[2] for _, entry in live])
+            weights = (1 + np.log(np.concatenate([entry[3] for _, entry in live]))) * idf[term_ids]
+            squared = np.bincount(owner, weights=weights * weights, minlength=len(self._docs))
+            norms = np.where(squared > 0, np.sqrt(squared), 1.0)
+        self._norms = norms.tolist()
+        return self._norms
@@ -0,0 +1,100 @@
+"""
+CampusTrust AI - Keyword Matcher
+==================================
+Single-pass multi-keyword matcher for labelled lexicons
+(emotion words, feedback categories, ...).
+
+The lexicon is compiled once into a hash table of word tuples, so a
+lookup costs one tokenization plus a few dict probes per token,
+independent of how many terms the lexicon holds. Terms match on whole
+words only ("bad" does not match "badminton"); a trailing plural
+"s"/"es" on the text side is tolerated ("exams" matches "exam").
+
+Features:
+- Single and multi-word terms
+- Whole-word matching with simple plural folding
+- Lexicons loadable from JSON configuration
+"""
+
+import json
+import re
+
+
+class KeywordMatcher:
+    """Match a {label: [terms]} lexicon against text in one pass."""
+
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, lexicon):
+        """
+        Args:
+            lexicon: dict mapping label -> list of terms
+        """
+        self.labels = list(lexicon)
+        self.max_words = 1
+        self._terms = {}  # word tuple -> list of label indexes
+
+        for idx, label in enumerate(self.labels):
+            for term in lexicon[label]:
+                words = tuple(self.TOKEN_PATTERN.findall(term.lower()))
+                if not words:
+                    continue
+                owners = self._terms.setdefault(words, [])
+                if idx not in owners:
+                    owners.append(idx)
+                self.max_words = max(self.max_words, len(words))
+
+    def match_counts(self, text):
+        """
+        Count distinct matched terms per label.
+
+        Returns:
+            dict label -> number of distinct terms found, in lexicon order,
+            containing only labels with at least one match
+        """
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        found = set()
+
+        for i in range(len(tokens)):
+            for n in range(1, min(self.max_words, len(tokens) - i) + 1):
+                words = self._lookup(tokens[i:i + n])
+                if words is not None:
+                    found.add(words)
+
+        counts = [0] * len(self.labels)
+        for words in found:
+            for idx in self._terms[words]:
+                counts[idx] += 1
+
+        return {self.labels[i]: c for i, c in enumerate(counts) if c}
+
+    def _lookup(self, words):
+        """Return the lexicon key matching words, allowing a plural suffix."""
+        key = tuple(words)
+        if key in self._terms:
+            return key
+
+        last = key[-1]
+        for suffix in ("es", "s"):
+            if last.endswith(suffix) and len(last) > len(suffix) + 1:
+                folded = key[:-1] + (last[:-len(suffix)],)
+                if folded in self._terms:
+                    return folded
+        return None
+
+
+def load_lexicons(path):
+    """
+    Load lexicons from a JSON file.
+
+    Expected format: {"<lexicon name>": {"<label>": ["term", ...]}, ...}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        lexicons = json.load(f)
+
+    if not isinstance(lexicons, dict):
+        raise ValueError("Lexicon file must contain a JSON object")
+    for name, lexicon in lexicons.items():
+        if not isinstance(lexicon, dict) or not all(isinstance(t, list) for t in lexicon.values()):
+            raise ValueError(f"Lexicon '{name}' must map labels to lists of terms")
+    return lexicons
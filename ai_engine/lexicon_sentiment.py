@@ -0,0 +1,235 @@
+"""
+CampusTrust AI - Vectorized Lexicon Sentiment Engine
+======================================================
+Batch sentiment scorer using the same polarity/subjectivity lexicon
+as TextBlob's PatternAnalyzer, evaluated with NumPy array operations
+over a whole batch at once instead of word by word.
+
+How it works:
+- The batch is tokenized once and every token mapped to an integer id,
+  giving a flat CSR-style document-term layout (token ids + doc index)
+- Per-document lexicon sums are the product of that sparse matrix with
+  the precomputed polarity/subjectivity vectors (np.bincount)
+- Intensifiers ("very good"), negations ("not good") and "!" boosts
+  follow PatternAnalyzer's rules, expressed as shifted boolean masks
+
+Differences from PatternAnalyzer (kept small on purpose):
+- Modifiers and negations must be adjacent to the word they affect
+  (punctuation and single-character words are skipped, as
+  PatternAnalyzer does)
+- Emoticons are not scored
+
+Apostrophes split words the way PatternAnalyzer's tokenizer splits them
+("isn't" -> "is n ' t", "it's" -> "it ' s"); the one-letter pieces are
+then skipped, so a contracted "not" is not a negation, as in TextBlob.
+"""
+
+import re
+import numpy as np
+
+
+class LexiconSentimentEngine:
+    """Score polarity and subjectivity for many texts with NumPy."""
+
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*|!")
+    MODIFIER_TAGS = ("RB",)
+    NEGATIONS = ("no", "not", "n't", "never")
+    EXCLAMATION_BOOST = 1.25
+    NEGATION_FACTOR = -0.5
+
+    def __init__(self, lexicon=None):
+        """
+        Args:
+            lexicon: optional {word: {pos: (polarity, subjectivity, intensity)}}
+                dict; defaults to TextBlob's English sentiment lexicon
+        """
+        if lexicon is None:
+            from textblob.en import sentiment as pattern_sentiment
+            pattern_sentiment.load()
+            lexicon = pattern_sentiment
+
+        # Id 0 is reserved for unknown tokens
+        vocab = {}
+        polarity, subjectivity, intensity, modifier = [0.0], [0.0], [1.0], [False]
+        for word, entries in lexicon.items():
+            values = entries.get(None)
+            if values is None:
+                continue
+            vocab[word] = len(polarity)
+            polarity.append(values[0])
+            subjectivity.append(values[1])
+            intensity.append(values[2])
+            modifier.append(any(tag in entries for tag in self.MODIFIER_TAGS))
+
+        known = [False] + [True] * len(vocab)
+        negation = [False] * len(known)
+        for word in self.NEGATIONS + ("!",):
+            if word not in vocab:
+                vocab[word] = len(known)
+                polarity.append(0.0)
+                subjectivity.append(0.0)
+                intensity.append(1.0)
+                modifier.append(False)
+                known.append(False)
+                negation.append(False)
+            if word in self.NEGATIONS:
+                negation[vocab[word]] = True
+
+        self.vocab = vocab
+        self.polarity = np.array(polarity, dtype=np.float64)
+        self.subjectivity = np.array(subjectivity, dtype=np.float64)
+        self.intensity = np.array(intensity, dtype=np.float64)
+        self.known = np.array(known, dtype=bool)
+        self.modifier = np.array(modifier, dtype=bool) & self.known
+        self.negation = np.array(negation, dtype=bool)
+        self.exclamation_id = vocab["!"]
+
+    def score(self, texts):
+        """
+        Score a batch of texts.
+
+        Returns:
+            (polarity, subjectivity) float64 arrays, one entry per text,
+            on TextBlob's scales (-1..1 and 0..1)
+        """
+        ids, doc = self._encode(texts)
+        return self._score_encoded(ids, doc, len(texts))
+
+    def _encode(self, texts):
+        """Tokenize texts into flat (token id, document index) arrays."""
+        tokens = []
+        lengths = np.zeros(len(texts), dtype=np.int64)
+        for i, text in enumerate(texts):
+            # PatternAnalyzer splits "n't" off before lower-casing ("isn't" -> "is n't")
+            text = (text or "").replace("n't", " n't").lower()
+            words = [w for w in self.TOKEN_PATTERN.findall(text) if len(w) > 1 or w == "!"]
+            tokens.extend(words)
+            lengths[i] = len(words)
+
+        if not tokens:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        # Map each distinct token once, then broadcast ids back to the stream
+        uniques, inverse = np.unique(np.array(tokens), return_inverse=True)
+        unique_ids = np.fromiter((self.vocab.get(w, 0) for w in uniques.tolist()),
+                                 dtype=np.int64, count=len(uniques))
+        ids = unique_ids[inverse.ravel()]
+        doc = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        return ids, doc
+
+    def _score_encoded(self, ids, doc, n_docs):
+        polarity_out = np.zeros(n_docs)
+        subjectivity_out = np.zeros(n_docs)
+
+        # "!" is transparent for modifier/negation adjacency; it only boosts
+        is_bang = ids == self.exclamation_id
+        bang_doc = doc[is_bang]
+        bang_rank = np.cumsum(~is_bang)[is_bang]  # words seen before each "!"
+        ids = ids[~is_bang]
+        doc = doc[~is_bang]
+        if ids.size == 0:
+            return polarity_out, subjectivity_out
+
+        known = self.known[ids]
+        same_doc = np.concatenate(([False], doc[1:] == doc[:-1]))
+
+        # A known word right after a known modifier merges into its assessment
+        merges = known & np.concatenate(([False], self.modifier[ids][:-1])) & same_doc
+        starts = known & ~merges
+        terminal = known & ~np.concatenate((merges[1:], [False]))
+
+        # Negation applies to the first word of an assessment and inverts its intensity
+        negated = starts & np.concatenate(([False], self.negation[ids][:-1])) & same_doc
+        intensity = np.where(negated, 1.0 / self.intensity[ids], self.intensity[ids])
+        prev_intensity = np.concatenate(([1.0], intensity[:-1]))
+        factor = np.where(merges, prev_intensity, 1.0)
+
+        polarity = np.clip(self.polarity[ids] * factor, -1.0, 1.0)[terminal]
+        subjectivity = np.clip(self.subjectivity[ids] * factor, -1.0, 1.0)[terminal]
+        group_doc = doc[starts]
+        group_negated = negated[starts]
+
+        # "!" boosts the most recent assessment in the same document
+        if bang_doc.size:
+            groups_before = np.concatenate(([0], np.cumsum(starts)))
+            bang_groups = groups_before[bang_rank] - 1
+            valid = bang_groups >= 0
+            valid[valid] = group_doc[bang_groups[valid]] == bang_doc[valid]
+            boosts = np.bincount(bang_groups[valid], minlength=polarity.size)
+            polarity = np.clip(polarity * self.EXCLAMATION_BOOST ** boosts, -1.0, 1.0)
+
+        polarity = np.where(group_negated, polarity * self.NEGATION_FACTOR, polarity)
+
+        counts = np.bincount(group_doc, minlength=n_docs)
+        has_groups = counts > 0
+        polarity_out[has_groups] = (np.bincount(group_doc, weights=polarity, minlength=n_docs)[has_groups]
+                                    / counts[has_groups])
+        subjectivity_out[has_groups] = (np.bincount(group_doc, weights=subjectivity, minlength=n_docs)[has_groups]
+                                        / counts[has_groups])
+        return polarity_out, subjectivity_out
+
+
+def parity_report(texts, engine=None):
+    """
+    Compare engine scores against TextBlob's PatternAnalyzer on texts.
+
+    Returns:
+        dict with mean/max absolute error on the 0-100 score scale and
+        the share of texts whose classification agrees
+    """
+    from textblob import TextBlob
+
+    engine = engine or LexiconSentimentEngine()
+    polarity, _ = engine.score(texts)
+    ours = ((polarity + 1) * 50).astype(int)
+    reference = np.array([int((TextBlob(t).sentiment.polarity + 1) * 50) for t in texts])
+
+    def classify(scores):
+        return np.where(scores > 60, 1, np.where(scores < 40, -1, 0))
+
+    errors = np.abs(ours - reference)
+    return {
+        "texts": len(texts),
+        "mean_abs_error": round(float(errors.mean()), 2) if len(texts) else 0.0,
+        "max_abs_error": int(errors.max()) if len(texts) else 0,
+        "classification_agreement": round(float(np.mean(classify(ours) == classify(reference))), 3)
+        if len(texts) else 1.0,
+    }
+
+
+# Accuracy parity check against TextBlob on a fixed corpus
+if __name__ == "__main__":
+    corpus = [
+        "The blockchain course was absolutely amazing! Professor explained concepts clearly.",
+        "The lab equipment is outdated and wifi keeps disconnecting. Very frustrated.",
+        "Decent course content but needs more practical exercises.",
+        "I love the campus events and the coding clubs are very motivating!",
+        "Administration is slow and unresponsive. Registration was a nightmare.",
+        "The exam was not good at all.",
+        "Not a bad semester overall, the teachers were helpful.",
+        "Library hours are too short and the staff is rude.",
+        "Great food in the canteen!!",
+        "The syllabus is very very long and extremely boring.",
+        "Hostel rooms are clean and comfortable.",
+        "Nothing special about this subject.",
+        "The new grading policy is unfair and confusing.",
+        "I am happy with the sports facilities.",
+        "Lectures start on time.",
+        "Worst registration process ever, never again.",
+        # Negated contractions are split as TextBlob's tokenizer splits them
+        "This isn't good.",
+        "It isn't great",
+        "The lab wasn't a good place to study.",
+        "The mentors aren't very helpful.",
+        "I can't say it's great, but it's not bad!",
+        "We don't like the new timetable and we won't accept it.",
+    ]
+
+    report = parity_report(corpus)
+    print("⚖️  CampusTrust AI - Lexicon Engine Parity vs TextBlob\n")
+    for key, value in report.items():
+        print(f"   {key}: {value}")
+
+    assert report["classification_agreement"] == 1.0, report
+    assert report["max_abs_error"] <= 1, report  # int() truncation of equal floats
+    print("\n✅ Parity check passed")
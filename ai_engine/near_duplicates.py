@@ -0,0 +1,324 @@
+"""
+CampusTrust AI - Near-Duplicate Detection
+===========================================
+MinHash / LSH index for copy-pasted feedback, proposals and papers.
+
+Exact hashing (as in the research review's repeated-sentence check) only
+catches identical text. Here every document is reduced to a MinHash
+signature over its word shingles; the fraction of equal signature
+entries estimates the Jaccard similarity of two documents' shingle
+sets, so lightly edited copies still match.
+
+How it works:
+- Shingles: every SHINGLE_SIZE consecutive words, hashed to uint64
+- Signature: NUM_PERM minimums of (a * shingle + b) mod 2^64 per
+  random odd a, as a NumPy uint64 array
+- LSH: the signature is cut into BANDS bands; each band is folded into
+  one uint64 key. Documents sharing any band key are candidates, so a
+  query only compares against a handful of documents
+- Band keys live in one sorted array (binary search per query); new
+  documents go to a small pending buffer that is merged in batches,
+  keeping insert and query cost sub-millisecond at millions of documents
+
+Persistence: a .npz snapshot plus an append-only log of adds and removes
+since the snapshot, so each insert costs one small append.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+
+class NearDuplicateIndex:
+    """MinHash signatures with banded LSH lookup."""
+
+    NUM_PERM = 64  # Signature length
+    BANDS = 16  # LSH bands (NUM_PERM / BANDS rows each)
+    SHINGLE_SIZE = 3  # Words per shingle
+    THRESHOLD = 0.8  # Estimated Jaccard reported as a near-duplicate
+    MAX_PENDING = 4096  # Documents buffered before merging into the sorted keys
+    SNAPSHOT_EVERY = 10000  # Logged operations between automatic snapshots
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, path=None, num_perm=NUM_PERM, bands=BANDS, shingle_size=SHINGLE_SIZE,
+                 threshold=THRESHOLD, seed=1):
+        """
+        Args:
+            path: optional file prefix for persistence (<path>.npz snapshot
+                and <path>.log); an existing store there is loaded
+            num_perm: signature length (must be divisible by bands)
+            bands: LSH bands; more bands find less similar candidates
+            shingle_size: words per shingle
+            threshold: default minimum estimated Jaccard for query results
+            seed: seed of the hash functions (fixed so stores stay valid)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 2**64, num_perm, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self._b = rng.integers(0, 2**64, num_perm, dtype=np.uint64, endpoint=False)
+        self._band_mix = rng.integers(0, 2**64, num_perm, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self._band_salt = rng.integers(0, 2**64, bands, dtype=np.uint64, endpoint=False)
+
+        self._signatures = np.zeros((1024, num_perm), dtype=np.uint64)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._size = 0
+        self._ids = []  # row -> doc id
+        self._rows = {}  # doc id -> row of its live signature
+        self._keys = np.zeros(0, dtype=np.uint64)  # sorted band keys of merged rows
+        self._key_rows = np.zeros(0, dtype=np.int64)  # row of each key
+        self._pending = np.zeros((self.MAX_PENDING, bands), dtype=np.uint64)
+        self._pending_rows = np.zeros(self.MAX_PENDING, dtype=np.int64)
+        self._n_pending = 0
+        self._dead_keys = 0
+        self._lock = threading.Lock()
+        self._log = None
+        self._logged = 0
+
+        if path:
+            self._load()
+            self._log = open(f"{path}.log", "a", encoding="utf-8")
+
+    def __len__(self):
+        return len(self._rows)
+
+    def signature(self, text):
+        """MinHash signature of text (uint64 array), or None if it has no words."""
+        words = self.TOKEN_PATTERN.findall(text.lower())
+        if not words:
+            return None
+        n = max(len(words) - self.shingle_size + 1, 1)
+        shingles = {" ".join(words[i:i + self.shingle_size]) for i in range(n)}
+        digests = b"".join(hashlib.blake2b(s.encode(), digest_size=8).digest() for s in shingles)
+        hashes = np.frombuffer(digests, dtype="<u8")
+        return (hashes[:, None] * self._a + self._b).min(axis=0)
+
+    def add(self, doc_id, text):
+        """
+        Index a document (replacing any with the same id).
+
+        Returns:
+            False if the text has no words to index
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return False
+        with self._lock:
+            self._add(str(doc_id), signature)
+            self._write_log({"op": "add", "id": str(doc_id), "sig": _encode(signature)})
+        return True
+
+    def remove(self, doc_id):
+        """Remove a document; returns False if it was not indexed."""
+        with self._lock:
+            removed = self._remove(str(doc_id))
+            if removed:
+                self._write_log({"op": "remove", "id": str(doc_id)})
+        return removed
+
+    def query(self, text, threshold=None, limit=10, exclude=None):
+        """
+        Indexed documents whose estimated Jaccard similarity to text is at
+        least threshold.
+
+        Returns:
+            list of {"id", "jaccard"} dicts, most similar first
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        threshold = self.threshold if threshold is None else threshold
+
+        with self._lock:
+            candidates = self._candidates(self._band_keys(signature[None, :])[0])
+            candidates = candidates[self._alive[candidates]]
+            if exclude is not None and str(exclude) in self._rows:
+                candidates = candidates[candidates != self._rows[str(exclude)]]
+            if candidates.size == 0:
+                return []
+
+            jaccard = (self._signatures[candidates] == signature).mean(axis=1)
+            keep = jaccard >= threshold
+            candidates, jaccard = candidates[keep], jaccard[keep]
+            order = np.argsort(-jaccard, kind="stable")[:limit]
+            return [{"id": self._ids[row], "jaccard": round(float(score), 3)}
+                    for row, score in zip(candidates[order].tolist(), jaccard[order].tolist())]
+
+    def save(self):
+        """Write a snapshot and truncate the operation log."""
+        if not self.path:
+            raise ValueError("No persistence path configured")
+        with self._lock:
+            self._snapshot()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._rows),
+                "rows": self._size,
+                "pending": self._n_pending,
+                "num_perm": self.num_perm,
+                "bands": self.bands,
+                "threshold": self.threshold,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    # ── Index internals (callers hold the lock) ─────────────────
+
+    def _add(self, doc_id, signature):
+        self._remove(doc_id)
+        if self._size == len(self._alive):
+            self._signatures = np.concatenate([self._signatures, np.zeros_like(self._signatures)])
+            self._alive = np.concatenate([self._alive, np.zeros_like(self._alive)])
+        row = self._size
+        self._size += 1
+        self._signatures[row] = signature
+        self._alive[row] = True
+        self._ids.append(doc_id)
+        self._rows[doc_id] = row
+
+        if self._n_pending == self.MAX_PENDING:
+            self._merge_pending()
+        self._pending[self._n_pending] = self._band_keys(signature[None, :])[0]
+        self._pending_rows[self._n_pending] = row
+        self._n_pending += 1
+
+    def _remove(self, doc_id):
+        # Keys of dead rows are filtered at query time and dropped on merge
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self._dead_keys += self.bands
+        return True
+
+    def _band_keys(self, signatures):
+        """One salted uint64 key per band: (n, num_perm) -> (n, bands)."""
+        mixed = (signatures * self._band_mix).reshape(len(signatures), self.bands, -1)
+        return mixed.sum(axis=2, dtype=np.uint64) ^ self._band_salt
+
+    def _candidates(self, keys):
+        """Rows sharing at least one band key, merged and pending."""
+        starts = np.searchsorted(self._keys, keys, side="left")
+        stops = np.searchsorted(self._keys, keys, side="right")
+        found = [self._key_rows[start:stop] for start, stop in zip(starts.tolist(), stops.tolist()) if stop > start]
+
+        pending = self._pending[:self._n_pending]
+        found.append(self._pending_rows[:self._n_pending][(pending == keys).any(axis=1)])
+        return np.unique(np.concatenate(found)) if len(found) > 1 else found[0]
+
+    def _merge_pending(self):
+        """Fold the pending buffer into the sorted key array."""
+        if self._n_pending == 0:
+            return
+        keys = self._pending[:self._n_pending].ravel()
+        rows = np.repeat(self._pending_rows[:self._n_pending], self.bands)
+        self._n_pending = 0
+
+        if self._dead_keys > len(self._keys) // 4:
+            # Mostly-dead arrays: rebuild from live rows instead of inserting
+            live = self._alive[self._key_rows]
+            keys = np.concatenate([self._keys[live], keys])
+            rows = np.concatenate([self._key_rows[live], rows])
+            order = np.argsort(keys, kind="stable")
+            self._keys, self._key_rows = keys[order], rows[order]
+            self._dead_keys = 0
+            return
+
+        order = np.argsort(keys, kind="stable")
+        keys, rows = keys[order], rows[order]
+        positions = np.searchsorted(self._keys, keys, side="right")
+        self._keys = np.insert(self._keys, positions, keys)
+        self._key_rows = np.insert(self._key_rows, positions, rows)
+
+    # ── Persistence ──────────────────────────────────────────
+
+    def _write_log(self, entry):
+        if self._log is None:
+            return
+        self._log.write(json.dumps(entry) + "\n")
+        self._log.flush()
+        self._logged += 1
+        if self._logged >= self.SNAPSHOT_EVERY:
+            self._snapshot()
+
+    def _snapshot(self):
+        self._merge_pending()
+        live = np.zeros(self._size, dtype=bool)
+        live[list(self._rows.values())] = True
+        tmp_path = f"{self.path}.npz.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                signatures=self._signatures[:self._size][live],
+                ids=np.array([self._ids[row] for row in np.flatnonzero(live).tolist()], dtype=str),
+                params=np.array([self.num_perm, self.bands, self.shingle_size], dtype=np.int64),
+            )
+        os.replace(tmp_path, f"{self.path}.npz")
+        if self._log is not None:
+            self._log.close()
+        self._log = open(f"{self.path}.log", "w", encoding="utf-8")
+        self._logged = 0
+
+    def _load(self):
+        snapshot = f"{self.path}.npz"
+        if os.path.exists(snapshot):
+            with np.load(snapshot, allow_pickle=False) as data:
+                if data["params"].tolist() != [self.num_perm, self.bands, self.shingle_size]:
+                    raise ValueError("Stored signatures use different MinHash parameters")
+                signatures, ids = data["signatures"], data["ids"].tolist()
+            self._bulk_load(ids, signatures)
+
+        log_path = f"{self.path}.log"
+        if os.path.exists(log_path):
+            with open(log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # Torn final write
+                    if entry["op"] == "add":
+                        self._add(entry["id"], _decode(entry["sig"]))
+                    else:
+                        self._remove(entry["id"])
+                    self._logged += 1
+
+    def _bulk_load(self, ids, signatures):
+        n = len(ids)
+        capacity = max(1024, 1 << (n - 1).bit_length()) if n else 1024
+        self._signatures = np.zeros((capacity, self.num_perm), dtype=np.uint64)
+        self._signatures[:n] = signatures
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:n] = True
+        self._size = n
+        self._ids = list(ids)
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+
+        keys = self._band_keys(signatures).ravel() if n else np.zeros(0, dtype=np.uint64)
+        rows = np.repeat(np.arange(n, dtype=np.int64), self.bands)
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._key_rows = keys[order], rows[order]
+
+
+def _encode(signature):
+    return base64.b64encode(signature.astype("<u8").tobytes()).decode()
+
+
+def _decode(text):
+    return np.frombuffer(base64.b64decode(text), dtype="<u8").astype(np.uint64)
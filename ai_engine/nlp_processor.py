@@ -6,8 +6,10 @@ key phrase extraction, and content summarization.
 
 Features:
 - Text preprocessing and cleaning
-- Key phrase extraction
+- TextDocument: tokenize once, reuse tokens / counts / sentences across calls
+- Key phrase extraction (words, bigrams, trigrams) in bounded memory
 - Text similarity computation
+- Batch similarity matrices over hashed sparse term-frequency vectors
 - Content summarization
 - Proposal quality scoring for voting system
 - Credential description analysis
@@ -15,12 +17,91 @@ Features:
 
 import re
 import math
+import string
 from collections import Counter
+from functools import cached_property
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from streaming_stats import SpaceSavingCounter
+
+
+# ASCII characters other than letters, digits and whitespace become spaces
+_ASCII_PUNCT = str.maketrans({
+    c: " " for c in map(chr, range(128))
+    if c not in string.ascii_letters + string.digits and not c.isspace()
+})
+_NON_WORD = re.compile(r"[^a-z0-9\s]")
+_SENTENCE_END = re.compile(r"[.!?]+")
+
+
+class TextDocument:
+    """
+    A text tokenized once. Every NLPProcessor method accepts a
+    TextDocument wherever it takes a text, so a request that runs several
+    analyses on the same text pays for tokenization once.
+
+    Derived values (cleaned text, tokens, counts, sentences) are computed
+    on first use and cached.
+    """
+
+    def __init__(self, text, stop_words):
+        self.text = text or ""
+        self.stop_words = stop_words
+
+    @cached_property
+    def lower(self):
+        return self.text.lower()
+
+    @cached_property
+    def words(self):
+        """All words of the lower-cased text, punctuation removed."""
+        cleaned = self.lower.translate(_ASCII_PUNCT)
+        if not cleaned.isascii():
+            cleaned = _NON_WORD.sub(" ", cleaned)
+        return cleaned.split()
+
+    @cached_property
+    def cleaned(self):
+        return " ".join(self.words)
+
+    @cached_property
+    def tokens(self):
+        """Words longer than two characters that are not stop words."""
+        stop_words = self.stop_words
+        return [w for w in self.words if len(w) > 2 and w not in stop_words]
+
+    @cached_property
+    def counts(self):
+        return Counter(self.tokens)
+
+    @cached_property
+    def sentences(self):
+        """Stripped, non-empty sentences split on . ! ?"""
+        return [s.strip() for s in _SENTENCE_END.split(self.text) if s.strip()]
+
+    @cached_property
+    def sentence_tokens(self):
+        """Tokens of every sentence, for n-grams that must not span sentence ends."""
+        return [TextDocument(s, self.stop_words).tokens for s in self.sentences]
+
+    @cached_property
+    def sentence_documents(self):
+        """TextDocument of every sentence longer than 10 characters."""
+        return [TextDocument(s, self.stop_words) for s in self.sentences if len(s) > 10]
 
 
 class NLPProcessor:
     """Natural Language Processing utilities for campus governance."""
 
+    HASH_FEATURES = 2 ** 20  # Hashed term columns of the batch similarity matrix
+    BLOCK_CELLS = 4_000_000  # Similarity cells computed per block (bounds memory)
+    MAX_PHRASE_WORDS = 3  # Longest key phrase (trigrams)
+    MIN_PHRASE_COUNT = 2  # Occurrences a multi-word phrase needs to be a key phrase
+    KEY_PHRASE_CAPACITY = 4096  # Phrases tracked by the key-phrase sketch
+    KEY_PHRASE_BATCH = 20_000  # Tokens counted exactly before folding into the sketch
+
     # Common stop words
     STOP_WORDS = set([
         "a", "an", "the", "is", "are", "was", "were", "be", "been", "being",
@@ -36,39 +117,84 @@ class NLPProcessor:
         "some", "such", "only", "own", "same", "than", "too", "very",
     ])
 
+    def document(self, text):
+        """Wrap text in a TextDocument (documents are returned as is)."""
+        if isinstance(text, TextDocument):
+            return text
+        return TextDocument(text, self.STOP_WORDS)
+
     def preprocess(self, text):
         """Clean and preprocess text."""
-        if not text:
-            return ""
-        text = text.lower().strip()
-        text = re.sub(r"[^a-zA-Z0-9\s]", " ", text)
-        text = re.sub(r"\s+", " ", text)
-        return text.strip()
+        return self.document(text).cleaned
 
     def tokenize(self, text):
         """Tokenize text into words."""
-        cleaned = self.preprocess(text)
-        return [w for w in cleaned.split() if w not in self.STOP_WORDS and len(w) > 2]
+        return list(self.document(text).tokens)
 
     def extract_key_phrases(self, text, top_n=5):
-        """Extract key phrases from text using TF scoring."""
-        tokens = self.tokenize(text)
-        if not tokens:
+        """
+        Extract key phrases (words, bigrams and trigrams) using TF scoring.
+
+        A phrase's score is its relative frequency among the phrases of the
+        same length, e.g. count / number of bigrams for a bigram, so words
+        and longer phrases are ranked on one scale. Phrases never span a
+        sentence end, and multi-word phrases must occur at least
+        MIN_PHRASE_COUNT times. A multi-word phrase that only occurs inside
+        a longer key phrase (same count) is reported once, as the longer
+        phrase; single words are always kept.
+
+        N-grams are counted as tuples of word ids, one batch of tokens at a
+        time, and folded into a Space-Saving sketch, so memory stays fixed
+        however long the text is; counts are exact while the text has at
+        most KEY_PHRASE_CAPACITY distinct phrases.
+        """
+        sentences = [t for t in self.document(text).sentence_tokens if t]
+        if not sentences:
             return []
 
-        # Bigrams and trigrams
-        bigrams = [f"{tokens[i]} {tokens[i+1]}" for i in range(len(tokens)-1)]
-        trigrams = [f"{tokens[i]} {tokens[i+1]} {tokens[i+2]}" for i in range(len(tokens)-2)]
-
-        # Frequency-based scoring
-        freq = Counter(tokens + bigrams)
-        top_phrases = freq.most_common(top_n)
-        return [{"phrase": p, "score": round(s / max(len(tokens), 1), 3)} for p, s in top_phrases]
+        # Word ids with a -1 break after every sentence; n-grams containing it are skipped
+        word_ids = {}
+        ids = []
+        for sentence in sentences:
+            ids.extend(word_ids.setdefault(t, len(word_ids)) for t in sentence)
+            ids.append(-1)
+        words = list(word_ids)  # word id -> word
+        totals = {n: sum(max(len(t) - n + 1, 0) for t in sentences)
+                  for n in range(1, self.MAX_PHRASE_WORDS + 1)}
+
+        batch = self.KEY_PHRASE_BATCH
+        sketch = SpaceSavingCounter(max(self.KEY_PHRASE_CAPACITY, top_n * 4))
+        for start in range(0, len(ids), batch):
+            # The batch owns the n-grams starting in it, so overlap by n - 1 tokens
+            window = ids[start:start + batch + self.MAX_PHRASE_WORDS - 1]
+            counts = Counter()
+            for n in range(1, self.MAX_PHRASE_WORDS + 1):
+                counts.update(zip(*(window[k:batch + k] for k in range(n))))
+            for gram in [g for g in counts if -1 in g]:
+                del counts[gram]
+            sketch.update(counts)
+
+        candidates = [
+            (gram, count, count / totals[len(gram)])
+            for gram, count in sketch.counts.items()
+            if len(gram) == 1 or count - sketch.errors[gram] >= self.MIN_PHRASE_COUNT
+        ]
+        # Highest score first; on ties the longer phrase, then first occurrence
+        candidates.sort(key=lambda x: (-x[2], -len(x[0])))
+        phrases = []
+        for gram, count, score in candidates:
+            if len(phrases) == top_n:
+                break
+            if len(gram) > 1 and any(c == count and _contains(g, gram) for g, c, _ in phrases):
+                continue
+            phrases.append((gram, count, score))
+        return [{"phrase": " ".join(words[i] for i in gram), "score": round(score, 3)}
+                for gram, _, score in phrases]
 
     def compute_similarity(self, text1, text2):
         """Compute cosine similarity between two texts."""
-        tokens1 = Counter(self.tokenize(text1))
-        tokens2 = Counter(self.tokenize(text2))
+        tokens1 = self.document(text1).counts
+        tokens2 = self.document(text2).counts
 
         if not tokens1 or not tokens2:
             return 0.0
@@ -88,28 +214,78 @@ class NLPProcessor:
 
         return round(dot_product / (mag1 * mag2), 4)
 
+    def term_matrix(self, texts):
+        """
+        Tokenize each text once into a sparse, L2-normalized term-frequency
+        matrix with hashed columns, so row products are cosine similarities
+        (as compute_similarity, up to rare hash collisions).
+        """
+        vectorizer = HashingVectorizer(
+            analyzer=lambda text: self.document(text).tokens,
+            n_features=self.HASH_FEATURES, alternate_sign=False, norm="l2",
+        )
+        return vectorizer.transform(texts)
+
+    def similarity_matrix(self, texts):
+        """Full pairwise cosine similarity matrix (list of lists) of texts."""
+        if not texts:
+            return []
+        matrix = self.term_matrix(texts)
+        return np.round((matrix @ matrix.T).toarray(), 4).tolist()
+
+    def similar_pairs(self, texts, threshold=0.5, max_pairs=None):
+        """
+        Pairs of texts whose cosine similarity is at least threshold.
+
+        Rows are multiplied against the whole matrix a block at a time, so
+        memory stays bounded by BLOCK_CELLS however many texts there are.
+
+        Returns:
+            (pairs, truncated): pairs as {"i", "j", "similarity"} dicts with
+            i < j, in (i, j) order, and whether max_pairs cut the list short
+        """
+        if threshold <= 0:
+            raise ValueError("threshold must be positive")
+        if not texts:
+            return [], False
+        matrix = self.term_matrix(texts)
+        transposed = matrix.T.tocsr()
+        block = max(1, self.BLOCK_CELLS // max(len(texts), 1))
+
+        pairs = []
+        for start in range(0, len(texts), block):
+            product = (matrix[start:start + block] @ transposed).tocoo()
+            rows = product.row + start
+            keep = (product.col > rows) & (product.data >= threshold)
+            rows, cols, values = rows[keep], product.col[keep], product.data[keep]
+            order = np.lexsort((cols, rows))
+            for i, j, value in zip(rows[order].tolist(), cols[order].tolist(), values[order].tolist()):
+                pairs.append({"i": i, "j": j, "similarity": round(value, 4)})
+                if max_pairs is not None and len(pairs) >= max_pairs:
+                    return pairs, True
+        return pairs, False
+
     def summarize(self, text, max_sentences=3):
         """Extract key sentences as a summary."""
-        sentences = re.split(r"[.!?]+", text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
+        doc = self.document(text)
+        sentences = doc.sentence_documents
 
         if len(sentences) <= max_sentences:
-            return ". ".join(sentences) + "."
+            return ". ".join(s.text for s in sentences) + "."
 
         # Score sentences by keyword importance
-        all_tokens = self.tokenize(text)
-        word_freq = Counter(all_tokens)
+        word_freq = doc.counts
 
         scored = []
         for i, sent in enumerate(sentences):
-            tokens = self.tokenize(sent)
+            tokens = sent.tokens
             score = sum(word_freq.get(t, 0) for t in tokens) / max(len(tokens), 1)
             # Position bonus (first and last sentences)
             if i == 0:
                 score *= 1.5
             elif i == len(sentences) - 1:
                 score *= 1.2
-            scored.append((score, i, sent))
+            scored.append((score, i, sent.text))
 
         # Top sentences in original order
         scored.sort(reverse=True)
@@ -122,18 +298,19 @@ class NLPProcessor:
         Score the quality of a voting proposal for the governance system.
         
         Evaluates: clarity, specificity, feasibility, and completeness.
-        Returns score 0-100 and detailed breakdown.
+        Returns score 0-100 and detailed breakdown. key_phrases are the top
+        5 of extract_key_phrases: words, plus bigrams and trigrams that
+        repeat within sentences, scored by relative frequency.
         """
-        if not proposal_text or len(proposal_text.strip()) < 10:
+        doc = self.document(proposal_text)
+        if len(doc.text.strip()) < 10:
             return {
                 "overall_score": 0,
                 "breakdown": {},
                 "suggestions": ["Proposal text is too short. Please provide more details."],
             }
 
-        text = proposal_text.strip()
-        words = text.split()
-        tokens = self.tokenize(text)
+        words = doc.text.split()
 
         scores = {}
         suggestions = []
@@ -151,8 +328,7 @@ class NLPProcessor:
             suggestions.append("Consider adding more detail to your proposal (aim for 50+ words).")
 
         # 2. Clarity (0-25) - sentence structure
-        sentences = re.split(r"[.!?]+", text)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        sentences = doc.sentences
         avg_sentence_len = len(words) / max(len(sentences), 1)
 
         if 10 <= avg_sentence_len <= 25:
@@ -170,7 +346,7 @@ class NLPProcessor:
             "implement", "solution", "improve", "increase", "decrease", "reduce",
             "measure", "track", "percent", "number", "data", "result",
         ]
-        specificity_count = sum(1 for ind in specificity_indicators if ind in text.lower())
+        specificity_count = sum(1 for ind in specificity_indicators if ind in doc.lower)
         scores["specificity"] = min(25, specificity_count * 5 + 5)
         if specificity_count < 2:
             suggestions.append("Add specific details like timelines, budgets, or measurable goals.")
@@ -180,7 +356,7 @@ class NLPProcessor:
             "step", "plan", "phase", "approach", "method", "resource",
             "team", "responsibility", "schedule", "milestone",
         ]
-        feasibility_count = sum(1 for f in feasibility_indicators if f in text.lower())
+        feasibility_count = sum(1 for f in feasibility_indicators if f in doc.lower)
         scores["feasibility"] = min(25, feasibility_count * 5 + 5)
         if feasibility_count < 2:
             suggestions.append("Include implementation steps or a basic plan.")
@@ -191,7 +367,7 @@ class NLPProcessor:
             "overall_score": overall,
             "breakdown": scores,
             "suggestions": suggestions if suggestions else ["Proposal looks well-structured!"],
-            "key_phrases": self.extract_key_phrases(text, 5),
+            "key_phrases": self.extract_key_phrases(doc, 5),
             "word_count": word_count,
             "sentence_count": len(sentences),
         }
@@ -205,11 +381,12 @@ class NLPProcessor:
             "date": ["date", "year", "semester", "term", "session"],
         }
 
+        description = self.document(description).lower
         found = {}
         missing = []
 
         for element, keywords in required_elements.items():
-            if any(kw in description.lower() for kw in keywords):
+            if any(kw in description for kw in keywords):
                 found[element] = True
             else:
                 found[element] = False
@@ -227,6 +404,12 @@ class NLPProcessor:
         }
 
 
+def _contains(phrase, sub):
+    """Whether the id tuple sub occurs contiguously inside a longer phrase."""
+    n = len(sub)
+    return n < len(phrase) and any(phrase[i:i + n] == sub for i in range(len(phrase) - n + 1))
+
+
 if __name__ == "__main__":
     nlp = NLPProcessor()
 
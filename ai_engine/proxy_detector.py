@@ -0,0 +1,244 @@
+"""
+CampusTrust AI - Proxy Attendance Detector
+============================================
+Class-level detection of students who repeatedly check in together.
+
+A single student's check-ins cannot reveal proxy attendance when one
+person checks in for several friends; it shows up as different students
+checking in within seconds of each other, session after session.
+
+How it works:
+- All check-ins of the class are sorted once by (session, timestamp)
+- A sliding window sweep compares each check-in only with the ones that
+  follow it within `window` seconds in the same session, giving
+  O(n log n + co-check-ins) instead of comparing every pair of students;
+  each check-in is compared with at most MAX_NEIGHBOURS successors
+- Pairs that co-check-in in enough sessions form a co-occurrence graph;
+  union-find merges them into clusters
+
+Check-ins are attributed to a session when columnar input carries a
+session per check-in, or when a student's checkin_times and session_ids
+line up one-to-one; otherwise the hour of the check-in is used as the
+session.
+"""
+
+import numpy as np
+
+
+class UnionFind:
+    """Disjoint sets over integer ids with path halving and union by size."""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        self.size.setdefault(x, 1)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return a
+
+    def groups(self):
+        """Return {root: [members]} for every set."""
+        groups = {}
+        for x in self.parent:
+            groups.setdefault(self.find(x), []).append(x)
+        return groups
+
+
+class ProxyDetector:
+    """Find clusters of students who repeatedly check in together."""
+
+    WINDOW_SECONDS = 10  # Check-ins this close count as together
+    MIN_SESSIONS = 3  # Sessions a pair must share a co-check-in
+    MIN_RATIO = 0.5  # ...out of the sessions both attended
+    BLOCK_SIZE = 1 << 20  # Check-ins swept per block, bounding memory
+    MAX_NEIGHBOURS = 64  # Successors compared per check-in, bounding bursts
+    MAX_CLUSTER_PAIRS = 20  # Strongest pairs reported per cluster
+
+    def __init__(self, window=WINDOW_SECONDS, min_sessions=MIN_SESSIONS, min_ratio=MIN_RATIO):
+        self.window = window
+        self.min_sessions = min_sessions
+        self.min_ratio = min_ratio
+
+    def find_clusters(self, columns):
+        """
+        Args:
+            columns: CheckinColumns for the class
+
+        Returns:
+            list of clusters, largest first, each a dict with student
+            indexes ("members"), the pair count and the strongest pairs
+        """
+        if columns.timestamps.size < 2:
+            return []
+
+        session, n_sessions = self._session_ranks(columns)
+        pair_a, pair_b, together = self._co_checkin_pairs(columns, session, n_sessions)
+        if pair_a.size == 0:
+            return []
+
+        shared = self._shared_sessions(pair_a, pair_b, columns.checkin_owner(), session, n_sessions)
+        ratio = together / np.maximum(shared, 1)
+        suspicious = (shared > 0) & (ratio >= self.min_ratio)
+
+        uf = UnionFind()
+        edges = []
+        for a, b, count, r in zip(pair_a[suspicious].tolist(), pair_b[suspicious].tolist(),
+                                  together[suspicious].tolist(), ratio[suspicious].tolist()):
+            uf.union(a, b)
+            edges.append((a, b, count, r))
+
+        clusters = {}
+        for root, members in uf.groups().items():
+            clusters[root] = {"members": sorted(members), "pairs": []}
+        for a, b, count, ratio in edges:
+            clusters[uf.find(a)]["pairs"].append({
+                "students": [a, b],
+                "sessions_together": count,
+                "ratio": round(ratio, 2),
+            })
+
+        result = sorted(clusters.values(), key=lambda c: (-len(c["members"]), c["members"][0]))
+        for cluster in result:
+            cluster["size"] = len(cluster["members"])
+            cluster["pair_count"] = len(cluster["pairs"])
+            cluster["pairs"] = sorted(cluster["pairs"], key=lambda p: -p["sessions_together"])[:self.MAX_CLUSTER_PAIRS]
+        return result
+
+    def _co_checkin_pairs(self, columns, session, n_sessions):
+        """
+        Sweep the sorted check-ins and count, per student pair, the number
+        of distinct sessions in which they checked in within the window.
+
+        Returns:
+            (student_a, student_b, sessions_together) arrays with a < b,
+            keeping pairs seen in at least min_sessions sessions
+        """
+        n = len(columns)
+        empty = np.zeros(0, dtype=np.int64)
+
+        order = np.lexsort((columns.timestamps, session))
+        ts = columns.timestamps[order]
+        student = columns.checkin_owner()[order]
+        session = session[order]
+
+        # Sessions never span blocks, so per-block pair counts simply add up
+        block_pairs, block_counts = [], []
+        for start, stop in self._session_blocks(session):
+            events = self._sweep(ts[start:stop], session[start:stop], student[start:stop], n, n_sessions)
+            if events.size:
+                pairs, counts = np.unique(events // n_sessions, return_counts=True)
+                block_pairs.append(pairs)
+                block_counts.append(counts)
+
+        if not block_pairs:
+            return empty, empty, empty
+
+        pairs, inverse = np.unique(np.concatenate(block_pairs), return_inverse=True)
+        together = np.bincount(inverse.ravel(), weights=np.concatenate(block_counts)).astype(np.int64)
+
+        keep = together >= self.min_sessions
+        pairs, together = pairs[keep], together[keep]
+        return pairs // n, pairs % n, together
+
+    def _sweep(self, ts, session, student, n, n_sessions):
+        """
+        Distinct (pair, session) events of one block, encoded as
+        (a * n + b) * n_sessions + session with a < b.
+        """
+        # Compare every check-in with its k-th successor until no successor
+        # within the window remains; each k is one vectorized pass. Bulk
+        # bursts (hundreds of check-ins in one second) are capped at
+        # MAX_NEIGHBOURS successors so the sweep stays linear.
+        events = []
+        k = 1
+        while k < ts.size and k <= self.MAX_NEIGHBOURS:
+            close = (session[k:] == session[:-k]) & (ts[k:] - ts[:-k] <= self.window)
+            if not close.any():
+                break
+            a, b = student[:-k][close], student[k:][close]
+            distinct = a != b
+            a, b = a[distinct], b[distinct]
+            pair = np.minimum(a, b) * n + np.maximum(a, b)
+            events.append(pair * n_sessions + session[:-k][close][distinct])
+            k += 1
+
+        if not events:
+            return np.zeros(0, dtype=np.int64)
+        return _sorted_distinct(np.concatenate(events))
+
+    def _session_blocks(self, session):
+        """Split the sorted check-ins into [start, stop) blocks of whole sessions."""
+        size = session.size
+        starts = np.concatenate(([0], np.flatnonzero(session[1:] != session[:-1]) + 1))
+        bounds = [0]
+        while bounds[-1] < size:
+            target = bounds[-1] + self.BLOCK_SIZE
+            if target >= size:
+                bounds.append(size)
+                break
+            cut = int(starts[np.searchsorted(starts, target, side="right") - 1])
+            if cut <= bounds[-1]:
+                # A single session larger than a block stays whole
+                nxt = np.searchsorted(starts, bounds[-1], side="right")
+                cut = int(starts[nxt]) if nxt < starts.size else size
+            bounds.append(cut)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _shared_sessions(self, pair_a, pair_b, owner, session, n_sessions):
+        """Number of sessions both students of each pair attended."""
+        attended = _sorted_distinct(owner * n_sessions + session)  # (student, session) keys
+        student_offsets = np.searchsorted(attended, np.arange(owner.max() + 2) * n_sessions)
+        lengths = np.diff(student_offsets)[pair_a]
+
+        # Probe each session of student a for student b
+        pair_index = np.repeat(np.arange(pair_a.size), lengths)
+        within = np.arange(pair_index.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        sessions_a = attended[student_offsets[pair_a][pair_index] + within] % n_sessions
+        probes = pair_b[pair_index] * n_sessions + sessions_a
+        found = attended[np.minimum(np.searchsorted(attended, probes), attended.size - 1)] == probes
+        return np.bincount(pair_index[found], minlength=pair_a.size)
+
+    def _session_ranks(self, columns):
+        """Dense session index (0..n_sessions-1) of every check-in."""
+        _, session = np.unique(self._checkin_sessions(columns), return_inverse=True)
+        session = session.ravel().astype(np.int64)
+        return session, int(session.max()) + 1
+
+    def _checkin_sessions(self, columns):
+        """
+        Session key of every check-in: the student's session id when their
+        check-ins and session ids line up, else a negative hour bucket.
+        """
+        owner = columns.checkin_owner()
+        sessions = -(np.floor(columns.timestamps).astype(np.int64) // 3600) - 1
+        if columns.checkin_sessions is not None:
+            known = columns.checkin_sessions >= 0
+            sessions[known] = columns.checkin_sessions[known]
+            return sessions
+        if columns.session_ids.size == 0:
+            return sessions
+
+        aligned = (columns.checkin_counts == columns.session_counts)[owner]
+        position = columns.session_offsets[owner] + np.arange(owner.size) - columns.offsets[owner]
+        sessions[aligned] = columns.session_ids[position[aligned]]
+        return sessions
+
+
+def _sorted_distinct(values):
+    """Sorted distinct values (sort-based; faster than np.unique's hash path on large int arrays)."""
+    values = np.sort(values)
+    return values[np.concatenate(([True], values[1:] != values[:-1]))] if values.size else values
@@ -0,0 +1,155 @@
+"""
+CampusTrust AI - Result Cache
+===============================
+Content-addressed cache for AI analysis results.
+Keys are content hashes (see ai_automation.generate_hash), so identical
+texts share one entry no matter which endpoint or batch produced them.
+
+Features:
+- Bounded in-memory LRU tier
+- Per-entry TTL expiry
+- Hit/miss counters
+- Optional SQLite disk tier so entries survive a restart
+"""
+
+from collections import OrderedDict
+import copy
+import json
+import sqlite3
+import threading
+import time
+
+
+class ResultCache:
+    """Thread-safe LRU cache with TTL and an optional write-through disk tier."""
+
+    PRUNE_EVERY = 256  # Disk writes between size-limit prunes
+
+    def __init__(self, max_size=4096, ttl=3600, disk_path=None, max_disk_entries=100000,
+                 copy_values=True):
+        """
+        Args:
+            max_size: maximum number of entries held in memory
+            ttl: seconds an entry stays valid (None = never expires)
+            disk_path: SQLite file for the disk tier (None = memory only)
+            max_disk_entries: maximum number of entries kept on disk
+            copy_values: copy values on get/put; disable for large values
+                that callers treat as read-only
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.copy_values = copy_values
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes_since_prune = 0
+
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_stored_at ON entries (stored_at)")
+            self._db.commit()
+
+    def get(self, key):
+        """Return a copy of the cached value for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_fresh(entry[0], now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._copy(entry[1])
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, stored_at FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and self._is_fresh(row[1], now):
+                    value = json.loads(row[0])
+                    self._store_memory(key, value, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return self._copy(value)
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Store a copy of value under key in memory and, if enabled, on disk."""
+        now = time.time()
+        value = self._copy(value)
+        with self._lock:
+            self._store_memory(key, value, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), now),
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= self.PRUNE_EVERY:
+                    self._prune_disk(now)
+                self._db.commit()
+
+    def clear(self):
+        """Drop all entries from both tiers and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+            self.hits = self.misses = self.disk_hits = 0
+
+    def stats(self):
+        """Return cache size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "disk_enabled": self._db is not None,
+            }
+
+    def close(self):
+        """Close the disk tier connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _copy(self, value):
+        return copy.deepcopy(value) if self.copy_values else value
+
+    def _is_fresh(self, stored_at, now):
+        return self.ttl is None or now - stored_at < self.ttl
+
+    def _store_memory(self, key, value, stored_at):
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _prune_disk(self, now):
+        """Drop expired rows and keep only the newest max_disk_entries."""
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM entries WHERE stored_at < ?", (now - self.ttl,))
+        self._db.execute(
+            "DELETE FROM entries WHERE key NOT IN "
+            "(SELECT key FROM entries ORDER BY stored_at DESC LIMIT ?)",
+            (self.max_disk_entries,),
+        )
+        self._writes_since_prune = 0
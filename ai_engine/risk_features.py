@@ -0,0 +1,71 @@
+"""
+CampusTrust AI - Risk Features
+================================
+Raw per-student anomaly features, kept separately from scoring so risk
+weights and thresholds can be changed without re-posting or
+re-processing attendance data.
+
+AnomalyDetector.extract_features builds a ClassFeatures from raw
+check-ins once; AnomalyDetector.score_features then applies any set of
+weights and thresholds to it (or to several classes concatenated) as a
+handful of vectorized array operations.
+
+Features:
+- float32 per-student columns (counts, gaps, interval regularity, ...)
+- Per-check-in z-scores and per-interval gaps kept as flat arrays, so
+  count-above-threshold features can be recomputed for any threshold
+  (z-scores stay float64: the default threshold is often hit exactly)
+- Concatenation of many classes for campus-wide re-scoring
+"""
+
+import numpy as np
+
+
+class ClassFeatures:
+    """Feature arrays for one class (or several concatenated)."""
+
+    STUDENT_COLUMNS = (
+        "checkins", "sessions_attended", "total_sessions", "streak",
+        "off_hours", "avg_gap", "max_gap", "interval_cv",
+    )
+
+    def __init__(self, student_ids, students, z_owner, z_scores, interval_owner, intervals):
+        """
+        Args:
+            student_ids: list of student ids
+            students: (n, len(STUDENT_COLUMNS)) float32 matrix
+            z_owner, z_scores: student index and hour-of-day z-score of every
+                check-in evaluated by the time check (zeros omitted)
+            interval_owner, intervals: student index and gap in seconds of
+                every interval evaluated by the frequency check
+        """
+        self.student_ids = list(student_ids)
+        self.students = np.asarray(students, dtype=np.float32).reshape(-1, len(self.STUDENT_COLUMNS))
+        self.z_owner = np.asarray(z_owner, dtype=np.int64)
+        self.z_scores = np.asarray(z_scores, dtype=np.float64)
+        self.interval_owner = np.asarray(interval_owner, dtype=np.int64)
+        self.intervals = np.asarray(intervals, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def column(self, name):
+        return self.students[:, self.STUDENT_COLUMNS.index(name)]
+
+    @property
+    def nbytes(self):
+        return (self.students.nbytes + self.z_owner.nbytes + self.z_scores.nbytes
+                + self.interval_owner.nbytes + self.intervals.nbytes)
+
+    @classmethod
+    def concatenate(cls, parts):
+        """Stack several classes into one, offsetting student indexes."""
+        starts = np.cumsum([0] + [len(p) for p in parts])
+        return cls(
+            [sid for p in parts for sid in p.student_ids],
+            np.concatenate([p.students for p in parts]) if parts else np.zeros((0, len(cls.STUDENT_COLUMNS))),
+            np.concatenate([p.z_owner + s for p, s in zip(parts, starts)] or [[]]),
+            np.concatenate([p.z_scores for p in parts] or [[]]),
+            np.concatenate([p.interval_owner + s for p, s in zip(parts, starts)] or [[]]),
+            np.concatenate([p.intervals for p in parts] or [[]]),
+        )
@@ -0,0 +1,150 @@
+"""
+CampusTrust AI - Incremental Risk State
+=========================================
+Per-student running attendance statistics for online anomaly scoring.
+
+Instead of re-sending a student's full check-in history on every call,
+AnomalyDetector.record_checkin folds each new check-in into a small
+StudentRiskState in O(1) and scores the student from that state.
+
+Features:
+- Welford running mean/variance of check-in hour and check-in interval
+- Last check-in timestamp and session, session-gap statistics
+- Running anomaly counters (rapid check-ins, time outliers, off-hours)
+- SQLite snapshot store so state survives restarts and is shared by
+  every worker process (atomic read-modify-write per check-in)
+"""
+
+import json
+import math
+import sqlite3
+import threading
+import time
+
+from time_of_day import HOURS_PER_DAY, circular_delta
+
+
+class StudentRiskState:
+    """Running statistics for one student's attendance."""
+
+    def __init__(self):
+        self.checkins = 0
+        self.hour_mean = 0.0
+        self.hour_m2 = 0.0
+        self.last_timestamp = None
+
+        self.intervals = 0
+        self.interval_mean = 0.0
+        self.interval_m2 = 0.0
+
+        self.sessions_attended = 0
+        self.last_session = None
+        self.gap_count = 0
+        self.gap_sum = 0
+        self.max_gap = 0
+        self.total_sessions = 0
+        self.streak = 0
+
+        self.rapid_checkins = 0
+        self.time_outliers = 0
+        self.off_hours_checkins = 0
+
+    def add_hour(self, hour):
+        """
+        Welford update of the check-in hour statistics, with differences
+        taken around the 24h circle so check-ins near midnight stay close.
+        """
+        self.checkins += 1
+        delta = circular_delta(hour, self.hour_mean)
+        self.hour_mean = (self.hour_mean + delta / self.checkins) % HOURS_PER_DAY
+        self.hour_m2 += delta * circular_delta(hour, self.hour_mean)
+
+    def add_interval(self, interval):
+        """Welford update of the check-in interval statistics."""
+        self.intervals += 1
+        delta = interval - self.interval_mean
+        self.interval_mean += delta / self.intervals
+        self.interval_m2 += delta * (interval - self.interval_mean)
+
+    @property
+    def hour_std(self):
+        """Population standard deviation of check-in hour."""
+        return math.sqrt(self.hour_m2 / self.checkins) if self.checkins else 0.0
+
+    @property
+    def interval_std(self):
+        """Population standard deviation of check-in interval."""
+        return math.sqrt(self.interval_m2 / self.intervals) if self.intervals else 0.0
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        for key, value in data.items():
+            if hasattr(state, key):
+                setattr(state, key, value)
+        return state
+
+
+class RiskStateStore:
+    """SQLite snapshot store for StudentRiskState, keyed by student."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS risk_state ("
+            "key TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def load(self, key):
+        """Return the stored StudentRiskState for key, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT data FROM risk_state WHERE key = ?", (key,)).fetchone()
+        return StudentRiskState.from_dict(json.loads(row[0])) if row else None
+
+    def save(self, key, state):
+        """Write a snapshot of state under key."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO risk_state (key, data, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps(state.to_dict()), time.time()),
+            )
+            self._db.commit()
+
+    def update(self, key, apply):
+        """
+        Load, modify and save key's state in one write transaction.
+
+        apply(state) receives the stored state (a new one if none exists)
+        and its return value is passed back. The immediate transaction
+        serializes updates from every process sharing the database, so
+        concurrent workers never overwrite each other's check-ins.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT data FROM risk_state WHERE key = ?", (key,)).fetchone()
+                state = StudentRiskState.from_dict(json.loads(row[0])) if row else StudentRiskState()
+                result = apply(state)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO risk_state (key, data, updated_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(state.to_dict()), time.time()),
+                )
+            except BaseException:
+                self._db.rollback()
+                raise
+            self._db.commit()
+        return result
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM risk_state WHERE key = ?", (key,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -9,12 +9,29 @@ Features:
 - Emotion classification (positive/negative/neutral)
 - Key phrase extraction
 - Feedback category auto-detection
-- Batch analysis support
+- Batch analysis support (optionally parallel across a process pool)
+- Streaming analysis with a constant-memory, mergeable running aggregate
+- Optional content-addressed result cache shared by single and batch calls
+- Selectable engine: TextBlob, or a NumPy-vectorized lexicon scorer for
+  very large batches (see lexicon_sentiment.py)
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from textblob import TextBlob
+from ai_automation import generate_hash
+from keyword_matcher import KeywordMatcher, load_lexicons
+from lexicon_sentiment import LexiconSentimentEngine
+from streaming_stats import SpaceSavingCounter
+import copy
+import functools
+import math
+import os
 import re
-import json
+import time
+
+
+DEFAULT_ENGINE = "textblob"
 
 
 class SentimentAnalyzer:
@@ -39,122 +56,402 @@ class SentimentAnalyzer:
         "enthusiasm": ["excited", "enthusiastic", "passionate", "motivated", "inspired", "eager"],
     }
 
-    def analyze(self, text):
+    # Selectable output fields -> result keys they produce (in output order)
+    FIELD_KEYS = {
+        "score": ("sentiment_score", "classification"),
+        "confidence": ("confidence",),
+        "subjectivity": ("subjectivity",),
+        "emotions": ("emotions",),
+        "key_phrases": ("key_phrases",),
+        "category": ("category",),
+        "sentences": ("sentence_analysis",),
+        "word_count": ("word_count",),
+    }
+
+    # Sentiment engines: TextBlob PatternAnalyzer, or the vectorized lexicon scorer
+    ENGINES = ("textblob", "lexicon")
+    SENTENCE_PATTERN = re.compile(r"[^.!?]+[.!?]*")
+
+    # Parallel batch settings
+    PARALLEL_MIN_BATCH = 256  # Below this, pool dispatch costs more than it saves
+    MAX_CHUNK_SIZE = 64  # Texts sent to a worker per task
+    LEXICON_CHUNK_SIZE = 4096  # Lexicon engine is vectorized, so chunks can be larger
+    STREAM_CHUNK_SIZE = 16  # Texts analyzed per step in analyze_stream
+
+    # Exercises tagger, noun-phrase extractor, sentence tokenizer and lexicon
+    WARM_UP_TEXT = "The professor explained the lab material clearly. Great course, very helpful!"
+
+    def __init__(self, workers=None, cache=None, lexicon_path=None):
+        """
+        Args:
+            workers: process count for parallel batches (default: CPU count)
+            cache: optional ResultCache keyed by generate_hash(text)
+            lexicon_path: optional JSON file with "emotions" and/or
+                "categories" lexicons replacing the built-in ones
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache
+        self.lexicon_path = lexicon_path
+        self._pool = None
+        self._lexicon_engine = None
+
+        emotion_words = self.EMOTION_WORDS
+        category_keywords = self.CATEGORY_KEYWORDS
+        if lexicon_path:
+            lexicons = load_lexicons(lexicon_path)
+            emotion_words = lexicons.get("emotions", emotion_words)
+            category_keywords = lexicons.get("categories", category_keywords)
+
+        self._emotion_matcher = KeywordMatcher(emotion_words)
+        self._category_matcher = KeywordMatcher(category_keywords)
+
+    def analyze(self, text, fields=None, engine=DEFAULT_ENGINE):
         """
         Perform comprehensive sentiment analysis on feedback text.
         
         Args:
             text: Feedback text string
+            fields: optional list of output fields (see FIELD_KEYS);
+                only the work those fields need is performed
+            engine: "textblob" (default) or "lexicon" (vectorized scorer)
             
         Returns:
             dict with sentiment_score (0-100), classification, emotions,
             key_phrases, category, and confidence
         """
-        if not text or not text.strip():
-            return self._empty_result()
+        fields = self.normalize_fields(fields)
+        self.check_engine(engine)
+        if self.cache is None or not text:
+            return self._analyze_text(text, fields, engine)
 
-        blob = TextBlob(text)
+        key = self._cache_key(text, fields, engine)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._analyze_text(text, fields, engine)
+            self.cache.put(key, result)
+        return result
 
-        # Polarity: -1 to 1 → mapped to 0-100
-        polarity = blob.sentiment.polarity
-        sentiment_score = int((polarity + 1) * 50)
+    @classmethod
+    def normalize_fields(cls, fields):
+        """Validate a field selection; returns a frozenset, or None for all fields."""
+        if fields is None:
+            return None
+        if isinstance(fields, str):
+            fields = [fields]
+        unknown = [f for f in fields if f not in cls.FIELD_KEYS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(map(str, unknown))}. "
+                             f"Use: {', '.join(cls.FIELD_KEYS)}")
+        fields = frozenset(fields)
+        return None if fields == frozenset(cls.FIELD_KEYS) else fields
 
-        # Subjectivity: 0 (objective) to 1 (subjective)
-        subjectivity = blob.sentiment.subjectivity
+    def check_engine(self, engine):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine: {engine}. Use: {', '.join(self.ENGINES)}")
 
-        # Classification
-        if sentiment_score > 60:
-            classification = "positive"
-        elif sentiment_score < 40:
-            classification = "negative"
-        else:
-            classification = "neutral"
+    @property
+    def lexicon_engine(self):
+        """Vectorized lexicon scorer, built on first use."""
+        if self._lexicon_engine is None:
+            self._lexicon_engine = LexiconSentimentEngine()
+        return self._lexicon_engine
+
+    def _cache_key(self, text, fields, engine=DEFAULT_ENGINE):
+        key = generate_hash(text)
+        if fields is not None:
+            key += ":" + ",".join(sorted(fields))
+        if engine != DEFAULT_ENGINE:
+            key += "@" + engine
+        return key
 
-        # Confidence based on subjectivity and polarity strength
-        confidence = min(100, int(abs(polarity) * 100 + subjectivity * 20))
+    def _analyze_text(self, text, fields=None, engine=DEFAULT_ENGINE):
+        """Analyze one text, bypassing the cache."""
+        return self._analyze_texts([text], fields, engine)[0]
 
-        # Detect emotions
-        emotions = self._detect_emotions(text.lower())
+    def _analyze_texts(self, texts, fields=None, engine=DEFAULT_ENGINE):
+        """
+        Analyze texts in-process, bypassing the cache.
 
-        # Extract key phrases (noun phrases from TextBlob)
-        key_phrases = list(set(blob.noun_phrases))[:5]
+        The lexicon engine scores the whole list (documents and sentences)
+        in one vectorized pass; TextBlob scores each text on its own.
+        """
+        wanted = fields if fields is not None else frozenset(self.FIELD_KEYS)
+        needs_polarity = bool(wanted & {"score", "confidence", "subjectivity"})
 
-        # Auto-detect category
-        category = self._detect_category(text.lower())
+        doc_scores = sentence_scores = None
+        if engine == "lexicon":
+            if needs_polarity:
+                doc_scores = zip(*self.lexicon_engine.score(texts))
+            if "sentences" in wanted:
+                sentence_scores = self._score_sentences_lexicon(texts)
 
-        # Sentence-level breakdown
-        sentence_sentiments = []
-        for sentence in blob.sentences:
-            s_score = int((sentence.sentiment.polarity + 1) * 50)
-            sentence_sentiments.append({
-                "text": str(sentence),
-                "score": s_score,
-                "classification": "positive" if s_score > 60 else "negative" if s_score < 40 else "neutral",
-            })
+        results = []
+        for i, text in enumerate(texts):
+            doc_score = next(doc_scores) if doc_scores is not None else None
+            if not text or not text.strip():
+                results.append(self._project(self._empty_result(), fields))
+                continue
+
+            blob = TextBlob(text) if engine == "textblob" or "key_phrases" in wanted else None
+            if engine == "textblob":
+                if needs_polarity:
+                    doc_score = (blob.sentiment.polarity, blob.sentiment.subjectivity)
+                sentences = None
+                if "sentences" in wanted:
+                    sentences = [(str(s), s.sentiment.polarity) for s in blob.sentences]
+            else:
+                sentences = sentence_scores[i] if sentence_scores is not None else None
+
+            results.append(self._build_result(text, wanted, blob, doc_score, sentences))
+        return results
+
+    def _score_sentences_lexicon(self, texts):
+        """Split texts into sentences and score them all in one batch."""
+        per_text = [
+            [m.group().strip() for m in self.SENTENCE_PATTERN.finditer(text or "") if m.group().strip()]
+            for text in texts
+        ]
+        flat = [sent for sents in per_text for sent in sents]
+        polarity, _ = self.lexicon_engine.score(flat)
+
+        scored, pos = [], 0
+        for sents in per_text:
+            scored.append(list(zip(sents, polarity[pos:pos + len(sents)].tolist())))
+            pos += len(sents)
+        return scored
+
+    def _build_result(self, text, wanted, blob, doc_score, sentences):
+        """Assemble the requested output keys from engine scores."""
+        result = {}
 
+        if doc_score is not None:
+            # Polarity: -1 to 1 → mapped to 0-100
+            # Subjectivity: 0 (objective) to 1 (subjective)
+            polarity, subjectivity = doc_score
+            sentiment_score = int((polarity + 1) * 50)
+
+            if "score" in wanted:
+                result["sentiment_score"] = sentiment_score
+                result["classification"] = self._classify(sentiment_score)
+
+            if "confidence" in wanted:
+                # Confidence based on subjectivity and polarity strength
+                result["confidence"] = min(100, int(abs(polarity) * 100 + subjectivity * 20))
+
+            if "subjectivity" in wanted:
+                result["subjectivity"] = round(subjectivity, 3)
+
+        if "emotions" in wanted:
+            result["emotions"] = self._detect_emotions(text.lower())
+
+        if "key_phrases" in wanted:
+            # Extract key phrases (noun phrases from TextBlob)
+            result["key_phrases"] = list(set(blob.noun_phrases))[:5]
+
+        if "category" in wanted:
+            result["category"] = self._detect_category(text.lower())
+
+        if sentences is not None:
+            # Sentence-level breakdown
+            sentence_sentiments = []
+            for sentence_text, sentence_polarity in sentences:
+                s_score = int((sentence_polarity + 1) * 50)
+                sentence_sentiments.append({
+                    "text": sentence_text,
+                    "score": s_score,
+                    "classification": self._classify(s_score),
+                })
+            result["sentence_analysis"] = sentence_sentiments
+
+        if "word_count" in wanted:
+            result["word_count"] = len(text.split())
+
+        return result
+
+    def _classify(self, score):
+        if score > 60:
+            return "positive"
+        if score < 40:
+            return "negative"
+        return "neutral"
+
+    def _project(self, result, fields):
+        """Keep only the output keys belonging to the selected fields."""
+        if fields is None:
+            return result
         return {
-            "sentiment_score": sentiment_score,
-            "classification": classification,
-            "confidence": confidence,
-            "subjectivity": round(subjectivity, 3),
-            "emotions": emotions,
-            "key_phrases": key_phrases,
-            "category": category,
-            "sentence_analysis": sentence_sentiments,
-            "word_count": len(text.split()),
+            key: result[key]
+            for field in self.FIELD_KEYS if field in fields
+            for key in self.FIELD_KEYS[field]
         }
 
-    def analyze_batch(self, texts):
-        """Analyze multiple feedback texts and return aggregate statistics."""
-        results = [self.analyze(t) for t in texts]
+    def analyze_batch(self, texts, parallel=None, fields=None, engine=DEFAULT_ENGINE):
+        """
+        Analyze multiple feedback texts and return aggregate statistics.
+
+        Args:
+            texts: list of feedback text strings
+            parallel: True/False to force pool or in-process execution,
+                None to decide from batch size and worker count
+            fields: optional list of output fields, as in analyze()
+            engine: sentiment engine, as in analyze()
+
+        Returns:
+            dict with per-text results (in input order) and aggregate
+        """
+        fields = self.normalize_fields(fields)
+        self.check_engine(engine)
+        if self.cache is None:
+            results = self._analyze_many(texts, parallel, fields, engine)
+        else:
+            results = self._analyze_many_cached(texts, parallel, fields, engine)
 
         if not results:
             return {"results": [], "aggregate": {}}
 
-        scores = [r["sentiment_score"] for r in results]
-        categories = {}
-        emotions_agg = {}
+        return {"results": results, "aggregate": self._aggregate(results)}
 
-        for r in results:
-            cat = r["category"]
-            categories[cat] = categories.get(cat, 0) + 1
-            for emo in r["emotions"]:
-                emotions_agg[emo] = emotions_agg.get(emo, 0) + 1
-
-        aggregate = {
-            "total": len(results),
-            "average_score": round(sum(scores) / len(scores), 1),
-            "positive_count": sum(1 for s in scores if s > 60),
-            "negative_count": sum(1 for s in scores if s < 40),
-            "neutral_count": sum(1 for s in scores if 40 <= s <= 60),
-            "score_distribution": {
-                "very_positive": sum(1 for s in scores if s > 80),
-                "positive": sum(1 for s in scores if 60 < s <= 80),
-                "neutral": sum(1 for s in scores if 40 <= s <= 60),
-                "negative": sum(1 for s in scores if 20 <= s < 40),
-                "very_negative": sum(1 for s in scores if s < 20),
-            },
-            "top_categories": dict(sorted(categories.items(), key=lambda x: -x[1])[:5]),
-            "top_emotions": dict(sorted(emotions_agg.items(), key=lambda x: -x[1])[:5]),
-        }
+    def analyze_stream(self, texts, fields=None, engine=DEFAULT_ENGINE, tally=None, chunk_size=None):
+        """
+        Analyze an iterable of texts lazily, yielding results in input order.
+
+        Texts are consumed and analyzed chunk_size at a time, so memory stays
+        bounded however long the input is. Pass a SentimentTally to have it
+        updated with every result for a final aggregate.
+        """
+        fields = self.normalize_fields(fields)
+        self.check_engine(engine)
+        chunk_size = chunk_size or self.STREAM_CHUNK_SIZE
 
-        return {"results": results, "aggregate": aggregate}
+        chunk = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) >= chunk_size:
+                yield from self._analyze_stream_chunk(chunk, fields, engine, tally)
+                chunk = []
+        if chunk:
+            yield from self._analyze_stream_chunk(chunk, fields, engine, tally)
+
+    def _analyze_stream_chunk(self, chunk, fields, engine, tally):
+        if self.cache is None:
+            results = self._analyze_texts(chunk, fields, engine)
+        else:
+            results = self._analyze_many_cached(chunk, False, fields, engine)
+        for result in results:
+            if tally is not None:
+                tally.add(result)
+            yield result
+
+    def warm_up(self):
+        """
+        Load TextBlob/NLTK resources that are otherwise loaded lazily on the
+        first request, by running one full analysis through every engine.
+
+        Returns:
+            dict of engine -> warm-up time in milliseconds
+        """
+        timings = {}
+        for engine in self.ENGINES:
+            start = time.time()
+            self._analyze_text(self.WARM_UP_TEXT, None, engine)
+            timings[engine] = round((time.time() - start) * 1000, 1)
+        return timings
+
+    def cache_stats(self):
+        """Return result cache statistics, or None when caching is disabled."""
+        return self.cache.stats() if self.cache is not None else None
+
+    def close(self):
+        """Shut down the worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _get_pool(self):
+        """Return the persistent worker pool, starting it on first use."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.lexicon_path,),
+            )
+        return self._pool
+
+    def _analyze_many(self, texts, parallel, fields, engine):
+        """Analyze texts in order, in-process or across the worker pool."""
+        if parallel is None:
+            parallel = self.workers > 1 and len(texts) >= self.PARALLEL_MIN_BATCH
+
+        if parallel and texts:
+            return self._analyze_parallel(texts, fields, engine)
+        return self._analyze_texts(texts, fields, engine)
+
+    def _analyze_many_cached(self, texts, parallel, fields, engine):
+        """Serve cached texts directly and analyze each distinct miss once."""
+        results = [None] * len(texts)
+        pending = {}  # key -> (text, [positions])
+
+        for i, text in enumerate(texts):
+            if not text:
+                results[i] = self._analyze_text(text, fields, engine)
+                continue
+            key = self._cache_key(text, fields, engine)
+            if key in pending:
+                pending[key][1].append(i)
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending[key] = (text, [i])
+
+        if pending:
+            keys = list(pending)
+            computed = self._analyze_many([pending[k][0] for k in keys], parallel, fields, engine)
+            for key, result in zip(keys, computed):
+                self.cache.put(key, result)
+                positions = pending[key][1]
+                results[positions[0]] = result
+                for i in positions[1:]:
+                    results[i] = copy.deepcopy(result)
+
+        return results
+
+    def _analyze_parallel(self, texts, fields, engine):
+        """Analyze texts in chunks across the worker pool, preserving order."""
+        # ~4 chunks per worker keeps the pool busy when chunk costs vary
+        max_chunk = self.LEXICON_CHUNK_SIZE if engine == "lexicon" else self.MAX_CHUNK_SIZE
+        chunk_size = max(1, min(max_chunk, -(-len(texts) // (self.workers * 4))))
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+        results = []
+        task = functools.partial(_analyze_chunk, fields=fields, engine=engine)
+        try:
+            for chunk_results in self._get_pool().map(task, chunks):
+                results.extend(chunk_results)
+        except BrokenProcessPool:
+            # A worker died (or failed to start): drop the pool so the next
+            # batch starts a fresh one, and finish this batch in-process
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            return self._analyze_texts(texts, fields, engine)
+        return results
+
+    def _aggregate(self, results):
+        """Build aggregate statistics from a list of analysis results."""
+        tally = SentimentTally()
+        for r in results:
+            tally.add(r)
+        return tally.summary()
 
     def _detect_emotions(self, text):
         """Detect emotions present in the text."""
-        detected = []
-        for emotion, words in self.EMOTION_WORDS.items():
-            if any(w in text for w in words):
-                detected.append(emotion)
+        detected = list(self._emotion_matcher.match_counts(text))
         return detected if detected else ["neutral"]
 
     def _detect_category(self, text):
         """Auto-detect feedback category based on keywords."""
-        scores = {}
-        for category, keywords in self.CATEGORY_KEYWORDS.items():
-            score = sum(1 for kw in keywords if kw in text)
-            if score > 0:
-                scores[category] = score
+        scores = self._category_matcher.match_counts(text)
 
         if scores:
             return max(scores, key=scores.get)
@@ -174,6 +471,136 @@ class SentimentAnalyzer:
         }
 
 
+class SentimentTally:
+    """
+    Mergeable running aggregate over analysis results.
+
+    Scores are whole numbers from 0 to 100, so a 101-bin histogram gives
+    count, sum, min/max, distribution buckets and quantiles exactly, in
+    constant memory. Categories and emotions are tracked with Space-Saving
+    heavy-hitter counters. add() is O(1); merge() combines tallies built
+    on different workers, shards or time windows.
+    """
+
+    QUANTILES = (0.25, 0.5, 0.75, 0.9)
+    HEAVY_HITTER_CAPACITY = 64
+
+    def __init__(self):
+        self.total = 0
+        self.score_histogram = [0] * 101
+        self.categories = SpaceSavingCounter(self.HEAVY_HITTER_CAPACITY)
+        self.emotions = SpaceSavingCounter(self.HEAVY_HITTER_CAPACITY)
+
+    def add(self, result):
+        """Fold one analysis result into the tally."""
+        self.total += 1
+        if "sentiment_score" in result:
+            self.score_histogram[result["sentiment_score"]] += 1
+        if "category" in result:
+            self.categories.add(result["category"])
+        for emo in result.get("emotions", ()):
+            self.emotions.add(emo)
+
+    def merge(self, other):
+        """Fold another tally into this one; returns self."""
+        self.total += other.total
+        self.score_histogram = [a + b for a, b in zip(self.score_histogram, other.score_histogram)]
+        self.categories.merge(other.categories)
+        self.emotions.merge(other.emotions)
+        return self
+
+    def quantile(self, q):
+        """Return the q-quantile (0..1) of recorded scores, or None if empty."""
+        scored = sum(self.score_histogram)
+        if not scored:
+            return None
+        rank = max(1, math.ceil(round(q * scored, 6)))
+        seen = 0
+        for score, n in enumerate(self.score_histogram):
+            seen += n
+            if seen >= rank:
+                return score
+        return 100
+
+    def summary(self):
+        """Return the aggregate block used by batch and stream responses."""
+        if not self.total:
+            return {}
+
+        aggregate = {"total": self.total}
+        hist = self.score_histogram
+        scored = sum(hist)
+
+        if scored:
+            def count(lo, hi):
+                return sum(hist[lo:hi + 1])
+
+            present = [s for s, n in enumerate(hist) if n]
+            aggregate.update({
+                "average_score": round(sum(s * n for s, n in enumerate(hist)) / scored, 1),
+                "min_score": present[0],
+                "max_score": present[-1],
+                "positive_count": count(61, 100),
+                "negative_count": count(0, 39),
+                "neutral_count": count(40, 60),
+                "score_distribution": {
+                    "very_positive": count(81, 100),
+                    "positive": count(61, 80),
+                    "neutral": count(40, 60),
+                    "negative": count(20, 39),
+                    "very_negative": count(0, 19),
+                },
+                "score_quantiles": {
+                    f"p{int(q * 100)}": self.quantile(q) for q in self.QUANTILES
+                },
+            })
+
+        if len(self.categories):
+            aggregate["top_categories"] = self.categories.top(5)
+        if len(self.emotions):
+            aggregate["top_emotions"] = self.emotions.top(5)
+
+        return aggregate
+
+    def to_dict(self):
+        """Serialize to plain JSON-compatible data."""
+        return {
+            "total": self.total,
+            "score_histogram": list(self.score_histogram),
+            "categories": self.categories.to_dict(),
+            "emotions": self.emotions.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        tally = cls()
+        tally.total = data.get("total", 0)
+        tally.score_histogram = list(data.get("score_histogram", tally.score_histogram))
+        tally.categories = SpaceSavingCounter.from_dict(data.get("categories", {}))
+        tally.emotions = SpaceSavingCounter.from_dict(data.get("emotions", {}))
+        return tally
+
+
+# Per-process analyzer used by pool workers, created once by _init_worker
+_worker_analyzer = None
+
+
+def _init_worker(lexicon_path):
+    global _worker_analyzer
+    _worker_analyzer = SentimentAnalyzer(workers=1, lexicon_path=lexicon_path)
+    try:
+        _worker_analyzer.warm_up()
+    except Exception:
+        # Best effort: an initializer error breaks the whole pool, whereas a
+        # missing corpus only fails the requests that actually need it
+        pass
+
+
+def _analyze_chunk(texts, fields=None, engine=DEFAULT_ENGINE):
+    """Analyze one chunk of texts inside a pool worker."""
+    return _worker_analyzer._analyze_texts(texts, fields, engine)
+
+
 # Quick test
 if __name__ == "__main__":
     analyzer = SentimentAnalyzer()
@@ -0,0 +1,228 @@
+"""
+CampusTrust AI - Session Check-in Monitor
+===========================================
+Real-time monitoring of the check-in burst of an open attendance session.
+
+A session is opened when the instructor calls the attendance contract's
+start_session (session id + duration); check-in events are then fed to
+the monitor as they arrive and proxy-burst alerts are raised on the
+same call, instead of only when the history is later posted for batch
+analysis.
+
+Per-session state is fixed-size:
+- Arrival-rate curve: check-in counts in at most MAX_BINS time bins
+- Ring buffer of the most recent check-ins (RING_SIZE), for burst checks
+- Space-Saving counters of check-ins per device and per location
+- The set of students already checked in, capped at MAX_CHECKINS
+
+Alerts:
+- shared_device: one device checked in several distinct students
+- device_burst: BURST_SIZE check-ins from one device within the window
+"""
+
+from collections import deque
+import math
+import threading
+import time
+
+from streaming_stats import SpaceSavingCounter
+
+
+class SessionStream:
+    """Bounded in-memory state of one open session."""
+
+    WINDOW_SECONDS = 10  # Check-ins this close count as one burst
+    BURST_SIZE = 3  # Check-ins from one device within the window
+    SHARED_DEVICE_STUDENTS = 2  # Distinct students on one device
+    BIN_SECONDS = 10  # Arrival-rate resolution (coarser for long sessions)
+    MAX_BINS = 360
+    RING_SIZE = 256
+    MAX_CHECKINS = 5000
+    MAX_TRACKED_KEYS = 256  # Devices / locations counted per session
+    MAX_ALERTS = 50  # Recent alerts kept for the stats view
+
+    def __init__(self, session_id, course_id, start, duration):
+        self.session_id = session_id
+        self.course_id = course_id
+        self.start = start
+        self.end = start + duration
+        self.bin_seconds = max(self.BIN_SECONDS, math.ceil(duration / self.MAX_BINS))
+        self.arrivals = [0] * (int(duration // self.bin_seconds) + 1)
+        self.recent = deque(maxlen=self.RING_SIZE)  # (timestamp, student_id, device_id)
+        self.devices = SpaceSavingCounter(self.MAX_TRACKED_KEYS)
+        self.locations = SpaceSavingCounter(self.MAX_TRACKED_KEYS)
+        self.students = set()
+        self.alerts = deque(maxlen=self.MAX_ALERTS)
+        self.alert_count = 0
+        self.alerted = set()  # (alert type, device) already raised
+        self.closed = False
+
+    def checkin(self, student_id, timestamp, device_id=None, location=None):
+        """
+        Fold one check-in into the session state.
+
+        Returns:
+            list of new alert dicts (usually empty)
+        """
+        if self.closed:
+            raise ValueError(f"Session {self.session_id} is closed")
+        if not self.start <= timestamp <= self.end:
+            raise ValueError(f"Check-in outside the window of session {self.session_id}")
+        if student_id in self.students:
+            raise ValueError(f"Student {student_id} already checked in to session {self.session_id}")
+        if len(self.students) >= self.MAX_CHECKINS:
+            raise ValueError(f"Session {self.session_id} reached {self.MAX_CHECKINS} check-ins")
+
+        self.students.add(student_id)
+        self.arrivals[int((timestamp - self.start) // self.bin_seconds)] += 1
+        if location is not None:
+            self.locations.add(str(location))
+        if device_id is None:
+            self.recent.append((timestamp, student_id, None))
+            return []
+
+        device_id = str(device_id)
+        self.devices.add(device_id)
+        self.recent.append((timestamp, student_id, device_id))
+
+        alerts = []
+        # Space-Saving counts are upper bounds; count - error is guaranteed
+        on_device = self.devices.counts[device_id] - self.devices.errors[device_id]
+        if on_device >= self.SHARED_DEVICE_STUDENTS:
+            alerts.append(self._alert("shared_device", "medium", device_id, timestamp, {
+                "students_on_device": on_device,
+            }))
+
+        burst = [sid for ts, sid, dev in self.recent
+                 if dev == device_id and timestamp - self.WINDOW_SECONDS <= ts <= timestamp]
+        if len(burst) >= self.BURST_SIZE:
+            alerts.append(self._alert("device_burst", "high", device_id, timestamp, {
+                "students": burst,
+                "window_seconds": self.WINDOW_SECONDS,
+            }))
+        return [a for a in alerts if a is not None]
+
+    def _alert(self, kind, severity, device_id, timestamp, details):
+        """Record and return an alert the first time (type, device) fires; None on repeats."""
+        if (kind, device_id) in self.alerted:
+            return None
+        self.alerted.add((kind, device_id))
+        alert = {
+            "type": kind,
+            "severity": severity,
+            "session_id": self.session_id,
+            "course_id": self.course_id,
+            "device_id": device_id,
+            "timestamp": timestamp,
+            "raised_at": time.time(),
+            **details,
+        }
+        self.alerts.append(alert)
+        self.alert_count += 1
+        return alert
+
+    def stats(self):
+        """Arrival-rate curve, top devices/locations and recent alerts."""
+        last_bin = max((i for i, c in enumerate(self.arrivals) if c), default=-1)
+        return {
+            "session_id": self.session_id,
+            "course_id": self.course_id,
+            "start": self.start,
+            "end": self.end,
+            "closed": self.closed,
+            "checkins": len(self.students),
+            "arrival_rate": {
+                "bin_seconds": self.bin_seconds,
+                "counts": self.arrivals[:last_bin + 1],
+                "peak_per_minute": round(max(self.arrivals) * 60 / self.bin_seconds, 1),
+            },
+            "top_devices": self.devices.top(10),
+            "top_locations": self.locations.top(10),
+            "alert_count": self.alert_count,
+            "recent_alerts": list(self.alerts),
+        }
+
+
+class SessionMonitor:
+    """Track open sessions and raise proxy-burst alerts as check-ins arrive."""
+
+    MAX_SESSIONS = 256  # Open (or recently ended) sessions kept in memory
+    RETAIN_SECONDS = 3600  # Ended sessions stay queryable this long
+
+    def __init__(self, on_alert=None, max_sessions=MAX_SESSIONS):
+        """
+        Args:
+            on_alert: optional callback(alert) invoked for every new alert,
+                outside the monitor's lock (e.g. a socketio emit)
+            max_sessions: cap on sessions held in memory
+        """
+        self.on_alert = on_alert
+        self.max_sessions = max_sessions
+        self._sessions = {}  # (course_id, session_id) -> SessionStream
+        self._lock = threading.Lock()
+
+    def start_session(self, session_id, duration_seconds, course_id=None, start=None):
+        """Open a session, as attendance_contract start_session does on-chain."""
+        try:
+            duration = int(duration_seconds)
+        except (TypeError, ValueError):
+            raise ValueError("duration_seconds must be an integer")
+        if duration <= 0:
+            raise ValueError("duration_seconds must be positive")
+        start = time.time() if start is None else float(start)
+        key = self._key(course_id, session_id)
+
+        with self._lock:
+            self._expire(time.time())
+            if key not in self._sessions and len(self._sessions) >= self.max_sessions:
+                raise ValueError(f"Too many active sessions (max {self.max_sessions})")
+            stream = SessionStream(session_id, course_id, start, duration)
+            self._sessions[key] = stream
+            return stream.stats()
+
+    def checkin(self, session_id, student_id, timestamp=None, device_id=None, location=None,
+                course_id=None):
+        """
+        Ingest one check-in event.
+
+        Returns:
+            dict with the session's check-in count and any new alerts
+        """
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        with self._lock:
+            stream = self._get(course_id, session_id)
+            alerts = stream.checkin(str(student_id), timestamp, device_id, location)
+            checkins = len(stream.students)
+
+        if self.on_alert is not None:
+            for alert in alerts:
+                self.on_alert(alert)
+        return {"session_id": session_id, "checkins": checkins, "alerts": alerts}
+
+    def end_session(self, session_id, course_id=None):
+        """Stop accepting check-ins; the final stats stay available for a while."""
+        with self._lock:
+            stream = self._get(course_id, session_id)
+            stream.closed = True
+            return stream.stats()
+
+    def session_stats(self, session_id, course_id=None):
+        """Current stats of a session, or None if it is unknown or expired."""
+        with self._lock:
+            stream = self._sessions.get(self._key(course_id, session_id))
+            return stream.stats() if stream is not None else None
+
+    def _get(self, course_id, session_id):
+        stream = self._sessions.get(self._key(course_id, session_id))
+        if stream is None:
+            raise ValueError(f"Unknown session: {session_id}")
+        return stream
+
+    def _expire(self, now):
+        """Drop sessions that ended more than RETAIN_SECONDS ago."""
+        expired = [k for k, s in self._sessions.items() if s.end + self.RETAIN_SECONDS < now]
+        for key in expired:
+            del self._sessions[key]
+
+    def _key(self, course_id, session_id):
+        return (str(course_id) if course_id is not None else None, str(session_id))
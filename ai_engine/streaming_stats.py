@@ -0,0 +1,143 @@
+"""
+CampusTrust AI - Streaming Statistics
+=======================================
+Small fixed-memory summaries that update in O(1) per item (amortized
+O(log capacity) when a full counter evicts) and merge across workers,
+shards or time windows.
+
+Features:
+- Space-Saving heavy-hitter counter (approximate top-k in fixed memory)
+- Serializable to plain dicts for persistence
+"""
+
+import heapq
+
+
+class SpaceSavingCounter:
+    """
+    Space-Saving heavy-hitter sketch (Metwally et al.).
+
+    Tracks at most `capacity` keys. While the number of distinct keys
+    stays within capacity, counts are exact; beyond that, a new key
+    replaces the current minimum and inherits its count, so counts may
+    be overestimated by at most the recorded error.
+
+    The minimum is found through a heap holding one entry per tracked
+    key. Increments only touch the dicts; an entry whose count is stale
+    is refreshed when it reaches the top, so adds are O(1) and evictions
+    amortized O(log capacity).
+    """
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.counts = {}  # key -> estimated count (insertion order kept)
+        self.errors = {}  # key -> maximum overestimation of its count
+        self._heap = None  # [count, seq, key] per tracked key; None until first eviction
+        self._seq = 0
+
+    def add(self, key, count=1):
+        """Count `count` occurrences of key."""
+        if key in self.counts:
+            self.counts[key] += count
+            return
+
+        if len(self.counts) < self.capacity:
+            self.counts[key] = count
+            self.errors[key] = 0
+            self._push(key)
+            return
+
+        victim, floor = self._pop_min()
+        del self.counts[victim]
+        del self.errors[victim]
+        self.counts[key] = floor + count
+        self.errors[key] = floor
+        self._push(key)
+
+    def merge(self, other):
+        """
+        Fold another counter into this one; returns self.
+
+        Mergeable Space-Saving: a key missing from a full summary may have
+        occurred up to that summary's minimum count times, so the minimum
+        is added to the key's count and error before truncating back to
+        capacity. The count >= true count >= count - error bound holds
+        for the merged counter.
+        """
+        return self._fold(other.counts, other.errors, other._floor())
+
+    def update(self, counts):
+        """Fold exact {key: count} tallies (e.g. a Counter of one batch) in; returns self."""
+        return self._fold(counts, {}, 0)
+
+    def _fold(self, counts, errors, other_floor):
+        floor = self._floor()
+        for key in self.counts:
+            if key not in counts:
+                self.counts[key] += other_floor
+                self.errors[key] += other_floor
+        for key, count in counts.items():
+            if key in self.counts:
+                self.counts[key] += count
+                self.errors[key] += errors.get(key, 0)
+            else:
+                self.counts[key] = floor + count
+                self.errors[key] = floor + errors.get(key, 0)
+
+        if len(self.counts) > self.capacity:
+            keep = sorted(self.counts, key=lambda k: -self.counts[k])[:self.capacity]
+            keep = set(keep)
+            self.counts = {k: v for k, v in self.counts.items() if k in keep}
+            self.errors = {k: v for k, v in self.errors.items() if k in keep}
+        self._heap = None
+        return self
+
+    def _floor(self):
+        """Largest count an untracked key can have had: the minimum when full, else 0."""
+        if not self.counts or len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def _push(self, key):
+        if self._heap is not None:
+            heapq.heappush(self._heap, [self.counts[key], self._seq, key])
+            self._seq += 1
+
+    def _pop_min(self):
+        """Remove the heap entry of the minimum key; returns (key, count)."""
+        if self._heap is None:
+            self._heap = [[count, i, key] for i, (key, count) in enumerate(self.counts.items())]
+            self._seq = len(self._heap)
+            heapq.heapify(self._heap)
+        while True:
+            entry = self._heap[0]
+            count = self.counts[entry[2]]
+            if entry[0] == count:
+                heapq.heappop(self._heap)
+                return entry[2], count
+            # Count grew since the entry was pushed: refresh it and look again
+            entry[0] = count
+            entry[1] = self._seq
+            self._seq += 1
+            heapq.heapreplace(self._heap, entry)
+
+    def top(self, n):
+        """Return the n heaviest keys as {key: count}, largest first."""
+        return dict(sorted(self.counts.items(), key=lambda x: -x[1])[:n])
+
+    def __len__(self):
+        return len(self.counts)
+
+    def to_dict(self):
+        return {
+            "capacity": self.capacity,
+            "counts": [[k, v, self.errors[k]] for k, v in self.counts.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        counter = cls(data.get("capacity", 64))
+        for key, count, error in data.get("counts", []):
+            counter.counts[key] = count
+            counter.errors[key] = error
+        return counter
@@ -0,0 +1,60 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("AI_ENGINE_DATA_DIR", str(tmp_path_factory.mktemp("data")))
+        for name in ("ANOMALY_STATE_PATH", "ANOMALY_MODEL_DIR", "ANOMALY_JOB_DIR", "CHAIN_TIMELINE_DIR",
+                     "NLP_CORPUS_PATH", "NEAR_DUPLICATE_PATH", "SENTIMENT_CACHE_PATH"):
+            mp.delenv(name, raising=False)
+        module = importlib.import_module("app")
+        yield module
+        module.campus_jobs.close()
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+def test_checkin_is_scored(client):
+    response = client.post("/api/ai/anomaly/checkin", json={
+        "student_id": "s1", "course_id": "CS101", "timestamp": "1700000000",
+        "session_id": 3, "total_sessions": 5.0, "utc_offset_minutes": 0,
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["student_id"] == "s1"
+    assert body["stats"]["sessions_attended"] == 1
+
+
+@pytest.mark.parametrize("fields, message", [
+    ({"timestamp": "yesterday"}, "timestamp must be a number"),
+    ({"timestamp": None}, "timestamp must be a number"),
+    ({"timestamp": "nan"}, "timestamp must be a finite number"),
+    ({"session_id": "abc"}, "session_id must be a number"),
+    ({"session_id": 2.5}, "session_id must be an integer"),
+    ({"total_sessions": [5]}, "total_sessions must be a number"),
+    ({"streak": {}}, "streak must be a number"),
+])
+def test_checkin_rejects_bad_fields(client, fields, message):
+    data = {"student_id": "s2", "timestamp": 1700000000, **fields}
+    response = client.post("/api/ai/anomaly/checkin", json=data)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == message
+
+
+def test_course_sentiment_stats_evict_least_recently_used(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, "MAX_COURSE_SENTIMENT_STATS", 2)
+    monkeypatch.setattr(app_module, "course_sentiment_stats", app_module.OrderedDict())
+
+    for course_id in ("A", "B"):
+        app_module._merge_course_stats(course_id, app_module.SentimentTally())
+    assert client.get("/api/ai/sentiment/stats/A").status_code == 200  # A is now most recent
+    app_module._merge_course_stats("C", app_module.SentimentTally())
+
+    assert list(app_module.course_sentiment_stats) == ["A", "C"]
+    assert client.get("/api/ai/sentiment/stats/B").status_code == 404
@@ -0,0 +1,99 @@
+import json
+import os
+import time
+
+import pytest
+
+import campus_job
+from campus_job import CampusAnomalyJobs
+
+
+T0 = 1_700_000_000
+
+
+def _students(n):
+    return [
+        {
+            "student_id": f"s{i}",
+            "checkin_times": [T0 + 86400 * k + 60 * i for k in range(6)],
+            "session_ids": list(range(6)),
+            "total_sessions": 8,
+        }
+        for i in range(n)
+    ]
+
+
+def _crashing_analyze_course(course_id, students, output_path, utc_offset_minutes=None):
+    # "crash-once" kills its worker the first time only; "crash" always does
+    marker = f"{output_path}.crashed"
+    if course_id == "crash" or (course_id == "crash-once" and not os.path.exists(marker)):
+        open(marker, "w").close()
+        os._exit(1)
+    return campus_job.CRASH_TEST_ORIGINAL(course_id, students, output_path, utc_offset_minutes)
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(campus_job, "CRASH_TEST_ORIGINAL", campus_job._analyze_course, raising=False)
+    monkeypatch.setattr(campus_job, "_analyze_course", _crashing_analyze_course)
+    jobs = CampusAnomalyJobs(str(tmp_path), workers=2)
+    yield jobs
+    jobs.close()
+
+
+def _wait(jobs, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = jobs.status(job_id)
+        if status["status"] != "running":
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still running")
+
+
+def test_job_writes_course_results_and_summary(jobs):
+    job_id = jobs.submit({"CS/101": _students(3), "CS_101": _students(5)})
+    status = _wait(jobs, job_id)
+
+    assert status["status"] == "done"
+    assert status["completed"] == 2 and status["failed"] == 0
+    assert status["summary"]["total_students"] == 8
+    for course_id, n in (("CS/101", 3), ("CS_101", 5)):
+        with open(jobs.course_result_path(job_id, course_id), encoding="utf-8") as f:
+            assert len(json.load(f)["results"]) == n
+
+
+def test_dead_worker_is_replaced_and_lost_courses_retried(jobs):
+    job_id = jobs.submit({"crash-once": _students(2), "CS101": _students(3), "MA201": _students(4)})
+    status = _wait(jobs, job_id)
+
+    assert status["status"] == "done"
+    assert status["completed"] == 3 and status["failed"] == 0
+    assert status["summary"]["total_students"] == 9
+
+
+def test_course_that_always_kills_its_worker_fails_alone(jobs):
+    status = _wait(jobs, jobs.submit({"crash": _students(2)}))
+    assert status["status"] == "done"
+    assert status["failed"] == 1
+    assert status["courses"]["crash"]["status"] == "failed"
+
+    # the broken pool was dropped, so the next job runs on a fresh one
+    status = _wait(jobs, jobs.submit({"CS101": _students(3)}))
+    assert status["completed"] == 1 and status["failed"] == 0
+
+
+def test_finished_jobs_are_evicted_but_readable_from_disk(jobs):
+    jobs.MAX_FINISHED_JOBS = 1
+    first = jobs.submit({"CS101": _students(1)})
+    _wait(jobs, first)
+    second = jobs.submit({"CS101": _students(1)})
+    _wait(jobs, second)
+
+    assert first not in jobs._jobs
+    assert jobs.status(first)["status"] == "done"
+
+
+def test_empty_submission_is_rejected(jobs):
+    with pytest.raises(ValueError):
+        jobs.submit({})
@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+import pytest
+
+from chain_timeline import CheckinIngestor, LocalIndexer, TimelineStore, parse_checkins
+
+
+def _simulate(indexer, students, sessions, rng):
+    """Irregular attendance, so streaks restart at 1 (an unchanged, omitted value)."""
+    expected = {}
+    for _ in range(sessions):
+        indexer.start_session("ADMIN", 3600)
+        for sender in students:
+            if rng.random() < 0.6:
+                indexer.advance(rng.randint(1, 20))
+                if indexer.checkin(sender):
+                    expected.setdefault(sender, []).append(indexer.timestamp)
+        indexer.advance(86400)
+    return expected
+
+
+def _check(columns, indexer, expected):
+    assert columns.student_ids == sorted(expected)
+    for i, sender in enumerate(columns.student_ids):
+        times = columns.timestamps[columns.offsets[i]:columns.offsets[i + 1]]
+        assert sorted(times.tolist()) == expected[sender], sender
+        assert columns.streaks[i] == indexer.students[sender]["streak"], sender
+    assert np.all(columns.total_sessions == indexer.session_id)
+
+
+@pytest.fixture
+def history():
+    indexer = LocalIndexer(app_id=42, created_round=100)
+    expected = _simulate(indexer, [f"ADDR{i:03d}" for i in range(60)], 30, random.Random(1))
+    return indexer, expected
+
+
+def test_local_indexer_omits_unchanged_streak():
+    indexer = LocalIndexer()
+    indexer.start_session("ADMIN", 3600)
+    indexer.checkin("A")  # streak 0 -> 1
+    indexer.advance(86400)
+    indexer.start_session("ADMIN", 3600)
+    indexer.advance(86400)
+    indexer.start_session("ADMIN", 3600)
+    indexer.checkin("A")  # missed a session: streak restarts at 1, unchanged
+
+    deltas = [t["local-state-delta"][0]["delta"] for t in indexer.transactions if "local-state-delta" in t]
+    assert [len(delta) for delta in deltas] == [2, 1]
+
+
+def test_resumed_ingest_rebuilds_timelines_and_streaks(tmp_path, history):
+    indexer, expected = history
+    store = TimelineStore(str(tmp_path / "42"))
+
+    # Interrupted run, then a resumed one with a fresh ingestor and store
+    first = CheckinIngestor(indexer, 42, store, workers=4, page_limit=50).run(max_pages=2)
+    assert not first["complete"]
+    resumed = CheckinIngestor(indexer, 42, TimelineStore(store.path), workers=4, page_limit=50).run()
+    assert resumed["complete"]
+    assert resumed["checkins"] == sum(map(len, expected.values()))
+
+    _check(store.columns(), indexer, expected)
+
+
+def test_incremental_ingest_and_compaction_keep_data(tmp_path, history):
+    indexer, expected = history
+    store = TimelineStore(str(tmp_path / "42"))
+    CheckinIngestor(indexer, 42, store, workers=4, page_limit=50).run()
+
+    indexer.start_session("ADMIN", 3600)
+    indexer.advance(5)
+    for sender in ("ADDR000", "NEW"):
+        if indexer.checkin(sender):
+            expected.setdefault(sender, []).append(indexer.timestamp)
+    CheckinIngestor(indexer, 42, store, workers=4, page_limit=50).run()
+    store.compact()
+
+    _check(store.columns(), indexer, expected)
+    _check(TimelineStore(store.path).columns(), indexer, expected)
+
+
+def test_parse_checkins_marks_omitted_streaks():
+    indexer = LocalIndexer()
+    indexer.start_session("ADMIN", 3600)
+    indexer.checkin("A")
+    indexer.advance(86400)
+    indexer.start_session("ADMIN", 3600)
+    indexer.advance(86400)
+    indexer.start_session("ADMIN", 3600)
+    indexer.checkin("A")
+
+    rows, sessions_started = parse_checkins(indexer.transactions)
+    assert sessions_started == 3
+    assert rows["sender"].tolist() == ["A", "A"]
+    assert rows["session_id"].tolist() == [1, 3]
+    assert rows["streak"].tolist() == [1, -1]
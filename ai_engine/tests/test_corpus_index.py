@@ -0,0 +1,100 @@
+import math
+import re
+from collections import Counter
+
+from corpus_index import CorpusIndex
+
+
+DOCS = {
+    "p1": ("proposal", "extend library hours during exam weeks"),
+    "p2": ("proposal", "build a new library reading hall with more seats"),
+    "f1": ("feedback", "library wifi is slow during exam weeks"),
+    "f2": ("feedback", "canteen food is expensive and the queues are long"),
+    "f3": ("feedback", ""),
+}
+
+
+def tokenize(text):
+    return re.findall(r"[a-z]+", text.lower())
+
+
+def reference_similarity(query, text, texts):
+    """Cosine of (1 + log tf) * idf vectors, computed from scratch."""
+    n = len(texts)
+    df = Counter(term for t in texts for term in set(tokenize(t)))
+
+    def vector(t):
+        return {term: (1 + math.log(tf)) * (math.log((1 + n) / (1 + df[term])) + 1)
+                for term, tf in Counter(tokenize(t)).items()}
+
+    q, d = vector(query), vector(text)
+    dot = sum(w * d.get(term, 0.0) for term, w in q.items())
+    norm = math.sqrt(sum(w * w for w in q.values())) * math.sqrt(sum(w * w for w in d.values()))
+    return dot / norm if norm else 0.0
+
+
+def _build(path=None):
+    index = CorpusIndex(tokenize, path=path)
+    index.add_many([{"id": doc_id, "kind": kind, "text": text} for doc_id, (kind, text) in DOCS.items()])
+    return index
+
+
+def test_scores_match_brute_force_tf_idf():
+    index = _build()
+    query = "library exam weeks"
+    results = index.top_k_similar(query, k=10)
+
+    texts = [text for _, text in DOCS.values()]
+    expected = sorted(
+        ((doc_id, reference_similarity(query, text, texts)) for doc_id, (_, text) in DOCS.items()),
+        key=lambda item: -item[1],
+    )
+    expected = [(doc_id, round(score, 4)) for doc_id, score in expected if score > 0]
+    assert [(r["id"], r["similarity"]) for r in results] == expected
+
+
+def test_kind_filter_exclude_and_k():
+    index = _build()
+    assert [r["id"] for r in index.top_k_similar("library exam weeks", kind="feedback")] == ["f1"]
+    assert "p1" not in [r["id"] for r in index.top_k_similar("library exam weeks", exclude="p1")]
+    assert len(index.top_k_similar("library", k=1)) == 1
+    assert index.top_k_similar("library", k=0) == []
+    assert index.top_k_similar("") == []
+
+
+def test_replace_and_remove_update_document_frequencies():
+    index = _build()
+    index.add("p1", "sports ground lighting", kind="proposal")
+    assert "p1" not in [r["id"] for r in index.top_k_similar("library exam weeks")]
+    assert index.top_k_similar("sports lighting")[0]["id"] == "p1"
+
+    assert index.remove("f2") is True
+    assert index.remove("f2") is False
+    assert index.top_k_similar("canteen queues") == []
+    assert len(index) == 4
+
+
+def test_reload_restores_identical_results(tmp_path):
+    path = str(tmp_path / "corpus.db")
+    index = _build(path)
+    index.add("p2", "student parking near the library", kind="proposal")
+    index.remove("f2")
+    before = index.top_k_similar("library parking exam", k=10)
+    stats = index.stats()
+    index.close()
+
+    reloaded = CorpusIndex(tokenize, path=path)
+    assert len(reloaded) == 4
+    assert reloaded.stats() == stats
+    assert reloaded.top_k_similar("library parking exam", k=10) == before
+    assert reloaded.top_k_similar("library", kind="proposal")[0]["kind"] == "proposal"
+    reloaded.close()
+
+
+def test_slots_of_removed_documents_are_reused():
+    index = _build()
+    index.remove("p2")
+    index.add("p4", "more seats in the reading hall")
+    assert len(index._docs) == len(DOCS)
+    top = index.top_k_similar("reading hall seats")[0]
+    assert (top["id"], top["kind"]) == ("p4", None)
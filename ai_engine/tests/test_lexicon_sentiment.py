@@ -0,0 +1,85 @@
+import pytest
+
+textblob = pytest.importorskip("textblob")
+from textblob import TextBlob
+
+from lexicon_sentiment import LexiconSentimentEngine, parity_report
+
+
+CORPUS = [
+    "The blockchain course was absolutely amazing! Professor explained concepts clearly.",
+    "The lab equipment is outdated and wifi keeps disconnecting. Very frustrated.",
+    "Decent course content but needs more practical exercises.",
+    "I love the campus events and the coding clubs are very motivating!",
+    "Administration is slow and unresponsive. Registration was a nightmare.",
+    "The exam was not good at all.",
+    "Not a bad semester overall, the teachers were helpful.",
+    "Library hours are too short and the staff is rude.",
+    "Great food in the canteen!!",
+    "The syllabus is very very long and extremely boring.",
+    "Hostel rooms are clean and comfortable.",
+    "Nothing special about this subject.",
+    "The new grading policy is unfair and confusing.",
+    "I am happy with the sports facilities.",
+    "Lectures start on time.",
+    "Worst registration process ever, never again.",
+    "",
+]
+
+CONTRACTIONS = [
+    "This isn't good.",
+    "It isn't great",
+    "The lab wasn't a good place to study.",
+    "The mentors aren't very helpful.",
+    "I can't say it's great, but it's not bad!",
+    "We don't like the new timetable and we won't accept it.",
+    "It's a nice campus and they're friendly.",
+    "ISN'T this AMAZING?",
+]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return LexiconSentimentEngine()
+
+
+@pytest.mark.parametrize("text", CORPUS + CONTRACTIONS)
+def test_scores_match_textblob(engine, text):
+    polarity, subjectivity = engine.score([text])
+    expected = TextBlob(text).sentiment
+    assert polarity[0] == pytest.approx(expected.polarity, abs=1e-9)
+    assert subjectivity[0] == pytest.approx(expected.subjectivity, abs=1e-9)
+
+
+def test_contracted_not_is_not_a_negation(engine):
+    # TextBlob tokenizes "isn't" as "is n ' t", so only "good" is assessed
+    polarity, _ = engine.score(["This isn't good.", "This is not good."])
+    assert polarity[0] == pytest.approx(0.7)
+    assert polarity[1] == pytest.approx(-0.35)
+
+
+def test_batch_scores_equal_single_scores(engine):
+    texts = CORPUS + CONTRACTIONS
+    batch_polarity, batch_subjectivity = engine.score(texts)
+    for i, text in enumerate(texts):
+        polarity, subjectivity = engine.score([text])
+        assert batch_polarity[i] == pytest.approx(polarity[0])
+        assert batch_subjectivity[i] == pytest.approx(subjectivity[0])
+
+
+def test_parity_report(engine):
+    report = parity_report(CORPUS + CONTRACTIONS, engine)
+    assert report["texts"] == len(CORPUS) + len(CONTRACTIONS)
+    assert report["classification_agreement"] == 1.0
+    assert report["max_abs_error"] <= 1  # int() truncation of equal floats
+
+
+def test_custom_lexicon():
+    lexicon = {
+        "good": {None: (0.5, 0.6, 1.0)},
+        "very": {None: (0.2, 0.3, 1.3), "RB": (0.2, 0.3, 1.3)},
+    }
+    engine = LexiconSentimentEngine(lexicon)
+    polarity, subjectivity = engine.score(["good", "very good", "not good", "nothing here"])
+    assert polarity.tolist() == pytest.approx([0.5, 0.65, -0.25, 0.0])
+    assert subjectivity.tolist() == pytest.approx([0.6, 0.78, 0.6, 0.0])
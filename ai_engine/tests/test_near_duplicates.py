@@ -0,0 +1,119 @@
+import pytest
+
+from near_duplicates import NearDuplicateIndex
+
+
+BASE = ("the library should stay open until midnight during the exam weeks because many "
+        "students prepare late in the evening and the hostel rooms are too noisy to study, "
+        "so a quiet reading hall with power sockets and good lighting would help everyone")
+EDITED = BASE.replace("midnight", "2am")
+OTHER = "the canteen food is too expensive and the queues at lunch time are far too long for everyone"
+
+
+def _ids(results):
+    return [r["id"] for r in results]
+
+
+def test_lightly_edited_copy_is_found():
+    index = NearDuplicateIndex()
+    index.add("p1", BASE)
+    index.add("p2", OTHER)
+
+    results = index.query(EDITED)
+    assert _ids(results) == ["p1"]
+    assert 0.8 <= results[0]["jaccard"] < 1.0
+    assert index.query(BASE)[0] == {"id": "p1", "jaccard": 1.0}
+
+
+def test_exclude_replace_and_remove():
+    index = NearDuplicateIndex()
+    index.add("p1", BASE)
+    index.add("p2", EDITED)
+    assert _ids(index.query(BASE, exclude="p1")) == ["p2"]
+
+    index.add("p2", OTHER)  # replaces the old text
+    assert _ids(index.query(BASE)) == ["p1"]
+    assert len(index) == 2
+
+    assert index.remove("p1") is True
+    assert index.remove("p1") is False
+    assert index.query(BASE) == []
+
+
+def test_text_without_words_is_not_indexed():
+    index = NearDuplicateIndex()
+    assert index.add("p1", "?!") is False
+    assert index.query("...") == []
+    assert len(index) == 0
+
+
+def test_pending_buffer_merges_keep_results(monkeypatch):
+    monkeypatch.setattr(NearDuplicateIndex, "MAX_PENDING", 4)
+    index = NearDuplicateIndex()
+    for i in range(20):
+        index.add(f"d{i}", f"{OTHER} variant number {i}")
+    index.add("p1", BASE)
+    for i in range(0, 20, 2):
+        index.remove(f"d{i}")
+    for i in range(20, 30):
+        index.add(f"d{i}", f"{OTHER} variant number {i}")
+
+    assert _ids(index.query(EDITED)) == ["p1"]
+    assert index.stats()["pending"] < 4
+    assert len(index) == 21
+
+
+def test_log_is_replayed_on_reload(tmp_path):
+    path = str(tmp_path / "nd")
+    index = NearDuplicateIndex(path)
+    index.add("p1", BASE)
+    index.add("p2", OTHER)
+    index.remove("p2")
+    index.close()
+
+    reloaded = NearDuplicateIndex(path)
+    assert len(reloaded) == 1
+    assert reloaded.query(EDITED) == index.query(EDITED)
+    assert reloaded.query(OTHER) == []
+    reloaded.close()
+
+
+def test_snapshot_plus_log_reload(tmp_path):
+    path = str(tmp_path / "nd")
+    index = NearDuplicateIndex(path)
+    index.add("p1", BASE)
+    index.add("p2", OTHER)
+    index.save()
+    index.remove("p1")
+    index.add("p3", EDITED)
+    index.close()
+
+    reloaded = NearDuplicateIndex(path)
+    assert sorted(reloaded._rows) == ["p2", "p3"]
+    assert _ids(reloaded.query(BASE)) == ["p3"]
+    assert _ids(reloaded.query(OTHER)) == ["p2"]
+    reloaded.close()
+
+
+def test_torn_final_log_line_is_ignored(tmp_path):
+    path = str(tmp_path / "nd")
+    index = NearDuplicateIndex(path)
+    index.add("p1", BASE)
+    index.close()
+    with open(f"{path}.log", "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "id": "p2", "si')
+
+    reloaded = NearDuplicateIndex(path)
+    assert len(reloaded) == 1
+    reloaded.close()
+
+
+def test_snapshot_with_other_parameters_is_rejected(tmp_path):
+    path = str(tmp_path / "nd")
+    index = NearDuplicateIndex(path)
+    index.add("p1", BASE)
+    index.save()
+    index.close()
+
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(path, num_perm=32, bands=8)
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+import sentiment_analyzer
+from sentiment_analyzer import SentimentAnalyzer
+
+
+TEXTS = ["great course, really helpful labs", "the wifi is slow and bad", "library is fine"] * 30
+OPTIONS = {"engine": "lexicon", "fields": ["score", "emotions"]}
+
+
+def _crashing_chunk(texts, fields=None, engine=None):
+    if "crash" in texts:
+        os._exit(1)
+    return sentiment_analyzer.POOL_TEST_ORIGINAL(texts, fields, engine)
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    monkeypatch.setattr(sentiment_analyzer, "POOL_TEST_ORIGINAL", sentiment_analyzer._analyze_chunk, raising=False)
+    monkeypatch.setattr(sentiment_analyzer, "_analyze_chunk", _crashing_chunk)
+    analyzer = SentimentAnalyzer(workers=2)
+    yield analyzer
+    analyzer.close()
+
+
+def test_parallel_results_match_in_process(analyzer):
+    expected = analyzer.analyze_batch(TEXTS, parallel=False, **OPTIONS)
+    assert analyzer.analyze_batch(TEXTS, parallel=True, **OPTIONS) == expected
+    assert analyzer._pool is not None
+
+
+def test_killed_workers_fall_back_and_restart_pool(analyzer):
+    expected = analyzer.analyze_batch(TEXTS, parallel=False, **OPTIONS)
+    analyzer.analyze_batch(TEXTS, parallel=True, **OPTIONS)
+    for process in list(analyzer._pool._processes.values()):
+        process.kill()
+
+    assert analyzer.analyze_batch(TEXTS, parallel=True, **OPTIONS) == expected
+    assert analyzer._pool is None
+
+    assert analyzer.analyze_batch(TEXTS, parallel=True, **OPTIONS) == expected
+    assert analyzer._pool is not None
+
+
+def test_worker_dying_mid_batch_still_returns_every_result(analyzer):
+    texts = TEXTS + ["crash"]
+    expected = analyzer.analyze_batch(texts, parallel=False, **OPTIONS)
+    assert analyzer.analyze_batch(texts, parallel=True, **OPTIONS) == expected
+    assert analyzer._pool is None
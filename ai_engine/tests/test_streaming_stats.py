@@ -0,0 +1,75 @@
+import random
+from collections import Counter
+
+import pytest
+
+from streaming_stats import SpaceSavingCounter
+
+
+def _stream(seed, n=3000, keys=200):
+    rng = random.Random(seed)
+    # Skewed (Zipf-like) stream so a few keys are real heavy hitters
+    return [f"k{int(keys * rng.random() ** 3)}" for _ in range(n)]
+
+
+def _assert_bounds(counter, truth):
+    for key, count in counter.counts.items():
+        assert count >= truth[key] >= count - counter.errors[key], key
+    assert len(counter) <= counter.capacity
+
+
+def test_counts_are_exact_within_capacity():
+    counter = SpaceSavingCounter(capacity=10)
+    for key in "abcabcaab":
+        counter.add(key)
+    assert counter.counts == {"a": 4, "b": 3, "c": 2}
+    assert set(counter.errors.values()) == {0}
+    assert counter.top(2) == {"a": 4, "b": 3}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_eviction_keeps_error_bounds_and_heavy_hitters(seed):
+    stream = _stream(seed)
+    counter = SpaceSavingCounter(capacity=20)
+    for key in stream:
+        counter.add(key)
+
+    truth = Counter(stream)
+    _assert_bounds(counter, truth)
+    # Any key above n / capacity occurrences is guaranteed to be tracked
+    for key, count in truth.items():
+        if count > len(stream) / counter.capacity:
+            assert key in counter.counts
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_merge_and_update_keep_error_bounds(seed):
+    streams = [_stream(seed * 10 + i, n=1000) for i in range(4)]
+    merged = SpaceSavingCounter(capacity=20)
+    for i, stream in enumerate(streams):
+        if i % 2:
+            merged.update(Counter(stream))
+        else:
+            part = SpaceSavingCounter(capacity=20)
+            for key in stream:
+                part.add(key)
+            merged.merge(part)
+        # Keep adding after the fold to exercise the rebuilt heap
+        merged.add("extra")
+
+    truth = Counter(key for stream in streams for key in stream)
+    truth["extra"] += len(streams)
+    _assert_bounds(merged, truth)
+
+
+def test_dict_round_trip():
+    counter = SpaceSavingCounter(capacity=3)
+    for key in "aabbbcd":
+        counter.add(key)
+    restored = SpaceSavingCounter.from_dict(counter.to_dict())
+    assert restored.capacity == 3
+    assert restored.counts == counter.counts
+    assert restored.errors == counter.errors
+
+    restored.add("e")
+    assert len(restored) == 3
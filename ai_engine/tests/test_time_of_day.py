@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from anomaly_detector import AnomalyDetector
+from time_of_day import circular_delta, local_hours, unwrap_hours
+
+
+DAY_STUDENT = [2.08, 11.67, 11.77, 11.78, 14.85, 17.03, 19.25, 21.45]
+NIGHT_STUDENT = [23.5, 0.25, 23.75, 22.0, 1.0]
+
+
+def _unwrap(*students):
+    hours = np.array([h for s in students for h in s], dtype=float)
+    offsets = np.concatenate([[0], np.cumsum([len(s) for s in students])])
+    return unwrap_hours(hours, offsets).tolist()
+
+
+def test_hours_straddling_midnight_are_unwrapped():
+    assert _unwrap(NIGHT_STUDENT) == [23.5, 24.25, 23.75, 22.0, 25.0]
+
+
+def test_day_student_with_a_late_check_in_stays_linear():
+    # The 2:08 -> 11:40 gap is the largest, but only ~5h longer than the
+    # gap across midnight, so the linear statistics are kept
+    assert _unwrap(DAY_STUDENT) == DAY_STUDENT
+
+
+def test_evening_and_early_morning_alternation_is_unwrapped():
+    assert _unwrap([20.0, 2.0, 20.5, 2.5]) == [20.0, 26.0, 20.5, 26.5]
+
+
+def test_students_are_unwrapped_independently():
+    assert _unwrap(NIGHT_STUDENT, [9.0, 10.0]) == [23.5, 24.25, 23.75, 22.0, 25.0, 9.0, 10.0]
+
+
+@pytest.mark.parametrize("students", [
+    ([], NIGHT_STUDENT, [], [9.0, 10.0], [], []),
+    ([], []),
+    ([7.5],),
+])
+def test_empty_and_single_check_in_students(students):
+    expected = [
+        h for s in students
+        for h in (_unwrap(s) if len(s) > 1 else s)
+    ]
+    assert _unwrap(*students) == expected
+
+
+def test_day_student_time_anomaly_matches_linear_statistics():
+    t0 = 1_699_920_000  # midnight UTC
+    timestamps = [t0 + 86400 * k + round(h * 3600) for k, h in enumerate(DAY_STUDENT)]
+    result = AnomalyDetector().analyze_student(
+        {"student_id": "s1", "checkin_times": timestamps, "session_ids": list(range(8)), "total_sessions": 8},
+        utc_offset_minutes=0,
+    )
+    assert result["risk_components"]["time_anomaly"] == 35
+
+
+def test_local_hours_and_circular_delta():
+    assert local_hours([0], 330).tolist() == [5.5]
+    assert local_hours([0, 86399], 0).tolist() == [0.0, 23 + 59 / 60]
+    assert circular_delta(0.25, 23.75) == 0.5
+    assert circular_delta(23.75, 0.25) == -0.5
@@ -0,0 +1,120 @@
+"""
+CampusTrust AI - Time of Day
+==============================
+Vectorized hour-of-day helpers shared by every time-based anomaly check.
+
+Hours are derived from unix timestamps with integer arithmetic and an
+explicit UTC offset (per course), so results do not depend on the
+server's timezone: a UTC container no longer flags morning lectures in
+IST as off-hours check-ins.
+
+Hours of day are circular (23:50 and 00:10 are 20 minutes apart). For
+per-student statistics each student's hours are "unwrapped": the circle
+is cut at the largest gap between that student's check-in hours, so a
+student who always checks in around midnight gets a small spread instead
+of a 12-hour one. The cut only moves off midnight when it shrinks the
+student's span by at least MIN_UNWRAP_GAIN_HOURS; everyone else keeps
+exactly the linear statistics, including day students with one odd
+late-night check-in.
+
+Features:
+- Hour of day (hour + minute / 60) for any UTC offset, in minutes
+- Server-local fallback (DST-aware, one lookup per distinct UTC hour)
+- Per-student unwrapping for circular mean / std / z-scores
+- Signed circular difference for online (incremental) statistics
+"""
+
+import calendar
+import time
+
+import numpy as np
+
+
+HOURS_PER_DAY = 24
+MIN_UNWRAP_GAIN_HOURS = 6  # Span reduction needed before cutting away from midnight
+
+
+def local_hours(timestamps, utc_offset_minutes=None):
+    """
+    Hour of day (hour + minute / 60) of every timestamp.
+
+    Args:
+        timestamps: array of unix times
+        utc_offset_minutes: local time offset from UTC (e.g. 330 for IST);
+            None uses the server's local timezone, as datetime.fromtimestamp
+
+    Returns:
+        float64 array in [0, 24)
+    """
+    timestamps = np.asarray(timestamps)
+    if timestamps.size == 0:
+        return np.zeros(0)
+
+    seconds = np.floor(timestamps).astype(np.int64)
+    if utc_offset_minutes is None:
+        # Look the offset up once per distinct UTC hour rather than per timestamp
+        buckets, inverse = np.unique(seconds // 3600, return_inverse=True)
+        bucket_offsets = np.array([
+            calendar.timegm(time.localtime(b * 3600)) - b * 3600 for b in buckets.tolist()
+        ], dtype=np.int64)
+        local = (seconds + bucket_offsets[inverse.ravel()]) % 86400
+    else:
+        local = (seconds + int(utc_offset_minutes) * 60) % 86400
+
+    return (local // 3600).astype(np.float64) + (local % 3600 // 60) / 60
+
+
+def unwrap_hours(hours, offsets):
+    """
+    Unwrap each student's hours so linear statistics become circular-aware.
+
+    Student i owns hours[offsets[i]:offsets[i + 1]]. Hours before the
+    far side of the student's largest circular gap get +24, e.g.
+    [23.5, 0.25, 23.75] becomes [23.5, 24.25, 23.75]. A student's hours
+    are returned unchanged unless that gap is at least
+    MIN_UNWRAP_GAIN_HOURS longer than the gap across midnight.
+    """
+    unwrapped = hours.copy()
+    counts = np.diff(offsets)
+    if hours.size == 0:
+        return unwrapped
+
+    owner = np.repeat(np.arange(len(counts)), counts)
+    order = np.lexsort((hours, owner))
+    sorted_hours = hours[order]
+
+    # Gap after each sorted hour; the last hour of a student wraps to the first
+    last = np.zeros(hours.size, dtype=bool)
+    last[offsets[1:][counts > 0] - 1] = True
+    # Students without check-ins own no hours, so only index non-empty segments
+    first_of_student = np.zeros(len(counts))
+    first_of_student[counts > 0] = sorted_hours[offsets[:-1][counts > 0]]
+    first_hour = first_of_student[owner]
+    gaps = np.empty(hours.size)
+    gaps[:-1] = sorted_hours[1:] - sorted_hours[:-1]
+    gaps[last] = first_hour[last] + HOURS_PER_DAY - sorted_hours[last]
+
+    largest = np.full(len(counts), -np.inf)
+    np.maximum.at(largest, owner, gaps)
+
+    # Keep the midnight cut unless the largest gap is clearly longer
+    keep_linear = np.ones(len(counts), dtype=bool)
+    keep_linear[owner[last]] = largest[owner[last]] - gaps[last] < MIN_UNWRAP_GAIN_HOURS
+
+    # Otherwise cut after the first largest gap: hours below the cut wrap
+    candidates = np.flatnonzero(~last & (gaps >= largest[owner]) & ~keep_linear[owner])
+    if candidates.size == 0:
+        return unwrapped
+    students, first = np.unique(owner[candidates], return_index=True)
+    cut = np.full(len(counts), -np.inf)
+    cut[students] = sorted_hours[candidates[first] + 1]
+
+    wraps = hours < cut[owner]
+    unwrapped[wraps] += HOURS_PER_DAY
+    return unwrapped
+
+
+def circular_delta(hour, reference):
+    """Signed shortest difference hour - reference on the 24h circle, in [-12, 12)."""
+    return (hour - reference + HOURS_PER_DAY / 2) % HOURS_PER_DAY - HOURS_PER_DAY / 2
+